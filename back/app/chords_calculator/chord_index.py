@@ -0,0 +1,118 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.borrowed_modes import INTERVALS
+from app.utils.common import CHORD_FORMULAS
+from constants import CORE_QUALITIES, NOTES
+
+
+def _build_quality_registry() -> Tuple[List[str], List[List[int]]]:
+    """
+    Qualités distinctes du registre (`INTERVALS`, complété par `CHORD_FORMULAS`) et
+    leurs intervalles ramenés à l'octave, dans l'ordre de la formule (l'inversion n
+    place l'intervalle n à la basse, comme dans le lecteur du frontend).
+
+    Les alias d'un même ensemble de notes ("", "M", "maj") ne sont gardés qu'une fois,
+    sous le premier nom. Les qualités reconnues par `parse_chord` passent en premier.
+    """
+    formulas = {
+        quality: intervals for quality, intervals in INTERVALS.items() if isinstance(quality, str)
+    }
+    for quality, intervals in CHORD_FORMULAS.items():
+        formulas.setdefault(quality, intervals)
+
+    ordered = sorted(formulas, key=lambda quality: quality not in CORE_QUALITIES)
+    qualities: List[str] = []
+    quality_intervals: List[List[int]] = []
+    seen = set()
+    for quality in ordered:
+        intervals = list(dict.fromkeys(interval % 12 for interval in formulas[quality]))
+        pitch_set = frozenset(intervals)
+        if pitch_set in seen:
+            continue
+        seen.add(pitch_set)
+        qualities.append(quality)
+        quality_intervals.append(intervals)
+    return qualities, quality_intervals
+
+
+QUALITIES, QUALITY_INTERVALS = _build_quality_registry()
+
+
+def pitch_class_mask(pitch_classes: Iterable[int]) -> int:
+    """Ensemble de classes de hauteurs (0-11) sous forme de masque 12 bits."""
+    mask = 0
+    for pitch_class in pitch_classes:
+        mask |= 1 << (pitch_class % 12)
+    return mask
+
+
+def _build_chord_index() -> Dict[int, List[Tuple[int, int]]]:
+    index: Dict[int, List[Tuple[int, int]]] = {}
+    for quality_index, intervals in enumerate(QUALITY_INTERVALS):
+        for root in range(12):
+            mask = pitch_class_mask(root + interval for interval in intervals)
+            index.setdefault(mask, []).append((root, quality_index))
+    for candidates in index.values():
+        candidates.sort(key=lambda candidate: (candidate[1], candidate[0]))
+    return index
+
+
+# Masque 12 bits -> [(fondamentale, indice de qualité)], du nom le plus courant au plus rare
+CHORD_INDEX = _build_chord_index()
+
+
+def identify_chord(
+    pitch_classes: Iterable[int], bass: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Accords correspondant exactement à un ensemble de notes, par pertinence. Si la
+    basse est connue, les accords dont elle est la fondamentale passent en premier et
+    l'inversion est celle qui la place à la basse.
+    """
+    mask = pitch_class_mask(pitch_classes)
+    if bass is not None:
+        bass %= 12
+        mask |= 1 << bass
+    candidates = CHORD_INDEX.get(mask, [])
+    results = []
+    for root, quality_index in candidates:
+        inversion = 0
+        if bass is not None:
+            inversion = QUALITY_INTERVALS[quality_index].index((bass - root) % 12)
+        quality = QUALITIES[quality_index]
+        results.append(
+            {
+                "chord": f"{NOTES[root]}{quality}",
+                "root": NOTES[root],
+                "quality": quality,
+                "inversion": inversion,
+            }
+        )
+    if bass is not None:
+        results.sort(key=lambda result: result["inversion"] != 0)
+    return results
+
+
+@lru_cache(maxsize=1)
+def get_chord_index_blob() -> Dict[str, Any]:
+    """
+    Index complet sous forme compacte pour le frontend : chaque entrée de `chords`
+    code `fondamentale * 256 + indice de qualité`, rangée par pertinence. Pour une
+    basse donnée, l'inversion est la position de l'intervalle (basse - fondamentale)
+    dans `intervals[indice de qualité]`. `version` change avec le contenu.
+    """
+    blob: Dict[str, Any] = {
+        "notes": NOTES,
+        "qualities": QUALITIES,
+        "intervals": QUALITY_INTERVALS,
+        "chords": {
+            str(mask): [root * 256 + quality_index for root, quality_index in candidates]
+            for mask, candidates in sorted(CHORD_INDEX.items())
+        },
+    }
+    content = json.dumps(blob, separators=(",", ":"), sort_keys=True)
+    blob["version"] = hashlib.sha256(content.encode()).hexdigest()[:16]
+    return blob
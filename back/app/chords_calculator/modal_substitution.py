@@ -1,7 +1,7 @@
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from app.utils.chords_analyzer import QualityAnalysisItem
+from app.utils.chords_analyzer import AnalyzedChord, QualityAnalysisItem
 from app.utils.common import get_diatonic_7th_chord, get_note_from_index
 from constants import MODE_SPECIFIC_NUMERALS, MODES_DATA, ROMAN_TO_DEGREE_MAP
 
@@ -69,8 +69,38 @@ def get_diatonic_triad_chord(degree: int, tonic_index: int, mode_name: str) -> s
         return root_note_name + triad_quality
 
 
+def _build_substitution_table() -> Dict[Tuple[str, int, int, bool], Tuple[str, str, str]]:
+    """
+    Précalcule, pour chaque mode, degré (1-7), tonique (0-11) et nature de l'accord
+    (triade ou 7e), le nom de l'accord de substitution, son chiffrage romain et sa qualité.
+    """
+    table: Dict[Tuple[str, int, int, bool], Tuple[str, str, str]] = {}
+    for mode_name, (_, mode_qualities, _) in MODES_DATA.items():
+        mode_numerals = MODE_SPECIFIC_NUMERALS[mode_name]
+        for degree in range(1, 8):
+            roman_numeral = mode_numerals[degree - 1]
+            seventh_quality = mode_qualities[degree - 1]
+            triad_quality = SEVENTH_TO_TRIAD_MAP.get(seventh_quality, "")
+            for tonic_index in range(12):
+                table[(mode_name, degree, tonic_index, True)] = (
+                    get_diatonic_triad_chord(degree, tonic_index, mode_name),
+                    roman_numeral,
+                    triad_quality,
+                )
+                table[(mode_name, degree, tonic_index, False)] = (
+                    get_diatonic_7th_chord(degree, tonic_index, mode_name),
+                    roman_numeral,
+                    seventh_quality,
+                )
+    return table
+
+
+# (mode, degré, tonique, is_triad) -> (nom de l'accord, chiffrage romain, qualité)
+SUBSTITUTION_TABLE = _build_substitution_table()
+
+
 def get_substitution_info(
-    quality_analysis: List[QualityAnalysisItem],
+    quality_analysis: Sequence[QualityAnalysisItem | AnalyzedChord],
 ) -> List[Optional[Dict[str, Any]]]:
     """
     Prend l'analyse et retourne les informations pour la substitution.
@@ -105,6 +135,20 @@ def get_substitution_info(
     return substitution_info_list
 
 
+def _get_substitution_row(
+    relative_tonic_index: int, info: Dict[str, Any], mode_name: str
+) -> Tuple[str, str, str]:
+    # Triade si l'original est une triade, accord de 7e sinon
+    row = SUBSTITUTION_TABLE.get(
+        (mode_name, info["degree"], relative_tonic_index % 12, info["is_triad"])
+    )
+    if row is None:
+        raise ValueError(
+            f"Aucune substitution pour le mode '{mode_name}' et le degré {info['degree']}."
+        )
+    return row
+
+
 def get_substitutions(
     progression: List[str],
     relative_tonic_index: int,
@@ -113,14 +157,8 @@ def get_substitutions(
 ) -> List[dict]:
     """
     Crée une liste d'accords de substitution en se basant sur la nature (triade ou 7e)
-    de l'accord original.
+    de l'accord original. Chaque accord est lu dans `SUBSTITUTION_TABLE`.
     """
-    try:
-        current_mode_qualities = MODES_DATA[mode_name][1]
-    except KeyError:
-        # Fallback sur Ionian si le mode n'est pas trouvé, pour éviter de crasher.
-        current_mode_qualities = MODES_DATA["Ionian"][1]
-
     substituted_chords: List[dict] = []
 
     for index, info in enumerate(sub_info):
@@ -128,27 +166,26 @@ def get_substitutions(
             substituted_chords.append({"chord": progression[index], "roman": None, "quality": None})
             continue
 
-        degree = info["degree"]
-        is_original_chord_triad = info["is_triad"]
-
-        # Qualité de 7e diatonique pour ce degré
-        seventh_quality = current_mode_qualities[degree - 1]
-
-        if is_original_chord_triad:
-            # Si l'original est une triade, on substitue par une triade
-            expected_quality = SEVENTH_TO_TRIAD_MAP.get(seventh_quality, "")
-            # On suppose l'existence d'une fonction qui génère la triade diatonique
-            chord_name = get_diatonic_triad_chord(degree, relative_tonic_index, mode_name)
-        else:
-            # Sinon, on substitue par un accord de 7e
-            expected_quality = seventh_quality
-            chord_name = get_diatonic_7th_chord(degree, relative_tonic_index, mode_name)
-
-        # Formatage du chiffrage romain
-        roman_numeral = MODE_SPECIFIC_NUMERALS.get(mode_name, [])[degree - 1]
-
+        chord_name, roman_numeral, expected_quality = _get_substitution_row(
+            relative_tonic_index, info, mode_name
+        )
         substituted_chords.append(
             {"chord": chord_name, "roman": roman_numeral, "quality": expected_quality}
         )
 
     return substituted_chords
+
+
+def get_substituted_chords(
+    progression: List[str],
+    relative_tonic_index: int,
+    sub_info: List[Optional[Dict[str, Any]]],
+    mode_name: str = "Ionian",
+) -> List[str]:
+    """Noms des accords de `get_substitutions`, sans construire un dict par accord."""
+    return [
+        progression[index]
+        if info is None
+        else _get_substitution_row(relative_tonic_index, info, mode_name)[0]
+        for index, info in enumerate(sub_info)
+    ]
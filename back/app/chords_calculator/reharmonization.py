@@ -0,0 +1,255 @@
+import time
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, TypedDict
+
+from app.chords_calculator.modal_substitution import SUBSTITUTION_TABLE, get_substitution_info
+from app.chords_calculator.secondary_dominant import DOMINANT_CHORDS
+from app.chords_calculator.tritone_substitution import get_tritone_substitute
+from app.utils.chords_analyzer import analyze_chord_in_context
+from app.utils.common import get_chord_notes, get_note_from_index, get_note_index, parse_chord
+from constants import CORE_QUALITIES, MODES_DATA, NOTE_INDEX_MAP
+
+# Coût propre à chaque type de mouvement : à conduite des voix égale, on préfère
+# rester proche de la grille d'origine.
+MOVE_COSTS = {
+    "original": 0.0,
+    "modal_interchange": 0.3,
+    "tritone_substitution": 0.3,
+    "secondary_dominant": 0.4,
+    "ii_v": 0.6,
+}
+# Coût par note de l'accord hors de la gamme de la tonalité
+OUT_OF_SCALE_NOTE_COST = 0.25
+# Bonus (coût négatif) d'une dominante qui se résout (quinte descendante ou demi-ton)
+RESOLUTION_BONUS = -1.5
+
+DEFAULT_BEAM_WIDTH = 8
+DEFAULT_TOP_K = 5
+DEFAULT_TIME_BUDGET_MS = 50.0
+
+
+class ReharmonizedChord(TypedDict):
+    chord: str
+    move: str
+    source_index: int
+    duration: int
+
+
+# Une option de réharmonisation pour un accord : (mouvement, [(accord, durée)], coût interne)
+Option = Tuple[str, Tuple[Tuple[str, int], ...], float]
+
+
+@lru_cache(maxsize=4096)
+def get_pitch_classes(chord_name: str) -> FrozenSet[int]:
+    """Ensemble des classes de hauteurs (0-11) d'un accord, vide s'il n'est pas reconnu."""
+    chord_notes = get_chord_notes(chord_name)
+    if not chord_notes:
+        return frozenset()
+    return frozenset(NOTE_INDEX_MAP[note] for note in chord_notes)
+
+
+def voice_leading_distance(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    """
+    Distance moyenne (en demi-tons) entre chaque note d'un accord et la note la plus
+    proche de l'autre accord, dans les deux sens.
+    """
+    if not first or not second:
+        return 0.0
+
+    def closest(note: int, chord: FrozenSet[int]) -> int:
+        return min(min((note - other) % 12, (other - note) % 12) for other in chord)
+
+    total = sum(closest(note, second) for note in first)
+    total += sum(closest(note, first) for note in second)
+    return total / (len(first) + len(second))
+
+
+@lru_cache(maxsize=4096)
+def transition_cost(previous_chord: str, next_chord: str) -> float:
+    """Conduite des voix entre deux accords, avec un bonus si le premier se résout sur le second."""
+    cost = voice_leading_distance(get_pitch_classes(previous_chord), get_pitch_classes(next_chord))
+
+    previous_parsed = parse_chord(previous_chord)
+    next_parsed = parse_chord(next_chord)
+    if previous_parsed and next_parsed:
+        previous_root, previous_quality, _ = previous_parsed
+        if CORE_QUALITIES.get(previous_quality) == "dominant":
+            # V7 -> I (quinte descendante) ou subV7 -> I (demi-ton descendant)
+            if (previous_root - next_parsed[0]) % 12 in (7, 1):
+                cost += RESOLUTION_BONUS
+    return cost
+
+
+def _tension_cost(chord_name: str, scale: FrozenSet[int]) -> float:
+    return OUT_OF_SCALE_NOTE_COST * len(get_pitch_classes(chord_name) - scale)
+
+
+def _get_scale(tonic_index: int, mode_name: str) -> FrozenSet[int]:
+    return frozenset((tonic_index + interval) % 12 for interval in MODES_DATA[mode_name][0])
+
+
+def _make_option(move: str, chords: List[Tuple[str, int]], scale: FrozenSet[int]) -> Option:
+    """Option de réharmonisation avec son coût interne (mouvement, tension, transitions)."""
+    internal_cost = MOVE_COSTS[move] + sum(_tension_cost(name, scale) for name, _ in chords)
+    for (previous_chord, _), (next_chord, _) in zip(chords, chords[1:]):
+        internal_cost += transition_cost(previous_chord, next_chord)
+    return (move, tuple(chords), internal_cost)
+
+
+def _split_duration(duration: int, parts: int) -> Optional[List[int]]:
+    """
+    Partage la durée d'un accord cible avec les accords insérés devant lui : les accords
+    insérés se partagent la première moitié. Retourne None si la durée est trop courte.
+    """
+    inserted_duration = duration // (2 * parts)
+    if inserted_duration < 1:
+        return None
+    return [inserted_duration] * parts + [duration - inserted_duration * parts]
+
+
+def get_reharmonization_options(
+    chord_name: str,
+    duration: int,
+    tonic_index: int,
+    mode_name: str,
+) -> List[Option]:
+    """
+    Liste les options de réharmonisation d'un accord : accord d'origine, emprunt modal
+    (même degré dans les modes de `MODES_DATA`), substitution tritonique, dominante
+    secondaire (V7/x) et insertion d'un ii–V vers l'accord.
+    """
+    scale = _get_scale(tonic_index, mode_name)
+    candidates: List[Tuple[str, List[Tuple[str, int]]]] = [("original", [(chord_name, duration)])]
+    seen = {chord_name}
+
+    parsed_chord = parse_chord(chord_name)
+    if parsed_chord:
+        root_index, quality, _ = parsed_chord
+
+        # Emprunt modal : même degré, même nature (triade ou 7e) dans un mode parallèle
+        analysis = analyze_chord_in_context(chord_name, tonic_index, mode_name)
+        sub_info = get_substitution_info([analysis])[0]
+        if sub_info is not None:
+            for borrowed_mode in MODES_DATA:
+                row = SUBSTITUTION_TABLE.get(
+                    (borrowed_mode, sub_info["degree"], tonic_index, sub_info["is_triad"])
+                )
+                if row and row[0] not in seen:
+                    seen.add(row[0])
+                    candidates.append(("modal_interchange", [(row[0], duration)]))
+
+        # Substitution tritonique des accords de dominante
+        tritone_substitute, _ = get_tritone_substitute(chord_name)
+        if tritone_substitute.strip() and tritone_substitute not in seen:
+            seen.add(tritone_substitute)
+            candidates.append(("tritone_substitution", [(tritone_substitute, duration)]))
+
+        if CORE_QUALITIES.get(quality) != "diminished":
+            # V7/x inséré devant l'accord
+            durations = _split_duration(duration, 1)
+            if durations:
+                dominant = DOMINANT_CHORDS[root_index]
+                candidates.append(
+                    ("secondary_dominant", [(dominant, durations[0]), (chord_name, durations[1])])
+                )
+
+            # ii–V vers l'accord (ii demi-diminué vers une cible mineure)
+            durations = _split_duration(duration, 2)
+            if durations:
+                target_is_minor = CORE_QUALITIES.get(quality) == "minor"
+                two_chord = get_note_from_index(root_index + 2) + (
+                    "m7b5" if target_is_minor else "m7"
+                )
+                candidates.append(
+                    (
+                        "ii_v",
+                        [
+                            (two_chord, durations[0]),
+                            (DOMINANT_CHORDS[root_index], durations[1]),
+                            (chord_name, durations[2]),
+                        ],
+                    )
+                )
+
+    return [_make_option(move, chords, scale) for move, chords in candidates]
+
+
+def reharmonize(
+    progression: List[str],
+    durations: List[int],
+    tonic: str,
+    mode_name: str = "Ionian",
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    top_k: int = DEFAULT_TOP_K,
+    time_budget_ms: float = DEFAULT_TIME_BUDGET_MS,
+) -> Dict[str, Any]:
+    """
+    Génère des progressions réharmonisées complètes et retourne les `top_k` meilleures,
+    classées par coût croissant (conduite des voix + tension + coût des mouvements).
+
+    Recherche en faisceau : à chaque accord, chaque progression partielle est prolongée
+    par toutes les options de l'accord et seules les `beam_width` moins coûteuses sont
+    conservées. Une fois `time_budget_ms` écoulé, les accords restants sont conservés
+    tels quels, ce qui borne la latence quelle que soit la longueur de la progression.
+    """
+    if mode_name not in MODES_DATA:
+        raise ValueError(f"Le mode '{mode_name}' n'est pas reconnu.")
+    tonic_index = get_note_index(tonic)
+    scale = _get_scale(tonic_index, mode_name)
+    deadline = time.perf_counter() + time_budget_ms / 1000
+
+    # Faisceau : (coût, dernier accord, identifiant de la suite d'accords, chemin). Le
+    # chemin est une liste chaînée (accords ajoutés, chemin parent) pour ne pas recopier
+    # la suite entière à chaque extension. Les états du faisceau ont des suites distinctes :
+    # (identifiant parent, accords de l'option) identifie donc exactement une suite.
+    beam: List[Tuple[float, Optional[str], int, Any]] = [(0.0, None, 0, None)]
+    truncated = False
+
+    for source_index, (chord_name, duration) in enumerate(zip(progression, durations)):
+        if not truncated and time.perf_counter() > deadline:
+            truncated = True
+        if truncated:
+            # Budget épuisé : l'accord est conservé tel quel, sans générer ses options
+            options = [_make_option("original", [(chord_name, duration)], scale)]
+        else:
+            options = get_reharmonization_options(chord_name, duration, tonic_index, mode_name)
+
+        expanded: Dict[Tuple[int, Tuple[str, ...]], Tuple[float, Optional[str], Any]] = {}
+        for cost, last_chord, sequence_id, path in beam:
+            for move, option_chords, internal_cost in options:
+                new_cost = cost + internal_cost
+                if last_chord is not None:
+                    new_cost += transition_cost(last_chord, option_chords[0][0])
+
+                # Deux chemins menant à la même suite d'accords : on garde le moins coûteux
+                key = (sequence_id, tuple(name for name, _ in option_chords))
+                if key in expanded and expanded[key][0] <= new_cost:
+                    continue
+                added_chords = (source_index, move, option_chords)
+                expanded[key] = (new_cost, option_chords[-1][0], (added_chords, path))
+
+        best_states = sorted(expanded.values(), key=lambda state: state[0])[:beam_width]
+        beam = [
+            (cost, last_chord, new_id, path)
+            for new_id, (cost, last_chord, path) in enumerate(best_states)
+        ]
+
+    candidates = []
+    for cost, _, _, path in beam[:top_k]:
+        steps = []
+        while path is not None:
+            steps.append(path[0])
+            path = path[1]
+        chords: List[ReharmonizedChord] = [
+            {"chord": name, "move": move, "source_index": index, "duration": chord_duration}
+            for index, move, option_chords in reversed(steps)
+            for name, chord_duration in option_chords
+        ]
+        candidates.append({"score": round(cost, 3), "chords": chords})
+
+    return {
+        "tonic": tonic,
+        "mode": mode_name,
+        "truncated": truncated,
+        "candidates": candidates,
+    }
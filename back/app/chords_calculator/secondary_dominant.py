@@ -1,3 +1,6 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.chords_calculator.modal_substitution import SUBSTITUTION_TABLE
 from app.utils.common import (
     format_numeral,
     get_chord_notes,
@@ -6,7 +9,13 @@ from app.utils.common import (
     get_scale_notes,
     parse_chord,
 )
-from constants import CORE_QUALITIES, MODE_SPECIFIC_NUMERALS, MODES_DATA
+from constants import (
+    CORE_QUALITIES,
+    MAJOR_MODES_DATA,
+    MODE_SPECIFIC_NUMERALS,
+    MODES_DATA,
+    NOTE_INDEX_MAP,
+)
 
 
 def is_chord_diatonic(chord_name, tonic_name, mode_name):
@@ -96,3 +105,74 @@ def get_secondary_dominant_for_target(target_chord_name, tonic_name, mode_name):
         analysis = f"V7/{target_numeral}"
 
     return dominant_chord, analysis
+
+
+def _build_secondary_dominant_table() -> Dict[Tuple[str, int, str], Tuple[bool, Optional[str]]]:
+    """
+    Précalcule l'analyse V7/x pour chaque mode majeur, intervalle cible/tonique (0-11)
+    et qualité produite par la substitution modale. La fonction d'une dominante ne
+    dépend que de ces trois paramètres : on l'évalue une fois en Do, puis on transpose.
+
+    Valeur : (la cible accepte une dominante, analyse). L'analyse vaut None pour les
+    cibles hors du mode, dont le chiffrage reprend le nom de l'accord : "V7/(Dbmaj7)".
+    """
+    qualities = {quality for _, _, quality in SUBSTITUTION_TABLE.values()}
+    table: Dict[Tuple[str, int, str], Tuple[bool, Optional[str]]] = {}
+    for mode_name, (mode_intervals, _, _) in MAJOR_MODES_DATA.items():
+        for interval in range(12):
+            for quality in qualities:
+                dominant_chord, analysis = get_secondary_dominant_for_target(
+                    get_note_from_index(interval) + quality, "C", mode_name
+                )
+                has_dominant = dominant_chord != "N/A"
+                if has_dominant and interval not in mode_intervals:
+                    table[(mode_name, interval, quality)] = (True, None)
+                else:
+                    table[(mode_name, interval, quality)] = (has_dominant, analysis)
+    return table
+
+
+# (mode, intervalle de la cible, qualité de la cible) -> (dominante possible, analyse ou None)
+SECONDARY_DOMINANT_TABLE = _build_secondary_dominant_table()
+
+# Dominante (V7) de chaque fondamentale, indexée par la fondamentale de la cible
+DOMINANT_CHORDS = [f"{get_note_from_index(root_index + 7)}7" for root_index in range(12)]
+
+
+def get_secondary_dominants_for_modes(
+    substitutions: Dict[str, Dict[str, Any]], tonic_name: str
+) -> Dict[str, List[Tuple[str, str, str]]]:
+    """
+    Calcule en une passe les dominantes secondaires de toutes les substitutions modales
+    (`{mode: {"substitution": [{"chord": ...}, ...]}}`), dans la tonalité `tonic_name`.
+
+    Retourne `{mode: [(dominante, accord cible, analyse), ...]}`, identique à des appels
+    successifs à `get_secondary_dominant_for_target`. Les accords absents des tables
+    (qualité originale conservée, orthographe non standard...) passent par ce calcul.
+    """
+    tonic_index = get_note_index(tonic_name)
+    secondary_dominants: Dict[str, List[Tuple[str, str, str]]] = {}
+
+    for mode_name, substitutions_data in substitutions.items():
+        mode_results: List[Tuple[str, str, str]] = []
+        for item in substitutions_data["substitution"]:
+            target_chord_name = item["chord"]
+            parsed_target = parse_chord(target_chord_name) if target_chord_name else None
+            row = None
+            if parsed_target and parsed_target[2] in NOTE_INDEX_MAP:
+                target_root_index, target_quality, _ = parsed_target
+                interval = (target_root_index - tonic_index + 12) % 12
+                row = SECONDARY_DOMINANT_TABLE.get((mode_name, interval, target_quality))
+
+            if row is not None:
+                has_dominant, table_analysis = row
+                dominant_chord = DOMINANT_CHORDS[target_root_index] if has_dominant else "N/A"
+                analysis = table_analysis or f"V7/({target_chord_name})"
+            else:
+                dominant_chord, analysis = get_secondary_dominant_for_target(
+                    target_chord_name, tonic_name, mode_name
+                )
+            mode_results.append((dominant_chord, target_chord_name, analysis))
+        secondary_dominants[mode_name] = mode_results
+
+    return secondary_dominants
@@ -0,0 +1,163 @@
+from functools import lru_cache
+from operator import add
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.common import CHORD_FORMULAS, get_note_index
+from constants import NOTE_INDEX_MAP, NOTES
+
+# Mêmes pondérations que l'import rapide du frontend (ChordProgressionBuilder.vue)
+SOPRANO_WEIGHT = 3.0
+BASS_WEIGHT = 2.0
+OVERALL_WEIGHT = 1.0
+REPEATED_BASS_PENALTY = 10.0
+# Octave de la fondamentale à l'inversion 0, comme `getNotesForChord` (sampler.js)
+BASE_OCTAVE = 3
+# Rappel vers le registre central : sans lui, toute la progression pourrait être
+# transposée d'une octave sans changer le coût des mouvements
+REGISTER_CENTER = 43  # G3, au format MIDI du frontend (octave * 12 + index)
+REGISTER_WEIGHT = 0.2
+
+# Un voicing : (inversion, notes MIDI triées)
+Voicing = Tuple[int, Tuple[int, ...]]
+
+
+def note_to_midi(note: str) -> int:
+    """Convertit une note du lecteur ("D#4") en hauteur MIDI, comme `noteToMidi` (sampler.js)."""
+    return int(note[-1]) * 12 + NOTE_INDEX_MAP[note[:-1]]
+
+
+def midi_to_note(midi: int) -> str:
+    return f"{NOTES[midi % 12]}{midi // 12}"
+
+
+@lru_cache(maxsize=1024)
+def get_voicings(root_index: int, quality: str) -> Tuple[Voicing, ...]:
+    """
+    Voicings candidats d'un accord : un par inversion de -n à 2n - 1 (n = nombre de
+    notes), construits comme `getNotesForChord` pour que le lecteur joue exactement
+    les mêmes notes à partir de l'inversion seule. Vide si la qualité est inconnue.
+    """
+    intervals = CHORD_FORMULAS.get(quality)
+    if not intervals:
+        return ()
+
+    base_notes = [BASE_OCTAVE * 12 + root_index + interval for interval in intervals]
+    count = len(base_notes)
+    voicings = []
+    for inversion in range(-count, 2 * count):
+        octave_shift, effective_inversion = divmod(inversion, count)
+        notes = [
+            note + 12 * (octave_shift + (1 if i < effective_inversion else 0))
+            for i, note in enumerate(base_notes)
+        ]
+        voicings.append((inversion, tuple(sorted(notes))))
+    return tuple(voicings)
+
+
+def _register_cost(notes: Tuple[int, ...]) -> float:
+    return REGISTER_WEIGHT * abs(sum(notes) / len(notes) - REGISTER_CENTER)
+
+
+def movement_cost(previous: Tuple[int, ...], current: Tuple[int, ...]) -> float:
+    """
+    Coût de l'enchaînement de deux voicings (notes triées) : mouvement du soprano,
+    de la basse et mouvement moyen des voix appariées par rang, avec une pénalité
+    si la basse est répétée (même calcul que `calculateMusicalCost` du frontend).
+    """
+    cost = SOPRANO_WEIGHT * abs(previous[-1] - current[-1])
+    cost += BASS_WEIGHT * abs(previous[0] - current[0])
+    paired = min(len(previous), len(current))
+    cost += OVERALL_WEIGHT * sum(abs(a - b) for a, b in zip(previous, current)) / paired
+    if previous[0] == current[0]:
+        cost += REPEATED_BASS_PENALTY
+    return cost
+
+
+@lru_cache(maxsize=4096)
+def transition_matrix(
+    previous: Tuple[Voicing, ...], current: Tuple[Voicing, ...]
+) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Matrice des coûts d'enchaînement, une ligne par voicing de `current` (coût depuis
+    chaque voicing de `previous`, registre de `current` compris). Mise en cache : une
+    chanson réutilise sans cesse les mêmes couples d'accords.
+    """
+    rows = []
+    for _, current_notes in current:
+        register_cost = _register_cost(current_notes)
+        rows.append(
+            tuple(movement_cost(notes, current_notes) + register_cost for _, notes in previous)
+        )
+    return tuple(rows)
+
+
+def _get_candidates(root: str, quality: str, notes: Optional[List[str]]) -> Tuple[Voicing, ...]:
+    # Notes imposées par l'utilisateur : seul candidat possible
+    if notes:
+        try:
+            return ((0, tuple(sorted(note_to_midi(note) for note in notes))),)
+        except (KeyError, ValueError):
+            return ()
+    try:
+        return get_voicings(get_note_index(root), quality)
+    except ValueError:
+        return ()
+
+
+def optimize_voicings(
+    chords: Sequence[Tuple[str, str]],
+    fixed_notes: Optional[Sequence[Optional[List[str]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Choisit le voicing de chaque accord (fondamentale, qualité) qui minimise le
+    mouvement total des voix sur toute la progression.
+
+    Programmation dynamique en O(n·V²) sur les V voicings candidats de chaque accord :
+    pour chaque voicing de l'accord courant, on garde le meilleur prédécesseur, puis
+    on remonte les pointeurs depuis le meilleur voicing final. Les accords dont la
+    qualité est inconnue n'ont pas de voicing et sont ignorés par l'enchaînement.
+    `fixed_notes` permet d'imposer les notes d'un accord (voicing choisi par l'utilisateur).
+
+    Retourne le coût total et, par accord, l'inversion et les notes au format du
+    lecteur du frontend ("C4", "D#4"...), ou None si l'accord n'a pas pu être voicé.
+    """
+    fixed_notes = fixed_notes or [None] * len(chords)
+    candidates = [
+        _get_candidates(root, quality, notes) for (root, quality), notes in zip(chords, fixed_notes)
+    ]
+    voiced_indices = [index for index, voicings in enumerate(candidates) if voicings]
+
+    voicings_result: List[Dict[str, Any]] = [{"inversion": None, "notes": None} for _ in chords]
+    if not voiced_indices:
+        return {"total_cost": 0.0, "voicings": voicings_result}
+
+    first = candidates[voiced_indices[0]]
+    costs = [_register_cost(notes) for _, notes in first]
+    backpointers: List[List[int]] = []
+    for previous_index, index in zip(voiced_indices, voiced_indices[1:]):
+        matrix = transition_matrix(candidates[previous_index], candidates[index])
+        new_costs = []
+        pointers = []
+        for row in matrix:
+            totals = list(map(add, costs, row))
+            best = min(range(len(totals)), key=totals.__getitem__)
+            new_costs.append(totals[best])
+            pointers.append(best)
+        costs = new_costs
+        backpointers.append(pointers)
+
+    best = min(range(len(costs)), key=costs.__getitem__)
+    total_cost = costs[best]
+    choices = [best]
+    for pointers in reversed(backpointers):
+        best = pointers[best]
+        choices.append(best)
+    choices.reverse()
+
+    for index, choice in zip(voiced_indices, choices):
+        inversion, notes = candidates[index][choice]
+        voicings_result[index] = {
+            "inversion": inversion,
+            "notes": [midi_to_note(note) for note in notes],
+        }
+    return {"total_cost": round(total_cost, 3), "voicings": voicings_result}
@@ -1,21 +1,94 @@
-from typing import Any, Dict, List, Tuple
+import os
+import secrets
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.chords_calculator.modal_substitution import get_substitution_info, get_substitutions
-from app.chords_calculator.secondary_dominant import get_secondary_dominant_for_target
-from app.chords_calculator.tritone_substitution import get_tritone_substitute
-from app.schema import ChordItem, ProgressionRequest
-from app.services.analysis import get_analysis_data
-from app.services.data_filler import fill_interface_data
-from app.utils.borrowed_modes import get_borrowed_chords
-from app.utils.chords_analyzer import QualityAnalysisItem, analyze_chord_in_context
-from app.utils.common import get_note_from_index, get_note_index
-from constants import MAJOR_MODES_DATA, MODES_DATA
+from app.chords_calculator.chord_index import get_chord_index_blob, identify_chord
+from app.chords_calculator.reharmonization import (
+    get_pitch_classes,
+    reharmonize,
+    transition_cost,
+)
+from app.chords_calculator.voice_leading import optimize_voicings, transition_matrix
+from app.schema import (
+    ChordItem,
+    LibraryProgressionRequest,
+    ModelName,
+    ProgressionRequest,
+    ReharmonizationRequest,
+    SimilarityRequest,
+    ValidationRequest,
+    VoiceLeadingRequest,
+)
+from app.services.allocations import AllocationTracker
+from app.services.compact_format import (
+    COMPACT_FORMAT,
+    COMPACT_MEDIA_TYPE,
+    encode_compact,
+    wants_compact,
+)
+from app.services.gemini_clients import gemini_clients, get_warmup_models
+from app.services.llm_limiter import LLMOverloadedError
+from app.services.metrics import (
+    observe_request,
+    observe_request_tokens,
+    record_progression_length,
+    register_cache,
+    track_stage,
+)
+from app.services.pipeline import get_progression, run_analysis_pipeline
+from app.services.pipeline_pool import pipeline_pool
+from app.services.presets import get_catalog, preset_store
+from app.services.profiling import SamplingProfiler, save_profile
+from app.services.progression_encoding import (
+    analysis_responses,
+    decode_progression,
+    encode_progression,
+    etag_matches,
+    get_analysis_etag,
+)
+from app.services.similarity import LibraryFullError, get_numerals, progression_library
+from app.services.token_budget import TokenBudgetExceededError, track_token_usage
+from app.services.tonality_detection import detect_with_fallback, is_local_analysis
+from app.utils.chord_validation import (
+    InvalidProgressionError,
+    ensure_valid_progression,
+    validate_progression,
+)
+from app.utils.chords_analyzer import analyze_chord
+from app.utils.common import get_note_index
+
+# `/analyze` a deux formats (JSON complet ou compact) selon l'en-tête `Accept`
+VARY_ACCEPT = {"Vary": "Accept"}
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Préchauffe les clients Gemini pour que la première requête ne paie pas leur création
+    await run_in_threadpool(gemini_clients.warm_up, get_warmup_models())
+    # Bibliothèque de progressions pour la recherche par similarité
+    await run_in_threadpool(progression_library.load)
+    # Workers préchauffés pour la partie théorique des longues progressions
+    await run_in_threadpool(pipeline_pool.start)
+    yield
+    pipeline_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+register_cache("reharmonization_pitch_classes", get_pitch_classes.cache_info)
+register_cache("reharmonization_transitions", transition_cost.cache_info)
+register_cache("voice_leading_transitions", transition_matrix.cache_info)
+register_cache("chord_analysis", analyze_chord.cache_info)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,105 +99,351 @@ app.add_middleware(
 )
 
 
-@app.post("/analyze")
-def get_all_substitutions(request: ProgressionRequest):
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with track_token_usage() as usage:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if usage.calls:
+                response.headers["X-LLM-Tokens"] = (
+                    f"prompt={usage.prompt_tokens}, completion={usage.completion_tokens}"
+                )
+            return response
+        finally:
+            route = request.scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            model = getattr(request.state, "model", "")
+            observe_request(
+                endpoint=endpoint,
+                method=request.method,
+                model=model,
+                status=status,
+                duration=time.perf_counter() - start,
+            )
+            if usage.calls:
+                observe_request_tokens(
+                    endpoint, model, usage.prompt_tokens, usage.completion_tokens
+                )
+
+
+@app.exception_handler(LLMOverloadedError)
+async def reject_overloaded_llm(_: Request, exc: LLMOverloadedError):
+    # Refus rapide : le client sait quand réessayer au lieu d'attendre un timeout
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(TokenBudgetExceededError)
+async def reject_oversized_progression(_: Request, exc: TokenBudgetExceededError):
+    # Refusée avant l'appel au LLM : la progression dépasse le budget de tokens
+    return JSONResponse(status_code=413, content={"error": str(exc)})
+
+
+@app.exception_handler(InvalidProgressionError)
+async def reject_invalid_progression(_: Request, exc: InvalidProgressionError):
+    # Accords inanalysables détectés avant l'appel au LLM : index et suggestions
+    return JSONResponse(
+        status_code=422,
+        content={"error": str(exc), "invalid_chords": exc.errors},
+    )
+
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def run_analysis(
+    request: ProgressionRequest,
+    http_request: Request,
+    run_pipeline: Callable[[List[ChordItem], Dict[str, Any]], Dict[str, Any]],
+):
+    """Corps de `POST /analyze`, la partie théorique étant exécutée par `run_pipeline`."""
     progression_data: List[ChordItem] = request.chords_data
     model: str = request.model
+    http_request.state.model = model
     if not progression_data:
         return {"error": "Progression cannot be empty"}
 
-    progression = [f"{item.root}{item.quality}" for item in progression_data]
+    ensure_valid_progression(progression_data)
+    record_progression_length(len(progression_data))
+    progression = get_progression(progression_data)
     try:
-        # 1. Analyse IA et scan des segments harmoniques
-        global_analysis, harmonic_segments, quality_analysis = get_analysis_data(progression, model)
+        # 1. Analyse IA : tonalité globale et segments harmoniques
+        with track_stage("llm_analysis"):
+            analysis_result = detect_with_fallback(progression, model)
+
+        # 2. Analyse théorique complète (qualités, emprunts, substitutions...), dans un
+        # processus séparé pour les longues progressions. Le résultat est déjà au format
+        # JSON : il est sérialisé tel quel par orjson, sans la copie de `jsonable_encoder`
+        result = run_pipeline(progression_data, analysis_result)
+        if wants_compact(http_request.headers.get("accept")):
+            return ORJSONResponse(
+                encode_compact(result), media_type=COMPACT_MEDIA_TYPE, headers=VARY_ACCEPT
+            )
+        return ORJSONResponse(result, headers=VARY_ACCEPT)
+    except Exception as e:
+        raise e
+
+
+@app.post("/analyze")
+def get_all_substitutions(request: ProgressionRequest, http_request: Request):
+    return run_analysis(request, http_request, pipeline_pool.run)
+
 
-        # 2. Ajout des propriétés originales aux résultats d'analyse
-        fill_interface_data(quality_analysis, progression_data)
+@app.post("/validate")
+def validate_chords(request: ValidationRequest):
+    """
+    Vérifie localement chaque accord (sans appel au LLM) : erreurs bloquantes et
+    avertissements par index, avec des suggestions. Assez rapide pour chaque frappe.
+    """
+    report = validate_progression(request.chords_data)
+    return {"valid": not report["errors"], **report}
 
-        # 3. Calcul des accords empruntés pour les accords non diatoniques
-        borrowed_chords = get_borrowed_chords(quality_analysis)
 
-        global_tonic = global_analysis["tonic"]
-        detected_tonic_index: int = get_note_index(global_tonic)
+@app.get("/analyze")
+def get_cacheable_analysis(
+    p: str,
+    model: ModelName,
+    http_request: Request,
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Variante cacheable de `POST /analyze` : la progression est passée sous sa forme
+    canonique compacte (`p=Dm7_G7_Cmaj7`, voir `progression_encoding`), les accords étant
+    identifiés par leur position. L'ETag (faible) ne dépend que de la progression, du modèle et
+    de la version de l'analyse : un `If-None-Match` correspondant reçoit un 304 sans
+    appel au LLM, ce qui permet à nginx ou à un CDN d'absorber les requêtes répétées.
+    """
+    http_request.state.model = model
+    try:
+        progression_data = decode_progression(p)
+    except ValueError as e:
+        return {"error": str(e)}
 
-        degrees_to_borrow: List[Dict[str, Any] | None] = get_substitution_info(quality_analysis)
+    canonical = encode_progression(progression_data)
+    compact = wants_compact(http_request.headers.get("accept"))
+    media_type = COMPACT_MEDIA_TYPE if compact else "application/json"
+    etag = get_analysis_etag(canonical, model, COMPACT_FORMAT if compact else "")
+    max_age = os.getenv("ANALYZE_CACHE_MAX_AGE", "3600")
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}", **VARY_ACCEPT}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
-        substitutions: Dict[str, Dict[str, Any]] = {}
-        for mode_name, (_, _, interval) in MAJOR_MODES_DATA.items():
-            relative_tonic_index = (detected_tonic_index + interval + 12) % 12
-            new_progression = get_substitutions(
-                progression, relative_tonic_index, degrees_to_borrow
+    content = analysis_responses.get(etag)
+    if content is None:
+        ensure_valid_progression(progression_data)
+        record_progression_length(len(progression_data))
+        with track_stage("llm_analysis"):
+            analysis_result = detect_with_fallback(get_progression(progression_data), model)
+        result = pipeline_pool.run(progression_data, analysis_result)
+        full_content = ORJSONResponse(result).body
+        compact_content = ORJSONResponse(encode_compact(result)).body
+        content = compact_content if compact else full_content
+        if is_local_analysis(analysis_result):
+            # Repli local (Gemini indisponible) : ni ETag ni cache, la prochaine requête
+            # retentera une vraie analyse
+            return Response(
+                content=content,
+                media_type=media_type,
+                headers={"Cache-Control": "no-store", **VARY_ACCEPT},
             )
-            for index, item in enumerate(new_progression):
-                chord_data = progression_data[index]
-                item["inversion"] = chord_data.inversion
-                item["duration"] = chord_data.duration
-            substitutions[mode_name] = {
-                "borrowed_scale": f"{get_note_from_index(relative_tonic_index)} Major",
-                "substitution": new_progression,
-            }
-
-        # Harmonize all existing modes
-        harmonized_chords: Dict[str, List[QualityAnalysisItem]] = {}
-        for target_mode_name in MODES_DATA.keys():
-            new_progression_items = []
-
-            # 1. SUBSTITUTION SEGMENT PAR SEGMENT
-            for segment in harmonic_segments:
-                segment_start = segment["start_index"]
-                segment_end = segment["end_index"]
-
-                segment_tonic_index = get_note_index(segment["tonic"])
-                segment_progression = progression[segment_start : segment_end + 1]
-                segment_sub_info = degrees_to_borrow[segment_start : segment_end + 1]
-
-                substituted_segment = get_substitutions(
-                    segment_progression, segment_tonic_index, segment_sub_info, target_mode_name
-                )
-                new_progression_items.extend(substituted_segment)
+        # Les deux formats sont mis en cache : la même analyse LLM sert l'autre format
+        analysis_responses.put(get_analysis_etag(canonical, model), full_content)
+        analysis_responses.put(get_analysis_etag(canonical, model, COMPACT_FORMAT), compact_content)
+    return Response(content=content, media_type=media_type, headers=headers)
 
-            # 2. ANALYSE DE LA NOUVELLE PROGRESSION
-            final_analyzed_chords = []
-            for i, item in enumerate(new_progression_items):
-                current_segment = next(
-                    s for s in harmonic_segments if s["start_index"] <= i <= s["end_index"]
-                )
-                context_tonic_index = get_note_index(current_segment["tonic"])
 
-                analyzed_chord = analyze_chord_in_context(
-                    item["chord"], context_tonic_index, target_mode_name
-                )
-                final_analyzed_chords.append(analyzed_chord)
+@app.post("/reharmonize")
+def get_reharmonizations(request: ReharmonizationRequest):
+    """
+    Propose des réharmonisations complètes de la progression (substitutions tritoniques,
+    V7/x, emprunts modaux, ii–V), classées par conduite des voix et tension.
+    """
+    progression_data: List[ChordItem] = request.chords_data
+    if not progression_data:
+        return {"error": "Progression cannot be empty"}
 
-            harmonized_chords[target_mode_name] = final_analyzed_chords
+    record_progression_length(len(progression_data))
+    try:
+        return reharmonize(
+            get_progression(progression_data),
+            [item.duration for item in progression_data],
+            request.tonic,
+            request.mode,
+            beam_width=request.beam_width,
+            top_k=request.top_k,
+            time_budget_ms=request.time_budget_ms,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
 
-        # Get all secondary dominants for all major modes
-        secondary_dominants: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
-        for mode_name, substitutions_data in substitutions.items():
-            secondary_dominants[mode_name] = []
-            for item in substitutions_data["substitution"]:
-                secondary_dominant, analysis = get_secondary_dominant_for_target(
-                    item["chord"], global_tonic, mode_name
-                )
-                secondary_dominants[mode_name].append((secondary_dominant, item["chord"], analysis))
-
-        tritone_substitutions: List[List[Any]] = []
-        for chord in progression:
-            substitute, analysis = get_tritone_substitute(chord)
-            tritone_substitutions.append([chord, substitute, analysis])
-
-        return {
-            "tonic": global_tonic,
-            "explanations": global_analysis["explanation"],
-            "quality_analysis": quality_analysis,
-            "borrowed_chords": borrowed_chords,
-            "major_modes_substitutions": substitutions,
-            "harmonized_chords": harmonized_chords,
-            "secondary_dominants": secondary_dominants,
-            "tritone_substitutions": tritone_substitutions,
-        }
-    except Exception as e:
-        raise e
+
+@app.post("/voice-leading")
+def get_voice_leading(request: VoiceLeadingRequest):
+    """
+    Choisit l'inversion et les notes de chaque accord pour minimiser le mouvement des
+    voix sur toute la progression. Les accords dont les notes sont déjà fixées
+    (`notes`) sont conservés tels quels et servent de points d'ancrage.
+    """
+    progression_data: List[ChordItem] = request.chords_data
+    if not progression_data:
+        return {"error": "Progression cannot be empty"}
+
+    result = optimize_voicings(
+        [(item.root, item.quality) for item in progression_data],
+        [item.notes for item in progression_data],
+    )
+    chords_data = []
+    for item, voicing in zip(progression_data, result["voicings"]):
+        chord = item.model_dump()
+        if not item.notes and voicing["notes"] is not None:
+            chord.update(voicing)
+        chords_data.append(chord)
+    return {"total_cost": result["total_cost"], "chords_data": chords_data}
+
+
+@app.get("/chords/index")
+def get_chord_index():
+    """
+    Index inverse ensemble de notes -> noms d'accords, construit à partir du registre
+    des qualités du backend, pour la détection d'accords côté client (entrée MIDI).
+    """
+    return get_chord_index_blob()
+
+
+@app.get("/chords/identify")
+def get_chord_from_notes(notes: str, bass: str | None = None):
+    """Identifie un accord à partir de ses notes (`notes=C,E,G`), la basse étant facultative."""
+    try:
+        pitch_classes = [get_note_index(note) for note in notes.split(",") if note.strip()]
+        bass_index = get_note_index(bass) if bass else None
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"chords": identify_chord(pitch_classes, bass_index)}
+
+
+@app.get("/presets")
+def get_presets():
+    """Catalogue des progressions prédéfinies (accords relatifs à la tonique)."""
+    return get_catalog()
+
+
+@app.get("/presets/{preset_id}/{key}")
+def get_preset_analysis(preset_id: str, key: str):
+    """
+    Réponse `/analyze` complète d'un préréglage dans la tonalité `key`, calculée sans
+    appel au LLM à sa première demande puis gardée en mémoire.
+    """
+    try:
+        content = preset_store.get(preset_id, key)
+    except ValueError as e:
+        return {"error": str(e)}
+    return Response(content=content, media_type="application/json")
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Réserve un endpoint aux requêtes portant le jeton `ADMIN_TOKEN`."""
+    expected_token = os.getenv("ADMIN_TOKEN")
+    if not expected_token or not x_admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if not secrets.compare_digest(x_admin_token, expected_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/library/progressions", dependencies=[Depends(require_admin)])
+def add_library_progression(request: LibraryProgressionRequest):
+    """
+    Ajoute une progression à la bibliothèque, indexée par ses chiffrages romains.
+    Réservé à l'administration : la bibliothèque est persistée sur disque.
+    """
+    progression_data: List[ChordItem] = request.chords_data
+    if not progression_data:
+        return {"error": "Progression cannot be empty"}
+
+    progression = get_progression(progression_data)
+    try:
+        numerals = get_numerals(progression, request.tonic, request.mode)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    progression_id = uuid.uuid4().hex
+    try:
+        progression_library.add(
+            progression_id,
+            numerals,
+            title=request.title,
+            chords=progression,
+            tonic=request.tonic,
+            mode=request.mode,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    except LibraryFullError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+    return {"id": progression_id, "numerals": numerals}
+
+
+@app.post("/library/similar")
+def get_similar_progressions(request: SimilarityRequest):
+    """
+    Recherche dans la bibliothèque les progressions les plus proches (n-grammes de
+    chiffrages romains, indépendants de la tonalité), via l'index MinHash/LSH.
+    """
+    progression_data: List[ChordItem] = request.chords_data
+    if not progression_data:
+        return {"error": "Progression cannot be empty"}
+
+    try:
+        numerals = get_numerals(get_progression(progression_data), request.tonic, request.mode)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    results = progression_library.query(numerals, request.top_k, request.min_similarity)
+    return {"numerals": numerals, "results": results}
+
+
+@app.post("/admin/profile/analyze", dependencies=[Depends(require_admin)])
+def profile_analysis(request: ProgressionRequest, http_request: Request, interval_ms: float = 1.0):
+    """
+    Exécute `/analyze` sous un profileur par échantillonnage et renvoie les piles
+    au format collapsed (flamegraph). Si `PROFILE_DIR` est défini, le profil y est
+    aussi enregistré et son chemin est renvoyé dans l'en-tête `X-Profile-Path`.
+    """
+    with SamplingProfiler(interval=interval_ms / 1000) as profiler:
+        # Pipeline exécuté dans ce thread, même pour les longues progressions : dans un
+        # worker du pool, le profileur n'échantillonnerait que l'attente du résultat
+        run_analysis(request, http_request, run_analysis_pipeline)
+
+    collapsed = profiler.collapsed()
+    headers = {}
+    profile_dir = os.getenv("PROFILE_DIR")
+    if profile_dir:
+        headers["X-Profile-Path"] = save_profile(collapsed, profile_dir)
+    return PlainTextResponse(collapsed, headers=headers)
+
+
+@app.post("/admin/allocations/analyze", dependencies=[Depends(require_admin)])
+def trace_analysis_allocations(request: ProgressionRequest):
+    """
+    Exécute `/analyze` avec tracemalloc et renvoie, pour chaque étape du pipeline,
+    les octets et blocs retenus en fin d'étape ainsi que le pic mémoire (totaux et par accord).
+    """
+    progression_data: List[ChordItem] = request.chords_data
+    if not progression_data:
+        return {"error": "Progression cannot be empty"}
+
+    ensure_valid_progression(progression_data)
+    analysis_result = detect_with_fallback(get_progression(progression_data), request.model)
+    with AllocationTracker() as tracker:
+        run_analysis_pipeline(progression_data, analysis_result, stage=tracker.stage)
+    return tracker.report(chords_count=len(progression_data))
 
 
 if __name__ == "__main__":
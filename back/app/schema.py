@@ -1,6 +1,21 @@
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, Field
+
+from app.services.gemini_clients import get_allowed_models
+
+
+def check_model(model: str) -> str:
+    """Refuse (422) les modèles qui ne sont pas dans `get_allowed_models`."""
+    allowed_models = get_allowed_models()
+    if model not in allowed_models:
+        raise ValueError(f"Modèle inconnu : '{model}' (acceptés : {', '.join(allowed_models)})")
+    return model
+
+
+ModelName = Annotated[str, AfterValidator(check_model)]
+
+MAX_LIBRARY_TITLE_LENGTH = 200
 
 
 class ChordItem(BaseModel):
@@ -14,4 +29,36 @@ class ChordItem(BaseModel):
 
 class ProgressionRequest(BaseModel):
     chords_data: List[ChordItem]
-    model: str
+    model: ModelName
+
+
+class ValidationRequest(BaseModel):
+    chords_data: List[ChordItem]
+
+
+class ReharmonizationRequest(BaseModel):
+    chords_data: List[ChordItem]
+    tonic: str
+    mode: str = "Ionian"
+    beam_width: int = Field(default=8, ge=1, le=64)
+    top_k: int = Field(default=5, ge=1, le=64)
+    time_budget_ms: float = Field(default=50.0, gt=0, le=5000)
+
+
+class VoiceLeadingRequest(BaseModel):
+    chords_data: List[ChordItem]
+
+
+class LibraryProgressionRequest(BaseModel):
+    chords_data: List[ChordItem]
+    tonic: str
+    mode: str = "Ionian"
+    title: Optional[str] = Field(default=None, max_length=MAX_LIBRARY_TITLE_LENGTH)
+
+
+class SimilarityRequest(BaseModel):
+    chords_data: List[ChordItem]
+    tonic: str
+    mode: str = "Ionian"
+    top_k: int = Field(default=10, ge=1, le=100)
+    min_similarity: float = Field(default=0.0, ge=0, le=1)
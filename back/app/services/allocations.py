@@ -0,0 +1,77 @@
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# On exclut les allocations de tracemalloc lui-même des rapports
+_TRACEMALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+class AllocationTracker:
+    """
+    Mesure, via tracemalloc, la mémoire retenue par chaque étape du pipeline.
+    `stage` est compatible avec le paramètre `stage` de `run_analysis_pipeline`.
+
+    Pour chaque étape on relève :
+      - retained_bytes / retained_blocks : mémoire (et nombre de blocs, ~objets)
+        encore allouée en fin d'étape, par rapport au début de l'étape (bilan net :
+        les allocations libérées avant la fin de l'étape n'y figurent pas) ;
+      - peak_bytes : pic de mémoire atteint pendant l'étape (allocations temporaires comprises).
+
+    Usage :
+        with AllocationTracker() as tracker:
+            run_analysis_pipeline(progression_data, analysis_result, stage=tracker.stage)
+        tracker.report()
+    """
+
+    def __init__(self) -> None:
+        self.stages: List[Dict[str, Any]] = []
+        self._started_tracing = False
+
+    def __enter__(self) -> "AllocationTracker":
+        """Démarre tracemalloc s'il n'est pas déjà actif."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Arrête tracemalloc s'il a été démarré par ce tracker."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mesure les allocations du bloc englobé sous le nom `name`."""
+        before = tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+            differences = after.compare_to(before, "filename")
+            self.stages.append(
+                {
+                    "stage": name,
+                    "retained_bytes": sum(diff.size_diff for diff in differences),
+                    "retained_blocks": sum(diff.count_diff for diff in differences),
+                    "peak_bytes": max(peak - baseline, 0),
+                }
+            )
+
+    def report(self, chords_count: int = 0) -> Dict[str, Any]:
+        """
+        Retourne le détail par étape et les totaux. Si `chords_count` est fourni,
+        ajoute les valeurs ramenées à un accord.
+        """
+        totals = {
+            "retained_bytes": sum(stage["retained_bytes"] for stage in self.stages),
+            "retained_blocks": sum(stage["retained_blocks"] for stage in self.stages),
+            "peak_bytes": max((stage["peak_bytes"] for stage in self.stages), default=0),
+        }
+        report: Dict[str, Any] = {"stages": self.stages, "totals": totals}
+        if chords_count:
+            report["per_chord"] = {key: value / chords_count for key, value in totals.items()}
+        return report
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+from app.services.metrics import record_circuit_state
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur est ouvert : l'appel n'est pas tenté."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur autour d'un service externe (ici Gemini).
+
+    - fermé : les appels passent ; `failure_threshold` échecs consécutifs (erreur ou
+      appel plus long que `slow_call_threshold` secondes) l'ouvrent ;
+    - ouvert : les appels échouent immédiatement (`CircuitOpenError`) pendant
+      `reset_timeout` secondes ;
+    - semi-ouvert : un seul appel d'essai passe ; son succès referme le disjoncteur,
+      son échec le rouvre pour un nouveau `reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        slow_call_threshold: float = 30.0,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """État courant, l'ouverture expirée étant vue comme semi-ouverte."""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        # Appelé avec self._lock acquis
+        self._state = state
+        record_circuit_state(self.name, state)
+
+    def allow_request(self) -> bool:
+        """Indique si un appel peut être tenté (et réserve l'appel d'essai en semi-ouvert)."""
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+                self._probing = False
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self, duration: float = 0.0) -> None:
+        """Enregistre un appel réussi ; trop lent, il compte comme un échec."""
+        if duration > self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """Enregistre un échec ; ouvre le disjoncteur au seuil ou si l'essai échoue."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def release_probe(self) -> None:
+        """Libère l'appel autorisé sans résultat (ex: refusé par le limiteur)."""
+        with self._lock:
+            self._probing = False
+
+
+class CircuitBreakerRegistry:
+    """
+    Un disjoncteur par modèle. Seuils configurables via `LLM_BREAKER_FAILURES`,
+    `LLM_BREAKER_SLOW_CALL` et `LLM_BREAKER_RESET_TIMEOUT` (secondes). Les modèles des
+    requêtes sont validés en amont (`schema.ModelName`) : le registre reste borné.
+    """
+
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Retourne le disjoncteur associé à `name`."""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name,
+                    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", 3)),
+                    slow_call_threshold=float(os.getenv("LLM_BREAKER_SLOW_CALL", 30.0)),
+                    reset_timeout=float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", 30.0)),
+                )
+                self._breakers[name] = breaker
+            return breaker
+
+    def clear(self) -> None:
+        """Oublie tous les disjoncteurs (tests)."""
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
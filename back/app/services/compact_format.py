@@ -0,0 +1,165 @@
+"""
+Format compact (dictionnaire + index) de la réponse de `/analyze`, choisi par négociation
+de contenu (`Accept: application/vnd.chords.compact+json`).
+
+Les sections redondantes de la réponse sont remplacées par des index vers des tables
+de lignes dédupliquées :
+- `quality_analysis` : colonnes (`chord`, `segment`, `id`, `inversion`, `duration`, `notes`),
+  `chord` indexant `tables.chords` et `segment` les contextes de `tables.segments` ;
+- `harmonized_chords` : `{mode: [index dans tables.chords]}` ;
+- `major_modes_substitutions` : `{mode: {"borrowed_scale", "substitution": [index]}}`,
+  vers `tables.substitutions` ;
+- `secondary_dominants` : `{mode: [index dans tables.secondary_dominants]}`.
+Les autres clés sont transmises telles quelles. `decode_compact` restitue la réponse
+complète.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.chords_analyzer import ChordAnalysis
+
+COMPACT_MEDIA_TYPE = "application/vnd.chords.compact+json"
+COMPACT_FORMAT = "compact/1"
+
+CHORD_FIELDS: Tuple[str, ...] = ChordAnalysis.FIELDS
+SUBSTITUTION_FIELDS = ("chord", "roman", "quality", "inversion", "duration")
+# Propriétés de l'éditeur ajoutées à chaque accord de `quality_analysis`
+ITEM_FIELDS = ("id", "inversion", "duration", "notes")
+
+
+class _Table:
+    """Lignes dédupliquées : chaque ligne distincte reçoit un index, dans l'ordre d'arrivée."""
+
+    def __init__(self) -> None:
+        self.rows: List[List[Any]] = []
+        self._indexes: Dict[Tuple[Any, ...], int] = {}
+
+    def add(self, row: Sequence[Any]) -> int:
+        """Index de la ligne, ajoutée à la table si elle est nouvelle."""
+        key = tuple(row)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.rows)
+            self.rows.append(list(row))
+        return index
+
+
+def wants_compact(accept: Optional[str]) -> bool:
+    """Indique si l'en-tête `Accept` demande le format compact (avec q > 0)."""
+    for media_range in (accept or "").split(","):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() != COMPACT_MEDIA_TYPE:
+            continue
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def encode_compact(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertit une réponse de `run_analysis_pipeline` au format compact."""
+    chords, substitutions, dominants = _Table(), _Table(), _Table()
+    segments = _Table()
+    segment_contexts: List[Dict[str, Any]] = []
+
+    def chord_index(item: Dict[str, Any]) -> int:
+        return chords.add([item[field] for field in CHORD_FIELDS])
+
+    def segment_index(context: Optional[Dict[str, Any]]) -> Optional[int]:
+        if context is None:
+            return None
+        index = segments.add(list(context.items()))
+        if index == len(segment_contexts):
+            segment_contexts.append(context)
+        return index
+
+    encoded: Dict[str, Any] = {"format": COMPACT_FORMAT}
+    for key, value in response.items():
+        if key == "quality_analysis":
+            encoded[key] = {
+                "chord": [chord_index(item) for item in value],
+                "segment": [segment_index(item.get("segment_context")) for item in value],
+                **{field: [item.get(field) for item in value] for field in ITEM_FIELDS},
+            }
+        elif key == "harmonized_chords":
+            encoded[key] = {
+                mode_name: [chord_index(item) for item in items]
+                for mode_name, items in value.items()
+            }
+        elif key == "major_modes_substitutions":
+            encoded[key] = {
+                mode_name: {
+                    **data,
+                    "substitution": [
+                        substitutions.add([item[field] for field in SUBSTITUTION_FIELDS])
+                        for item in data["substitution"]
+                    ],
+                }
+                for mode_name, data in value.items()
+            }
+        elif key == "secondary_dominants":
+            encoded[key] = {
+                mode_name: [dominants.add(row) for row in rows] for mode_name, rows in value.items()
+            }
+        else:
+            encoded[key] = value
+
+    encoded["tables"] = {
+        "chords": {"fields": list(CHORD_FIELDS), "rows": chords.rows},
+        "segments": segment_contexts,
+        "substitutions": {"fields": list(SUBSTITUTION_FIELDS), "rows": substitutions.rows},
+        "secondary_dominants": dominants.rows,
+    }
+    return encoded
+
+
+def decode_compact(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Restitue la réponse complète à partir du format compact (`encode_compact`)."""
+    tables = payload["tables"]
+    chord_rows = [dict(zip(tables["chords"]["fields"], row)) for row in tables["chords"]["rows"]]
+    substitution_rows = [
+        dict(zip(tables["substitutions"]["fields"], row)) for row in tables["substitutions"]["rows"]
+    ]
+
+    response: Dict[str, Any] = {}
+    for key, value in payload.items():
+        if key in ("format", "tables"):
+            continue
+        if key == "quality_analysis":
+            items = []
+            for position, index in enumerate(value["chord"]):
+                item = dict(chord_rows[index])
+                segment = value["segment"][position]
+                if segment is not None:
+                    item["segment_context"] = tables["segments"][segment]
+                for field in ITEM_FIELDS:
+                    if value[field][position] is not None:
+                        item[field] = value[field][position]
+                items.append(item)
+            response[key] = items
+        elif key == "harmonized_chords":
+            response[key] = {
+                mode_name: [dict(chord_rows[index]) for index in indexes]
+                for mode_name, indexes in value.items()
+            }
+        elif key == "major_modes_substitutions":
+            response[key] = {
+                mode_name: {
+                    **data,
+                    "substitution": [dict(substitution_rows[i]) for i in data["substitution"]],
+                }
+                for mode_name, data in value.items()
+            }
+        elif key == "secondary_dominants":
+            response[key] = {
+                mode_name: [list(tables["secondary_dominants"][index]) for index in indexes]
+                for mode_name, indexes in value.items()
+            }
+        else:
+            response[key] = value
+    return response
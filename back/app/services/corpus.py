@@ -0,0 +1,191 @@
+"""
+Analyse hors ligne d'un recueil de progressions.
+
+Usage :
+    python -m app.services.corpus songs.jsonl results.jsonl --workers 4 --model gemini-3-flash-preview
+
+Entrée : un fichier JSON Lines (`{"id": ..., "chords": ["Dm7", "G7", ...]}` ou
+`{"id": ..., "chords_data": [...]}`, `model` facultatif) ou un fichier texte d'une
+progression par ligne (accords séparés par des espaces, virgules, points-virgules ou
+" - "), l'identifiant étant le numéro de ligne.
+
+Sortie : une ligne JSON par progression (`{"id", "result"}` ou `{"id", "error"}`), écrite
+dès que l'analyse est terminée. Une ligne JSON illisible est écrite en erreur (identifiant :
+numéro de ligne) sans interrompre le traitement. Les identifiants terminés sont ajoutés au fichier de
+reprise : relancer la même commande après une interruption ne refait que le reste.
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+from app.schema import ChordItem
+from app.services.pipeline import get_progression, run_analysis_pipeline
+from app.services.windowed_analysis import detect_by_windows
+from app.utils.common import parse_chord
+from app.utils.mode_detection_gemini import detect_tonic_and_mode
+
+DEFAULT_MODEL = "gemini-3-flash-preview"
+# Espaces, virgules, points-virgules ou tirets isolés (" - ") : "C-7" reste un accord
+_CHORD_SEPARATORS = re.compile(r"\s*[;,]\s*|\s+-\s+|\s+")
+
+
+def read_records(input_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lit les progressions une à une, sans charger le fichier en mémoire. Une ligne JSON
+    illisible donne un enregistrement `{"id", "error"}` au lieu d'interrompre la lecture.
+    """
+    is_jsonl = input_path.endswith((".jsonl", ".ndjson"))
+    with open(input_path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if is_jsonl:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"id": line_number, "error": f"JSON invalide : {e}"}
+                    continue
+                if not isinstance(record, dict):
+                    yield {"id": line_number, "error": "JSON invalide : objet attendu"}
+                    continue
+                record.setdefault("id", line_number)
+            else:
+                record = {"id": line_number, "chords": _CHORD_SEPARATORS.split(line)}
+            yield record
+
+
+def to_chord_items(record: Dict[str, Any]) -> list[ChordItem]:
+    """Convertit une progression en `ChordItem`, comme les envoie le frontend."""
+    if "chords_data" in record:
+        return [ChordItem(**item) for item in record["chords_data"]]
+
+    chord_items = []
+    for index, chord in enumerate(record.get("chords", [])):
+        if not chord:
+            continue
+        parsed_chord = parse_chord(chord)
+        if parsed_chord is None:
+            raise ValueError(f"Accord non reconnu : '{chord}'")
+        _, quality, root = parsed_chord
+        chord_items.append(ChordItem(id=index, root=root, quality=quality))
+    return chord_items
+
+
+def analyze_record(record: Dict[str, Any], model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+    """
+    Analyse une progression comme `/analyze` (appel au LLM puis pipeline théorique).
+    Exécutée dans un processus du pool : les erreurs sont retournées, pas levées.
+    """
+    try:
+        progression_data = to_chord_items(record)
+        if not progression_data:
+            raise ValueError("Progression cannot be empty")
+        analysis_result = detect_by_windows(
+            get_progression(progression_data), record.get("model", model), detect_tonic_and_mode
+        )
+        result = run_analysis_pipeline(progression_data, analysis_result)
+        return {"id": record["id"], "result": result}
+    except Exception as e:
+        return {"id": record["id"], "error": str(e)}
+
+
+def load_checkpoint(checkpoint_path: str) -> Set[str]:
+    """Identifiants des progressions déjà analysées."""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, encoding="utf-8") as checkpoint_file:
+        return {line.strip() for line in checkpoint_file if line.strip()}
+
+
+def run_corpus(
+    input_path: str,
+    output_path: str,
+    checkpoint_path: Optional[str] = None,
+    workers: int = 4,
+    model: str = DEFAULT_MODEL,
+    max_pending: Optional[int] = None,
+    analyze: Callable[[Dict[str, Any], str], Dict[str, Any]] = analyze_record,
+) -> Dict[str, int]:
+    """
+    Analyse toutes les progressions de `input_path` dans un pool de `workers` processus.
+
+    Au plus `max_pending` progressions (2 par processus par défaut) sont en cours à la
+    fois : la lecture de l'entrée avance au rythme des analyses et la mémoire reste
+    bornée quelle que soit la taille du recueil. Chaque résultat est écrit dès sa fin,
+    dans l'ordre d'achèvement. Seules les analyses réussies sont inscrites au fichier
+    de reprise : les progressions en erreur sont retentées à la relance.
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    max_pending = max_pending or 2 * workers
+    done = load_checkpoint(checkpoint_path)
+    stats = {"analyzed": 0, "failed": 0, "skipped": 0}
+
+    with (
+        ProcessPoolExecutor(max_workers=workers) as executor,
+        open(output_path, "a", encoding="utf-8") as output_file,
+        open(checkpoint_path, "a", encoding="utf-8") as checkpoint_file,
+    ):
+        pending: Set[Future] = set()
+
+        def write_output(output: Dict[str, Any]) -> None:
+            output_file.write(json.dumps(output, ensure_ascii=False) + "\n")
+            output_file.flush()
+            if "error" in output:
+                stats["failed"] += 1
+                return
+            # Le résultat est écrit avant d'être marqué comme terminé : une
+            # interruption entre les deux ne peut que le dupliquer, pas le perdre
+            checkpoint_file.write(f"{output['id']}\n")
+            checkpoint_file.flush()
+            stats["analyzed"] += 1
+
+        def write_completed(futures: Set[Future]) -> None:
+            for future in futures:
+                write_output(future.result())
+
+        for record in read_records(input_path):
+            if str(record["id"]) in done:
+                stats["skipped"] += 1
+                continue
+            if "error" in record:
+                # Ligne illisible : en erreur, donc retentée à la relance
+                write_output(record)
+                continue
+            if len(pending) >= max_pending:
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_completed(completed)
+            pending.add(executor.submit(analyze, record, model))
+
+        write_completed(wait(pending).done)
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyse un recueil de progressions (JSONL).")
+    parser.add_argument("input", help="Fichier .jsonl ou texte (une progression par ligne)")
+    parser.add_argument("output", help="Fichier JSON Lines des résultats (complété, jamais écrasé)")
+    parser.add_argument("--checkpoint", help="Fichier de reprise (défaut : <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args(argv)
+
+    stats = run_corpus(
+        args.input,
+        args.output,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        model=args.model,
+    )
+    print(
+        f"{stats['analyzed']} progressions analysées, {stats['failed']} en erreur, "
+        f"{stats['skipped']} déjà traitées."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+# Modèles proposés par le frontend, préchauffés au démarrage par défaut
+DEFAULT_WARMUP_MODELS = ("gemini-3-flash-preview", "gemini-3-pro-preview")
+
+
+def _import_genai() -> Any:
+    """
+    Importe le SDK Gemini à la première utilisation : il représente à lui seul plus
+    de la moitié du temps d'import de l'application (protobuf, gRPC, clients REST).
+    """
+    import google.generativeai as genai
+
+    return genai
+
+
+class GeminiClientRegistry:
+    """
+    Registre des modèles Gemini partagés par tous les threads du worker.
+
+    `genai.configure` modifie un état global du SDK : il n'est appelé qu'une seule fois,
+    sous verrou. Chaque nom de modèle est associé à une unique instance de
+    `GenerativeModel`, qui réutilise le client gRPC par défaut du SDK (une connexion
+    HTTP/2 persistante, multiplexée entre les requêtes concurrentes).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._configured = False
+        self._models: Dict[str, "genai.GenerativeModel"] = {}
+
+    def _configure(self) -> None:
+        # Appelé avec self._lock acquis
+        if self._configured:
+            return
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "Clé API Gemini non trouvée. Veuillez la définir dans vos variables d'environnement."
+            )
+        _import_genai().configure(api_key=api_key)
+        self._configured = True
+
+    def get(self, model_name: str) -> "genai.GenerativeModel":
+        """Retourne l'instance partagée du modèle, en la créant au premier appel."""
+        model_instance = self._models.get(model_name)
+        if model_instance is not None:
+            return model_instance
+
+        with self._lock:
+            model_instance = self._models.get(model_name)
+            if model_instance is None:
+                self._configure()
+                model_instance = _import_genai().GenerativeModel(model_name)
+                self._models[model_name] = model_instance
+            return model_instance
+
+    def warm_up(self, model_names: Iterable[str]) -> None:
+        """
+        Crée les instances des modèles et ouvre la connexion vers l'API (un appel
+        `get_model` léger par modèle). Les erreurs sont ignorées : le démarrage de
+        l'application ne doit pas dépendre de la disponibilité de Gemini.
+        """
+        for model_name in model_names:
+            try:
+                self.get(model_name)
+                _import_genai().get_model(f"models/{model_name}")
+            except Exception as e:
+                print(f"Préchauffage du modèle Gemini '{model_name}' impossible : {e}")
+
+    def clear(self) -> None:
+        """Oublie la configuration et les instances (ex: rotation de la clé API)."""
+        with self._lock:
+            self._models.clear()
+            self._configured = False
+
+
+gemini_clients = GeminiClientRegistry()
+
+
+def _split_models(models: str) -> list[str]:
+    return [model.strip() for model in models.split(",") if model.strip()]
+
+
+def get_warmup_models() -> list[str]:
+    """Modèles à préchauffer, configurables via `GEMINI_WARMUP_MODELS` (séparés par des virgules)."""
+    models = os.getenv("GEMINI_WARMUP_MODELS")
+    if models is None:
+        return list(DEFAULT_WARMUP_MODELS)
+    return _split_models(models)
+
+
+def get_allowed_models() -> list[str]:
+    """
+    Modèles acceptés dans les requêtes, configurables via `GEMINI_ALLOWED_MODELS` (séparés
+    par des virgules) ; par défaut ceux du frontend et les modèles préchauffés. Chaque nom
+    de modèle a son client, son limiteur, son disjoncteur et ses séries de métriques :
+    un nom libre ferait grandir ces registres sans limite.
+    """
+    models = os.getenv("GEMINI_ALLOWED_MODELS")
+    if models is None:
+        return list(dict.fromkeys([*DEFAULT_WARMUP_MODELS, *get_warmup_models()]))
+    return _split_models(models)
@@ -0,0 +1,123 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.services.metrics import record_hedge
+
+T = TypeVar("T")
+
+# Threads dédiés aux appels couverts (requête principale + doublon)
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    Couverture des appels au LLM : si l'appel n'a pas répondu après le `percentile`
+    des latences récentes du modèle pour cette étape, un doublon est envoyé (au
+    `fallback_model` s'il est défini) et la première réponse valide est retenue.
+    """
+
+    percentile: float = 95.0
+    fallback_model: Optional[str] = None
+    # Délai utilisé tant qu'il n'y a pas assez de latences observées
+    default_delay: float = 10.0
+    min_delay: float = 0.5
+    min_samples: int = 20
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """
+    Politique de couverture depuis l'environnement : désactivée sauf si
+    `LLM_HEDGE_PERCENTILE` est défini (`LLM_HEDGE_MODEL` pour le modèle de secours).
+    """
+    percentile = os.getenv("LLM_HEDGE_PERCENTILE")
+    if not percentile:
+        return None
+    return HedgePolicy(
+        percentile=float(percentile),
+        fallback_model=os.getenv("LLM_HEDGE_MODEL") or None,
+        default_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", HedgePolicy.default_delay)),
+    )
+
+
+class LatencyTracker:
+    """Fenêtre glissante des latences des appels réussis, par modèle et par étape."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._window = window
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, step: str, duration: float) -> None:
+        """Ajoute la latence d'un appel réussi."""
+        with self._lock:
+            latencies = self._latencies.get((model, step))
+            if latencies is None:
+                latencies = self._latencies[(model, step)] = deque(maxlen=self._window)
+            latencies.append(duration)
+
+    def percentile(self, model: str, step: str, percentile: float) -> Optional[Tuple[float, int]]:
+        """Percentile des latences récentes et nombre d'échantillons, None sans données."""
+        with self._lock:
+            latencies = sorted(self._latencies.get((model, step), ()))
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index], len(latencies)
+
+    def clear(self) -> None:
+        """Oublie toutes les latences observées."""
+        with self._lock:
+            self._latencies.clear()
+
+
+llm_latencies = LatencyTracker()
+
+
+def get_hedge_delay(policy: HedgePolicy, model: str, step: str) -> float:
+    observed = llm_latencies.percentile(model, step, policy.percentile)
+    if observed is None or observed[1] < policy.min_samples:
+        return policy.default_delay
+    return max(policy.min_delay, observed[0])
+
+
+def hedged_call(
+    primary: Callable[[], T],
+    hedge: Callable[[], T],
+    delay: float,
+    is_valid: Callable[[T], bool] = lambda _: True,
+    labels: Tuple[str, str] = ("", ""),
+) -> T:
+    """
+    Lance `primary` ; s'il n'a pas répondu au bout de `delay` secondes, lance `hedge`
+    en parallèle et retourne la première réponse valide. Le perdant est annulé s'il
+    n'a pas démarré, sinon sa réponse est ignorée (un appel HTTP en cours ne peut pas
+    être interrompu depuis un autre thread).
+
+    Si aucune réponse n'est valide, le résultat (ou l'erreur) de `primary` est renvoyé,
+    comme sans couverture. `labels` (modèle, étape) étiquette les métriques.
+    """
+    # Le contexte est propagé (tokens comptés dans la requête en cours)
+    primary_future = _executor.submit(copy_context().run, primary)
+    done, _ = wait([primary_future], timeout=delay)
+    if done:
+        return primary_future.result()
+
+    hedge_future = _executor.submit(copy_context().run, hedge)
+    pending: set[Future] = {primary_future, hedge_future}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None and is_valid(future.result()):
+                for other in pending:
+                    other.cancel()
+                record_hedge(*labels, "hedge" if future is hedge_future else "primary")
+                return future.result()
+
+    record_hedge(*labels, "none")
+    return primary_future.result()
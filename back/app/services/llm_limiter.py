@@ -0,0 +1,229 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.services.metrics import observe_llm_queue_wait, record_llm_rejection
+
+DEFAULT_LIMITS: Dict[str, float] = {
+    "requests_per_minute": 120,  # débit soutenu d'appels au LLM (quota Gemini)
+    "burst": 20,  # appels autorisés d'un coup quand le seau est plein
+    "max_concurrency": 8,  # analyses en cours simultanément
+    "max_queue": 16,  # analyses en attente d'une place ; au-delà : 429 immédiat
+    "max_wait": 10.0,  # attente maximale (secondes) avant de renoncer : 429
+}
+
+
+class LLMOverloadedError(Exception):
+    """Le limiteur refuse la requête ; le client peut réessayer après `retry_after` secondes."""
+
+    def __init__(self, model: str, reason: str, retry_after: float) -> None:
+        super().__init__(f"Trop de requêtes pour le modèle '{model}' ({reason}).")
+        self.model = model
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons par seconde, au plus `capacity` en réserve."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        # Appelé avec self._lock acquis
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Prend `tokens` jetons si possible et retourne 0, sinon le temps d'attente nécessaire."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def charge(self, tokens: float) -> None:
+        """Prend `tokens` jetons sans attendre : le seau peut passer en négatif (dette)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+
+class CallReservation:
+    """
+    Appels au LLM réservés par une analyse. Les appels en plus (requêtes doublées,
+    formatage de secours, modèle de doublement) sont prélevés à part, sans attente.
+    """
+
+    def __init__(self, model: str, calls: float) -> None:
+        self.model = model
+        self._remaining = calls
+        self._lock = threading.Lock()
+
+    def use(self, model: str) -> bool:
+        """Décompte un appel de `model` ; False s'il n'était pas couvert par la réservation."""
+        with self._lock:
+            if model != self.model or self._remaining < 1:
+                return False
+            self._remaining -= 1
+            return True
+
+
+# Réservation de l'analyse en cours ; les pools de threads (fenêtres, doublement)
+# propagent le contexte pour que leurs appels soient décomptés dans la même analyse
+_reservation: ContextVar[Optional[CallReservation]] = ContextVar(
+    "llm_call_reservation", default=None
+)
+
+
+def record_llm_call(model: str) -> None:
+    """
+    Décompte un appel au LLM de l'analyse en cours. S'il dépasse les appels réservés,
+    il est prélevé sur le seau du modèle appelé : les analyses suivantes attendront
+    d'autant. Sans analyse en cours (CLI du corpus...), rien n'est décompté.
+    """
+    reservation = _reservation.get()
+    if reservation is None or reservation.use(model):
+        return
+    llm_limiters.get(model).charge(1)
+
+
+class LLMLimiter:
+    """
+    Limite les analyses LLM d'un modèle : au plus `max_concurrency` en cours, au plus
+    `max_queue` en attente d'une place, et un débit d'appels borné par un seau à jetons.
+
+    Une requête qui trouve la file pleine, ou qui ne peut pas obtenir de place et de
+    jetons en `max_wait` secondes, est refusée immédiatement (`LLMOverloadedError`) au
+    lieu d'attendre jusqu'au timeout et de consommer le quota des autres.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        requests_per_minute: float = DEFAULT_LIMITS["requests_per_minute"],
+        burst: float = DEFAULT_LIMITS["burst"],
+        max_concurrency: int = int(DEFAULT_LIMITS["max_concurrency"]),
+        max_queue: int = int(DEFAULT_LIMITS["max_queue"]),
+        max_wait: float = DEFAULT_LIMITS["max_wait"],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.model = model
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._bucket = TokenBucket(requests_per_minute / 60, burst, clock)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def _reject(self, reason: str, retry_after: float) -> LLMOverloadedError:
+        record_llm_rejection(self.model, reason)
+        return LLMOverloadedError(self.model, reason, retry_after)
+
+    def _estimated_wait(self, tokens: float) -> float:
+        # Temps pour servir la file d'attente actuelle au débit du seau
+        return (self._waiting + 1) * tokens / self._bucket.rate
+
+    @contextmanager
+    def acquire(self, tokens: float = 1) -> Iterator[None]:
+        """
+        Réserve une place et `tokens` appels au LLM pour la durée du bloc. Les appels du
+        bloc au-delà de la réservation sont prélevés à part (`record_llm_call`).
+        """
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        # Une demande plus grande que le seau ne serait jamais servie : elle le vide
+        tokens = min(tokens, self._bucket.capacity)
+
+        # Place libre : pas de passage par la file d'attente
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                if self._waiting >= self.max_queue:
+                    raise self._reject("queue_full", self._estimated_wait(tokens))
+                self._waiting += 1
+            try:
+                acquired = self._semaphore.acquire(timeout=self.max_wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if not acquired:
+                raise self._reject("timeout", self._estimated_wait(tokens))
+
+        try:
+            while True:
+                wait = self._bucket.try_acquire(tokens)
+                if not wait:
+                    break
+                if time.monotonic() + wait > deadline:
+                    raise self._reject("rate_limited", wait)
+                time.sleep(wait)
+            observe_llm_queue_wait(self.model, time.monotonic() - start)
+            reservation = _reservation.set(CallReservation(self.model, tokens))
+            try:
+                yield
+            finally:
+                _reservation.reset(reservation)
+        finally:
+            self._semaphore.release()
+
+    def charge(self, calls: float) -> None:
+        """Décompte des appels déjà effectués, sans attendre ni refuser."""
+        self._bucket.charge(calls)
+
+
+def load_limits() -> Dict[str, Dict[str, Any]]:
+    """
+    Limites par modèle depuis `LLM_LIMITS` (JSON), ex :
+    {"default": {"max_concurrency": 4}, "gemini-3-pro-preview": {"requests_per_minute": 30}}
+    Les valeurs absentes sont reprises de "default" puis de `DEFAULT_LIMITS`.
+    """
+    limits = os.getenv("LLM_LIMITS")
+    return json.loads(limits) if limits else {}
+
+
+class LLMLimiterRegistry:
+    """
+    Un limiteur par modèle, créé à la première utilisation. Les modèles des requêtes sont
+    validés en amont (`schema.ModelName`) : le registre reste borné.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]] | None = None) -> None:
+        self._limits = load_limits() if limits is None else limits
+        self._limiters: Dict[str, LLMLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> LLMLimiter:
+        """Retourne le limiteur du modèle."""
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                config = {
+                    **DEFAULT_LIMITS,
+                    **self._limits.get("default", {}),
+                    **self._limits.get(model, {}),
+                }
+                limiter = LLMLimiter(
+                    model,
+                    requests_per_minute=config["requests_per_minute"],
+                    burst=config["burst"],
+                    max_concurrency=int(config["max_concurrency"]),
+                    max_queue=int(config["max_queue"]),
+                    max_wait=config["max_wait"],
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+
+llm_limiters = LLMLimiterRegistry()
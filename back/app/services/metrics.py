@@ -0,0 +1,231 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.services.gemini_clients import get_allowed_models
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+PROGRESSION_LENGTH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+TOKEN_BUCKETS = (100, 300, 1000, 3000, 10000, 30000, 100000)
+# Label des modèles inconnus, pour que le nombre de séries reste borné
+OTHER_MODEL = "other"
+
+REQUEST_COUNT = Counter(
+    "chords_http_requests_total",
+    "Nombre de requêtes HTTP par endpoint, modèle et statut.",
+    ["endpoint", "method", "model", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "chords_http_request_duration_seconds",
+    "Latence des requêtes HTTP par endpoint et modèle.",
+    ["endpoint", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+PIPELINE_STAGE_LATENCY = Histogram(
+    "chords_pipeline_stage_duration_seconds",
+    "Temps passé dans chaque étape du pipeline d'analyse.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_LATENCY = Histogram(
+    "chords_llm_call_duration_seconds",
+    "Latence des appels au LLM par modèle et par étape.",
+    ["model", "step"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_FAILURES = Counter(
+    "chords_llm_call_failures_total",
+    "Nombre d'appels au LLM en échec par modèle et par étape.",
+    ["model", "step"],
+)
+LLM_TOKENS = Counter(
+    "chords_llm_tokens_total",
+    "Tokens consommés par les appels au LLM (quand le SDK les fournit).",
+    ["model", "step", "kind"],
+)
+LLM_REQUEST_TOKENS = Histogram(
+    "chords_llm_request_tokens",
+    "Tokens consommés par requête HTTP (tous appels au LLM confondus), par endpoint et type.",
+    ["endpoint", "model", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_HEDGES = Counter(
+    "chords_llm_hedges_total",
+    "Appels au LLM doublés (requête de couverture), par gagnant : primary, hedge ou none.",
+    ["model", "step", "winner"],
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "chords_llm_circuit_state",
+    "État du disjoncteur par modèle : 0 fermé, 1 semi-ouvert, 2 ouvert.",
+    ["model"],
+)
+LLM_FALLBACKS = Counter(
+    "chords_llm_fallbacks_total",
+    "Analyses servies sans le LLM (disjoncteur ouvert ou échec), par source : cache ou local.",
+    ["model", "source"],
+)
+LLM_ANALYSIS_REPAIRS = Counter(
+    "chords_llm_analysis_repairs_total",
+    "Analyses du LLM hors format corrigées localement, par issue : repaired ou failed.",
+    ["model", "outcome"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "chords_llm_queue_wait_seconds",
+    "Attente avant l'appel au LLM (file d'attente et limite de débit) par modèle.",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REJECTIONS = Counter(
+    "chords_llm_rejections_total",
+    "Requêtes refusées (429) par le limiteur d'appels au LLM, par modèle et par motif.",
+    ["model", "reason"],
+)
+PROGRESSION_LENGTH = Histogram(
+    "chords_progression_length",
+    "Nombre d'accords par progression analysée.",
+    buckets=PROGRESSION_LENGTH_BUCKETS,
+)
+
+
+class CacheInfoCollector(Collector):
+    """
+    Expose les compteurs hits/misses des caches enregistrés (toute fonction
+    exposant `cache_info()`, comme `functools.lru_cache`) au moment du scrape.
+    """
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, Callable[[], Any]] = {}
+
+    def register(self, name: str, cache_info: Callable[[], Any]) -> None:
+        """Ajoute un cache à exposer (ex: `parse_chord.cache_info`)."""
+        self._caches[name] = cache_info
+
+    def collect(self) -> Iterator[Any]:
+        """Produit les familles de métriques hits, misses et ratio."""
+        hits = CounterMetricFamily(
+            "chords_cache_hits", "Nombre de hits par cache.", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "chords_cache_misses", "Nombre de misses par cache.", labels=["cache"]
+        )
+        ratio = GaugeMetricFamily(
+            "chords_cache_hit_ratio", "Ratio hits / (hits + misses) par cache.", labels=["cache"]
+        )
+        for name, cache_info in self._caches.items():
+            info = cache_info()
+            total = info.hits + info.misses
+            hits.add_metric([name], info.hits)
+            misses.add_metric([name], info.misses)
+            ratio.add_metric([name], info.hits / total if total else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+
+CACHES = CacheInfoCollector()
+REGISTRY.register(CACHES)
+
+
+def register_cache(name: str, cache_info: Callable[[], Any]) -> None:
+    """Enregistre un cache dont le ratio de hits sera exposé sur `/metrics`."""
+    CACHES.register(name, cache_info)
+
+
+def model_label(model: str) -> str:
+    """
+    Valeur du label `model` : les modèles acceptés (`get_allowed_models`) et le modèle de
+    doublement (`LLM_HEDGE_MODEL`) gardent leur nom, tout autre nom devient "other".
+    """
+    if not model or model in get_allowed_models() or model == os.getenv("LLM_HEDGE_MODEL"):
+        return model
+    return OTHER_MODEL
+
+
+def observe_request(endpoint: str, method: str, model: str, status: int, duration: float) -> None:
+    model = model_label(model)
+    REQUEST_COUNT.labels(endpoint=endpoint, method=method, model=model, status=str(status)).inc()
+    REQUEST_LATENCY.labels(endpoint=endpoint, model=model).observe(duration)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Mesure la durée d'une étape du pipeline d'analyse."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_stage(stage: str, duration: float) -> None:
+    PIPELINE_STAGE_LATENCY.labels(stage=stage).observe(duration)
+
+
+@contextmanager
+def track_llm_call(model: str, step: str) -> Iterator[None]:
+    """Mesure la latence d'un appel au LLM et comptabilise les échecs."""
+    model = model_label(model)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        LLM_CALL_FAILURES.labels(model=model, step=step).inc()
+        raise
+    finally:
+        LLM_CALL_LATENCY.labels(model=model, step=step).observe(time.perf_counter() - start)
+
+
+def record_token_usage(model: str, step: str, response: Any) -> None:
+    """Comptabilise les tokens d'une réponse Gemini si `usage_metadata` est disponible."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    completion_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    model = model_label(model)
+    LLM_TOKENS.labels(model=model, step=step, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model=model, step=step, kind="completion").inc(completion_tokens)
+
+
+def observe_request_tokens(
+    endpoint: str, model: str, prompt_tokens: int, completion_tokens: int
+) -> None:
+    model = model_label(model)
+    LLM_REQUEST_TOKENS.labels(endpoint=endpoint, model=model, kind="prompt").observe(prompt_tokens)
+    LLM_REQUEST_TOKENS.labels(endpoint=endpoint, model=model, kind="completion").observe(
+        completion_tokens
+    )
+
+
+def record_hedge(model: str, step: str, winner: str) -> None:
+    LLM_HEDGES.labels(model=model_label(model), step=step, winner=winner).inc()
+
+
+def record_circuit_state(model: str, state: str) -> None:
+    LLM_CIRCUIT_STATE.labels(model=model_label(model)).set(CIRCUIT_STATE_VALUES[state])
+
+
+def record_llm_fallback(model: str, source: str) -> None:
+    LLM_FALLBACKS.labels(model=model_label(model), source=source).inc()
+
+
+def record_analysis_repair(model: str, outcome: str) -> None:
+    LLM_ANALYSIS_REPAIRS.labels(model=model_label(model), outcome=outcome).inc()
+
+
+def observe_llm_queue_wait(model: str, duration: float) -> None:
+    LLM_QUEUE_WAIT.labels(model=model_label(model)).observe(duration)
+
+
+def record_llm_rejection(model: str, reason: str) -> None:
+    LLM_REJECTIONS.labels(model=model_label(model), reason=reason).inc()
+
+
+def record_progression_length(length: int) -> None:
+    PROGRESSION_LENGTH.observe(length)
@@ -0,0 +1,145 @@
+from typing import Any, Callable, ContextManager, Dict, List
+
+from app.chords_calculator.modal_substitution import (
+    get_substituted_chords,
+    get_substitution_info,
+    get_substitutions,
+)
+from app.chords_calculator.secondary_dominant import get_secondary_dominants_for_modes
+from app.chords_calculator.tritone_substitution import get_tritone_substitute
+from app.schema import ChordItem
+from app.services.analysis import analyze_progression_segments
+from app.services.data_filler import fill_interface_data
+from app.services.metrics import track_stage
+from app.utils.borrowed_modes import get_borrowed_chords
+from app.utils.chords_analyzer import AnalyzedChord, ChordAnalysis, analyze_chord
+from app.utils.common import get_note_from_index, get_note_index
+from constants import MAJOR_MODES_DATA, MODES_DATA
+
+# Version du contenu des réponses de `run_analysis_pipeline` : à incrémenter dès qu'une
+# modification change le résultat d'une analyse (invalide les ETags de `/analyze`)
+ANALYSIS_VERSION = "1"
+
+# Fabrique de context managers appelée avec le nom de chaque étape (timing, allocations...)
+StageTracker = Callable[[str], ContextManager[Any]]
+
+
+def get_progression(progression_data: List[ChordItem]) -> List[str]:
+    return [f"{item.root}{item.quality}" for item in progression_data]
+
+
+def run_analysis_pipeline(
+    progression_data: List[ChordItem],
+    analysis_result: Dict[str, Any],
+    stage: StageTracker = track_stage,
+) -> Dict[str, Any]:
+    """
+    Exécute toute la partie théorique de `/analyze` (tout ce qui suit l'appel au LLM)
+    à partir du résultat de `detect_tonic_and_mode`.
+
+    Les analyses d'accords restent des enregistrements compacts et partagés
+    (`ChordAnalysis`, `AnalyzedChord`) pendant tout le calcul ; elles ne sont converties
+    au format JSON de la réponse qu'une fois, à la fin (étape "response").
+    """
+    progression = get_progression(progression_data)
+    global_analysis = analysis_result["global_analysis"]
+    harmonic_segments = analysis_result["harmonic_segments"]
+
+    # 1. Analyse de chaque accord dans le contexte de son segment harmonique
+    with stage("segments_analysis"):
+        quality_analysis: List[AnalyzedChord] = analyze_progression_segments(
+            progression, harmonic_segments
+        )
+
+    # 2. Ajout des propriétés originales aux résultats d'analyse
+    fill_interface_data(quality_analysis, progression_data)
+
+    # 3. Calcul des accords empruntés pour les accords non diatoniques
+    with stage("borrowed_chords"):
+        borrowed_chords = get_borrowed_chords(quality_analysis)
+
+    global_tonic = global_analysis["tonic"]
+    detected_tonic_index: int = get_note_index(global_tonic)
+
+    degrees_to_borrow: List[Dict[str, Any] | None] = get_substitution_info(quality_analysis)
+
+    substitutions: Dict[str, Dict[str, Any]] = {}
+    with stage("major_modes_substitutions"):
+        for mode_name, (_, _, interval) in MAJOR_MODES_DATA.items():
+            relative_tonic_index = (detected_tonic_index + interval + 12) % 12
+            new_progression = get_substitutions(
+                progression, relative_tonic_index, degrees_to_borrow
+            )
+            for index, item in enumerate(new_progression):
+                chord_data = progression_data[index]
+                item["inversion"] = chord_data.inversion
+                item["duration"] = chord_data.duration
+            substitutions[mode_name] = {
+                "borrowed_scale": f"{get_note_from_index(relative_tonic_index)} Major",
+                "substitution": new_progression,
+            }
+
+    # Harmonize all existing modes
+    harmonized_chords: Dict[str, List[ChordAnalysis]] = {}
+    with stage("harmonization"):
+        context_tonic_indexes: List[int] = []
+        for target_mode_name in MODES_DATA.keys():
+            new_progression_chords: List[str] = []
+
+            # 1. SUBSTITUTION SEGMENT PAR SEGMENT
+            for segment in harmonic_segments:
+                segment_start = segment["start_index"]
+                segment_end = segment["end_index"]
+
+                segment_tonic_index = get_note_index(segment["tonic"])
+                segment_progression = progression[segment_start : segment_end + 1]
+                segment_sub_info = degrees_to_borrow[segment_start : segment_end + 1]
+
+                new_progression_chords.extend(
+                    get_substituted_chords(
+                        segment_progression, segment_tonic_index, segment_sub_info, target_mode_name
+                    )
+                )
+
+            # Tonique du segment de chaque position : identique pour tous les modes
+            if not context_tonic_indexes:
+                context_tonic_indexes = [
+                    get_note_index(
+                        next(
+                            s for s in harmonic_segments if s["start_index"] <= i <= s["end_index"]
+                        )["tonic"]
+                    )
+                    for i in range(len(new_progression_chords))
+                ]
+
+            # 2. ANALYSE DE LA NOUVELLE PROGRESSION (enregistrements partagés, en cache)
+            harmonized_chords[target_mode_name] = [
+                analyze_chord(chord, context_tonic_indexes[i], target_mode_name)
+                for i, chord in enumerate(new_progression_chords)
+            ]
+
+    # Get all secondary dominants for all major modes
+    with stage("secondary_dominants"):
+        secondary_dominants = get_secondary_dominants_for_modes(substitutions, global_tonic)
+
+    tritone_substitutions: List[List[Any]] = []
+    with stage("tritone_substitutions"):
+        for chord in progression:
+            substitute, analysis = get_tritone_substitute(chord)
+            tritone_substitutions.append([chord, substitute, analysis])
+
+    # Conversion unique au format JSON de la réponse
+    with stage("response"):
+        return {
+            "tonic": global_tonic,
+            "explanations": global_analysis["explanation"],
+            "quality_analysis": [item.to_json() for item in quality_analysis],
+            "borrowed_chords": borrowed_chords,
+            "major_modes_substitutions": substitutions,
+            "harmonized_chords": {
+                mode_name: [analysis.to_json() for analysis in analyses]
+                for mode_name, analyses in harmonized_chords.items()
+            },
+            "secondary_dominants": secondary_dominants,
+            "tritone_substitutions": tritone_substitutions,
+        }
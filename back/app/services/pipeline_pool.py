@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.schema import ChordItem
+from app.services.metrics import observe_stage
+from app.services.pipeline import run_analysis_pipeline
+
+# Au-delà de ce nombre d'accords, la partie théorique (plusieurs dizaines de ms de CPU
+# pur Python qui tiennent le GIL) est exécutée hors du processus du serveur
+DEFAULT_POOL_THRESHOLD = 32
+DEFAULT_POOL_WORKERS = 4
+
+# Progression de préchauffage : remplit les caches des tables théoriques de chaque worker
+_WARMUP_PROGRESSION = [("D", "m7"), ("G", "7"), ("C", "maj7"), ("A", "7b9")]
+_WARMUP_ANALYSIS = {
+    "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": ""},
+    "harmonic_segments": [
+        {"start_index": 0, "end_index": 3, "tonic": "C", "mode": "Ionian", "explanation": ""}
+    ],
+}
+
+
+def get_pool_config() -> Tuple[int, int]:
+    """Seuil en accords et nombre de workers (`PIPELINE_POOL_THRESHOLD`, `PIPELINE_POOL_WORKERS`)."""
+    threshold = int(os.getenv("PIPELINE_POOL_THRESHOLD", DEFAULT_POOL_THRESHOLD))
+    default_workers = min(DEFAULT_POOL_WORKERS, os.cpu_count() or 1)
+    workers = int(os.getenv("PIPELINE_POOL_WORKERS", default_workers))
+    return threshold, workers
+
+
+def run_pipeline_task(
+    progression_data: List[ChordItem], analysis_result: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[Tuple[str, float]]]:
+    """
+    Fonction pure exécutée dans un worker : résultat de `run_analysis_pipeline` et durée
+    de chaque étape, renvoyée au processus principal qui tient les métriques.
+    """
+    timings: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings.append((name, time.perf_counter() - start))
+
+    return run_analysis_pipeline(progression_data, analysis_result, stage=stage), timings
+
+
+def _warm_up_worker() -> None:
+    """Initialise un worker : tables et caches théoriques chargés avant la première requête."""
+    progression_data = [
+        ChordItem(id=index, root=root, quality=quality)
+        for index, (root, quality) in enumerate(_WARMUP_PROGRESSION)
+    ]
+    run_pipeline_task(progression_data, _WARMUP_ANALYSIS)
+
+
+class PipelinePool:
+    """
+    Pool de processus préchauffés pour la partie théorique de `/analyze` (tout ce qui
+    suit l'appel au LLM). Les progressions de moins de `threshold` accords restent
+    exécutées dans le thread de la requête : l'aller-retour vers un worker coûterait
+    plus que le calcul.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._starting = False
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        """Indique si le pool de processus est démarré."""
+        return self._executor is not None
+
+    def start(self) -> None:
+        """
+        Démarre et préchauffe les workers (sans effet si `PIPELINE_POOL_WORKERS=0` ou si un
+        démarrage est déjà en cours). Le pool n'est utilisé qu'une fois tous ses workers
+        prêts : jusque-là, et s'ils ne démarrent pas, tout est exécuté sur place.
+        """
+        _, workers = get_pool_config()
+        with self._lock:
+            if self._executor is not None or self._starting or workers <= 0:
+                return
+            self._starting = True
+        try:
+            # "spawn" : pas de fork d'un serveur qui a déjà des threads en cours
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up_worker,
+            )
+            # Les workers sont lancés à la demande : une tâche vide chacun les démarre tous
+            try:
+                for future in [executor.submit(time.sleep, 0) for _ in range(workers)]:
+                    future.result()
+            except BrokenProcessPool as e:
+                # Le serveur démarre quand même : la partie théorique reste exécutée sur place
+                print(f"Démarrage du pool du pipeline impossible, exécution dans le serveur : {e}")
+                executor.shutdown(cancel_futures=True)
+                return
+            with self._lock:
+                self._executor = executor
+        finally:
+            with self._lock:
+                self._starting = False
+
+    def shutdown(self) -> None:
+        """Arrête les workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _restart_in_background(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Remplace un pool cassé sans bloquer la requête : le pool est retiré tout de suite
+        (les requêtes suivantes s'exécutent sur place) et recréé dans un thread. Seule
+        la première requête à constater la panne déclenche le redémarrage.
+        """
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        threading.Thread(target=self.start, name="pipeline-pool-restart", daemon=True).start()
+
+    def run(
+        self, progression_data: List[ChordItem], analysis_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """`run_analysis_pipeline`, dans un worker si la progression dépasse le seuil."""
+        threshold, _ = get_pool_config()
+        executor = self._executor
+        if executor is None or len(progression_data) < threshold:
+            return run_analysis_pipeline(progression_data, analysis_result)
+        try:
+            result, timings = executor.submit(
+                run_pipeline_task, progression_data, analysis_result
+            ).result()
+        except BrokenProcessPool as e:
+            # Worker tué (OOM...) : la requête est servie ici, le pool est recréé à côté
+            print(f"Pool du pipeline indisponible, exécution dans le serveur : {e}")
+            self._restart_in_background(executor)
+            return run_analysis_pipeline(progression_data, analysis_result)
+        for stage, duration in timings:
+            observe_stage(stage, duration)
+        return result
+
+
+pipeline_pool = PipelinePool()
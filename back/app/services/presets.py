@@ -0,0 +1,186 @@
+"""
+Catalogue de progressions prédéfinies et analyses de référence.
+
+Les réponses `/analyze` complètes de chaque préréglage, dans chaque tonalité, sont
+calculées sans LLM (la tonalité d'un préréglage est connue). Chacune est calculée à sa
+première demande, sérialisée une fois et gardée en mémoire : rien n'est calculé au
+démarrage, et une réponse déjà demandée est servie telle quelle, sans recalcul.
+"""
+
+import threading
+from typing import Any, Dict, List
+
+import orjson
+
+from app.schema import ChordItem
+from app.services.pipeline import run_analysis_pipeline
+from app.utils.common import get_note_from_index, get_note_index
+
+# Accords relatifs à la tonique : (intervalle en demi-tons, qualité)
+PRESET_CATALOG: List[Dict[str, Any]] = [
+    {
+        "id": "ii-v-i",
+        "name": "ii–V–I",
+        "mode": "Ionian",
+        "chords": [(2, "m7"), (7, "7"), (0, "maj7")],
+        "description": "Cadence parfaite du jazz : sous-dominante, dominante, tonique.",
+    },
+    {
+        "id": "minor-ii-v-i",
+        "name": "ii°–V–i mineur",
+        "mode": "Harmonic Minor",
+        "chords": [(2, "m7b5"), (7, "7"), (0, "m")],
+        "description": "Cadence mineure : demi-diminué, dominante de la mineure harmonique.",
+    },
+    {
+        "id": "pop-axis",
+        "name": "I–V–vi–IV",
+        "mode": "Ionian",
+        "chords": [(0, ""), (7, ""), (9, "m"), (5, "")],
+        "description": "La progression pop la plus répandue.",
+    },
+    {
+        "id": "doo-wop",
+        "name": "I–vi–IV–V",
+        "mode": "Ionian",
+        "chords": [(0, ""), (9, "m"), (5, ""), (7, "")],
+        "description": "Progression des années 50 (doo-wop).",
+    },
+    {
+        "id": "jazz-turnaround",
+        "name": "I–vi–ii–V",
+        "mode": "Ionian",
+        "chords": [(0, "maj7"), (9, "m7"), (2, "m7"), (7, "7")],
+        "description": "Turnaround : ramène à la tonique par le cycle des quintes.",
+    },
+    {
+        "id": "pachelbel",
+        "name": "Canon de Pachelbel",
+        "mode": "Ionian",
+        "chords": [(0, ""), (7, ""), (9, "m"), (4, "m"), (5, ""), (0, ""), (5, ""), (7, "")],
+        "description": "Basse descendante par quartes et secondes du Canon en ré.",
+    },
+    {
+        "id": "twelve-bar-blues",
+        "name": "Blues 12 mesures",
+        "mode": "Mixolydian",
+        "chords": [(0, "7")] * 4
+        + [(5, "7")] * 2
+        + [(0, "7")] * 2
+        + [(7, "7"), (5, "7"), (0, "7"), (7, "7")],
+        "description": "Grille de blues : accords de septième de dominante sur I, IV et V.",
+    },
+    {
+        "id": "andalusian",
+        "name": "Cadence andalouse",
+        "mode": "Aeolian",
+        "chords": [(0, "m"), (10, ""), (8, ""), (7, "")],
+        "description": "Descente i–♭VII–♭VI–V, avec la dominante majeure empruntée.",
+    },
+    {
+        "id": "dorian-vamp",
+        "name": "Vamp dorien i–IV",
+        "mode": "Dorian",
+        "chords": [(0, "m7"), (5, "7")],
+        "description": "Alternance mineur / IV majeur, caractéristique du mode dorien.",
+    },
+    {
+        "id": "mixolydian-rock",
+        "name": "I–♭VII–IV–I",
+        "mode": "Mixolydian",
+        "chords": [(0, ""), (10, ""), (5, ""), (0, "")],
+        "description": "Progression rock mixolydienne autour du ♭VII.",
+    },
+]
+PRESETS: Dict[str, Dict[str, Any]] = {preset["id"]: preset for preset in PRESET_CATALOG}
+KEYS = [get_note_from_index(index) for index in range(12)]
+
+
+def get_preset_key(preset_id: str, key: str) -> str:
+    """Clé d'un préréglage dans une tonalité (ex: `ii-v-i/C#`), tonalité normalisée."""
+    if preset_id not in PRESETS:
+        raise ValueError(f"Préréglage inconnu : '{preset_id}'")
+    try:
+        key_index = get_note_index(key)
+    except ValueError:
+        raise ValueError(f"Tonalité non reconnue : '{key}'")
+    return f"{preset_id}/{get_note_from_index(key_index)}"
+
+
+def get_preset_progression(preset: Dict[str, Any], key: str) -> List[ChordItem]:
+    tonic_index = get_note_index(key)
+    return [
+        ChordItem(id=index, root=get_note_from_index(tonic_index + interval), quality=quality)
+        for index, (interval, quality) in enumerate(preset["chords"])
+    ]
+
+
+def get_preset_analysis_result(preset: Dict[str, Any], key: str, length: int) -> Dict[str, Any]:
+    """Résultat au format de `detect_tonic_and_mode`, la tonalité d'un préréglage étant connue."""
+    explanation = f"{preset['name']} en {key} {preset['mode']} : {preset['description']}"
+    return {
+        "global_analysis": {"tonic": key, "mode": preset["mode"], "explanation": explanation},
+        "harmonic_segments": [
+            {
+                "start_index": 0,
+                "end_index": length - 1,
+                "tonic": key,
+                "mode": preset["mode"],
+                "explanation": explanation,
+            }
+        ],
+    }
+
+
+def analyze_preset(preset_id: str, key: str) -> Dict[str, Any]:
+    """Réponse `/analyze` complète d'un préréglage dans une tonalité."""
+    preset = PRESETS[preset_id]
+    progression_data = get_preset_progression(preset, key)
+    analysis_result = get_preset_analysis_result(preset, key, len(progression_data))
+    result = run_analysis_pipeline(progression_data, analysis_result)
+    result["preset"] = {"id": preset_id, "name": preset["name"], "key": key}
+    return result
+
+
+def serialize(result: Dict[str, Any]) -> bytes:
+    # Même encodage que les réponses de `/analyze` (`ORJSONResponse`)
+    return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+
+
+class PresetStore:
+    """Réponses JSON des préréglages, calculées à la première demande puis gardées en mémoire."""
+
+    def __init__(self) -> None:
+        self._responses: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, preset_id: str, key: str) -> bytes:
+        """Réponse JSON (octets) du préréglage dans la tonalité donnée."""
+        preset_key = get_preset_key(preset_id, key)
+        with self._lock:
+            response = self._responses.get(preset_key)
+        if response is None:
+            response = serialize(analyze_preset(preset_id, preset_key.split("/", 1)[1]))
+            with self._lock:
+                self._responses[preset_key] = response
+        return response
+
+
+def get_catalog() -> List[Dict[str, Any]]:
+    """Catalogue exposé au frontend : accords en degrés relatifs, tonalités disponibles."""
+    return [
+        {
+            "id": preset["id"],
+            "name": preset["name"],
+            "mode": preset["mode"],
+            "description": preset["description"],
+            "chords": [
+                {"interval": interval, "quality": quality} for interval, quality in preset["chords"]
+            ],
+            "keys": KEYS,
+        }
+        for preset in PRESET_CATALOG
+    ]
+
+
+preset_store = PresetStore()
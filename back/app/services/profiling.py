@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage : un thread annexe relève périodiquement la pile
+    du thread profilé. Le résultat est au format "collapsed stacks"
+    (`frame;frame;frame count`), lisible par flamegraph.pl, speedscope ou inferno.
+
+    Usage :
+        with SamplingProfiler() as profiler:
+            run_analysis()
+        print(profiler.collapsed())
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        """Démarre l'échantillonnage (du thread courant par défaut)."""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Arrête l'échantillonnage."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self._record(frame)
+            time.sleep(self.interval)
+
+    def _record(self, frame: Optional[FrameType]) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        # Les flamegraphs attendent la pile de la racine vers la feuille
+        self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Retourne les piles échantillonnées au format collapsed (une pile par ligne)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def save_profile(collapsed: str, directory: str, prefix: str = "analyze") -> str:
+    """Écrit un profil collapsed dans `directory` et retourne le chemin du fichier."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{prefix}-{time.time_ns()}.folded")
+    with open(path, "w", encoding="utf-8") as profile_file:
+        profile_file.write(collapsed)
+    return path
@@ -0,0 +1,128 @@
+"""
+Encodage canonique et compact d'une progression, pour `GET /analyze`.
+
+Les accords sont séparés par `_` ; chacun s'écrit `{fondamentale}{qualité}`, suivi de
+`~{renversement}` s'il n'est pas à l'état fondamental et de `*{durée}` si elle diffère
+de la durée par défaut, ex : `Dm7_G7~1_Cmaj7*4`. L'orthographe de la fondamentale est
+conservée (elle apparaît dans la réponse) ; les espaces et les valeurs par défaut ne le
+sont pas, si bien qu'une progression n'a qu'une forme canonique. Le client l'encode
+avec `encodeURIComponent` : une même progression donne toujours la même URL.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.schema import ChordItem
+from app.services.pipeline import ANALYSIS_VERSION
+
+CHORD_SEPARATOR = "_"
+INVERSION_PREFIX = "~"
+DURATION_PREFIX = "*"
+DEFAULT_DURATION = ChordItem.model_fields["duration"].default
+# Fondamentale puis qualité telle quelle, comme `/analyze` les concatène
+_CHORD_PATTERN = re.compile(r"([A-G](?:#|b|♯|♭)?)(.*)")
+
+
+def encode_progression(progression_data: List[ChordItem]) -> str:
+    """Forme canonique d'une progression (les notes et identifiants ne sont pas encodés)."""
+    tokens = []
+    for item in progression_data:
+        token = f"{item.root.strip()}{item.quality.strip()}"
+        if item.inversion:
+            token += f"{INVERSION_PREFIX}{item.inversion}"
+        if item.duration != DEFAULT_DURATION:
+            token += f"{DURATION_PREFIX}{item.duration}"
+        tokens.append(token)
+    return CHORD_SEPARATOR.join(tokens)
+
+
+def decode_progression(encoded: str) -> List[ChordItem]:
+    """
+    Décode une progression ; les accords sont identifiés par leur position.
+    Lève une ValueError si un accord, un renversement ou une durée est invalide.
+    """
+    progression_data = []
+    for index, token in enumerate(encoded.strip().split(CHORD_SEPARATOR)):
+        chord, _, duration = token.strip().partition(DURATION_PREFIX)
+        chord, _, inversion = chord.partition(INVERSION_PREFIX)
+        match = _CHORD_PATTERN.fullmatch(chord)
+        if match is None:
+            raise ValueError(f"Accord non reconnu : '{chord}'")
+        # Renversement signé (l'éditeur produit des renversements négatifs), durée positive
+        if not (inversion or "0").removeprefix("-").isdigit() or not (duration or "1").isdigit():
+            raise ValueError(f"Renversement ou durée invalide : '{token}'")
+        progression_data.append(
+            ChordItem(
+                id=index,
+                root=match.group(1),
+                quality=match.group(2),
+                inversion=int(inversion or 0),
+                duration=int(duration or DEFAULT_DURATION),
+            )
+        )
+    return progression_data
+
+
+def get_analysis_etag(canonical: str, model: str, representation: str = "") -> str:
+    """
+    ETag faible d'une analyse, calculé sans l'exécuter : progression canonique, modèle et
+    version du code d'analyse. Une requête conditionnelle peut donc recevoir un 304
+    sans aucun appel au LLM. Le LLM n'étant pas déterministe, deux réponses de même
+    ETag (après éviction du cache, ou d'un worker à l'autre) sont équivalentes sans être
+    identiques octet par octet : l'ETag est donc faible (`W/`). `representation`
+    distingue les formats de la réponse (format compact).
+    """
+    key = f"{ANALYSIS_VERSION}\n{model}\n{canonical}"
+    if representation:
+        key += f"\n{representation}"
+    digest = hashlib.sha256(key.encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de `If-None-Match` (liste d'ETags ou `*`), comme l'exige HTTP."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    opaque = etag.removeprefix("W/")
+    return "*" in candidates or opaque in [c.removeprefix("W/") for c in candidates]
+
+
+class ResponseCache:
+    """
+    Dernières réponses sérialisées par ETag (LRU). L'ETag est faible : il ne promet qu'une
+    analyse équivalente, le LLM n'étant pas déterministe. Ce cache évite de rappeler le LLM
+    et sert, tant que l'entrée y reste, les mêmes octets à toutes les requêtes du worker.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[bytes]:
+        """Réponse mémorisée pour cet ETag, ou None."""
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag: str, content: bytes) -> None:
+        """Mémorise une réponse."""
+        with self._lock:
+            self._entries[etag] = content
+            self._entries.move_to_end(etag)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+analysis_responses = ResponseCache()
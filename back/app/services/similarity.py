@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from app.utils.chords_analyzer import analyze_chord
+from app.utils.common import get_note_index
+from constants import MODES_DATA
+
+# 16 bandes de 4 lignes : deux progressions deviennent candidates dès qu'une bande
+# coïncide, soit à partir d'une similarité de Jaccard d'environ (1/16)^(1/4) ≈ 0.5
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+# Nombre maximal de candidates comparées par requête (les plus de bandes en commun d'abord) :
+# borne la latence quand un n-gramme très courant (ii–V–I) remplit des seaux entiers
+MAX_CANDIDATES = 2000
+# Nombre maximal de progressions de la bibliothèque : borne la mémoire et le fichier
+DEFAULT_MAX_SIZE = 500_000
+
+_MAX_HASH = (1 << 32) - 1
+_SHINGLE_HASH_FORMAT = f"<{NUM_PERMUTATIONS}I"
+
+
+def get_numerals(progression: Sequence[str], tonic: str, mode_name: str = "Ionian") -> List[str]:
+    """
+    Chiffrage romain (`found_numeral`) de chaque accord dans la tonalité donnée.
+    Relatif à la tonique, il est identique pour toutes les transpositions d'une progression.
+    Les accords non reconnus sont ignorés.
+    """
+    if mode_name not in MODES_DATA:
+        raise ValueError(f"Le mode '{mode_name}' n'est pas reconnu.")
+    tonic_index = get_note_index(tonic)
+    numerals = []
+    for chord in progression:
+        numeral = analyze_chord(chord, tonic_index, mode_name).found_numeral
+        if numeral:
+            numerals.append(numeral)
+    return numerals
+
+
+def get_shingles(numerals: Sequence[str], size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    """N-grammes de chiffrages consécutifs (la progression entière si elle est plus courte)."""
+    if not numerals:
+        return frozenset()
+    if len(numerals) <= size:
+        return frozenset({"|".join(numerals)})
+    return frozenset("|".join(numerals[i : i + size]) for i in range(len(numerals) - size + 1))
+
+
+@lru_cache(maxsize=65536)
+def _hash_shingle(shingle: str) -> Tuple[int, ...]:
+    """
+    Les `NUM_PERMUTATIONS` valeurs de hachage d'un n-gramme, tirées d'un seul appel
+    SHAKE-128 (une fonction de hachage indépendante par tranche de 4 octets). Stable
+    entre processus, contrairement à hash(), et mis en cache : le vocabulaire des
+    n-grammes de chiffrages est restreint.
+    """
+    digest = hashlib.shake_128(shingle.encode()).digest(4 * NUM_PERMUTATIONS)
+    return struct.unpack(_SHINGLE_HASH_FORMAT, digest)
+
+
+def get_minhash(shingles: FrozenSet[str]) -> List[int]:
+    """Signature MinHash : pour chaque fonction de hachage, la plus petite valeur des n-grammes."""
+    if not shingles:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    return list(map(min, zip(*(_hash_shingle(shingle) for shingle in shingles))))
+
+
+class LibraryFullError(Exception):
+    """La bibliothèque a atteint sa taille maximale : la progression n'est pas ajoutée."""
+
+
+class ProgressionIndex:
+    """
+    Bibliothèque de progressions analysées, indexée par MinHash/LSH sur les n-grammes
+    de leurs chiffrages romains.
+
+    Chaque signature est découpée en `BANDS` bandes ; une requête ne compare sa
+    signature qu'aux progressions partageant au moins une bande (mêmes valeurs), puis
+    classe ces candidates par similarité de Jaccard estimée. Le coût d'une requête
+    dépend du nombre de candidates, pas de la taille de la bibliothèque.
+
+    Les signatures sont stockées à la suite dans un seul `array` (4 octets par valeur)
+    pour tenir des centaines de milliers de progressions en mémoire. Au-delà de
+    `max_size` progressions, les ajouts sont refusés (`LibraryFullError`).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._signatures = array("I")
+        self._buckets: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        """Nombre de progressions indexées."""
+        return len(self._ids)
+
+    @staticmethod
+    def _band_keys(signature: Sequence[int]) -> List[int]:
+        return [
+            hash((band, tuple(signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND])))
+            for band in range(BANDS)
+        ]
+
+    def _insert(
+        self, progression_id: str, entry: Dict[str, Any], signature: Optional[List[int]] = None
+    ) -> List[int]:
+        # Appelé avec self._lock acquis
+        if signature is None or len(signature) != NUM_PERMUTATIONS:
+            signature = get_minhash(get_shingles(entry["numerals"]))
+        # Conversion avant toute modification : une signature invalide ne laisse pas l'index
+        # à moitié mis à jour
+        band_keys = self._band_keys(signature)
+        values = array("I", signature)
+        position = len(self._ids)
+        self._ids.append(progression_id)
+        self._entries.append(entry)
+        self._signatures.extend(values)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(position)
+        return signature
+
+    def add(self, progression_id: str, numerals: List[str], **metadata: Any) -> None:
+        """
+        Indexe une progression ; elle est aussi ajoutée au fichier de la bibliothèque s'il y en a un.
+        Une progression sans chiffrage est refusée (ValueError) : sa signature vide coïnciderait
+        avec celle de toutes les autres progressions sans chiffrage.
+        """
+        if not numerals:
+            raise ValueError("La progression ne contient aucun accord reconnu.")
+        entry = {"numerals": numerals, **metadata}
+        with self._lock:
+            if len(self._ids) >= self.max_size:
+                raise LibraryFullError(
+                    f"La bibliothèque est pleine ({self.max_size} progressions)."
+                )
+            signature = self._insert(progression_id, entry)
+            if self.path:
+                # La signature est enregistrée pour ne pas être recalculée au chargement
+                line = {"id": progression_id, **entry, "signature": signature}
+                with open(self.path, "a", encoding="utf-8") as library_file:
+                    library_file.write(json.dumps(line) + "\n")
+
+    def load(self) -> int:
+        """
+        Charge le fichier de la bibliothèque (JSON Lines) et retourne le nombre de progressions.
+        Les lignes illisibles sont ignorées (et signalées) ; le chargement s'arrête à `max_size`.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with self._lock, open(self.path, encoding="utf-8") as library_file:
+            count = 0
+            for line_number, line in enumerate(library_file, start=1):
+                if not line.strip():
+                    continue
+                if len(self._ids) >= self.max_size:
+                    print(f"Bibliothèque pleine ({self.max_size}) : fin de {self.path} ignorée")
+                    break
+                try:
+                    entry = json.loads(line)
+                    progression_id = entry.pop("id")
+                    signature = entry.pop("signature", None)
+                    if not entry.get("numerals"):
+                        continue
+                    self._insert(progression_id, entry, signature)
+                except (ValueError, KeyError, TypeError, AttributeError, OverflowError) as e:
+                    print(f"Ligne {line_number} de {self.path} ignorée : {e!r}")
+                    continue
+                count += 1
+        return count
+
+    def query(
+        self, numerals: List[str], top_k: int = 10, min_similarity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Retourne les `top_k` progressions les plus proches, par similarité estimée décroissante."""
+        if not numerals:
+            return []
+        signature = get_minhash(get_shingles(numerals))
+        shared_bands: Counter[int] = Counter()
+        # Seaux lus sous le verrou : `add` peut les modifier en même temps. Les positions
+        # obtenues restent valides ensuite, les progressions n'étant jamais retirées.
+        with self._lock:
+            for key in self._band_keys(signature):
+                shared_bands.update(self._buckets.get(key, ()))
+
+        scored = []
+        for position, _ in shared_bands.most_common(MAX_CANDIDATES):
+            offset = position * NUM_PERMUTATIONS
+            stored = self._signatures[offset : offset + NUM_PERMUTATIONS]
+            matches = sum(1 for a, b in zip(signature, stored) if a == b)
+            similarity = matches / NUM_PERMUTATIONS
+            if similarity >= min_similarity:
+                scored.append((similarity, position))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            {"id": self._ids[position], "similarity": similarity, **self._entries[position]}
+            for similarity, position in scored[:top_k]
+        ]
+
+
+progression_library = ProgressionIndex(
+    os.getenv("PROGRESSION_LIBRARY_PATH"),
+    int(os.getenv("PROGRESSION_LIBRARY_MAX_SIZE", DEFAULT_MAX_SIZE)),
+)
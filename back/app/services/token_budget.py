@@ -0,0 +1,126 @@
+import math
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional
+
+# Estimation hors ligne (sans appel à `count_tokens`) : ~4 caractères par token
+CHARS_PER_TOKEN = 4
+BUDGET_POLICIES = ("reject", "truncate")
+
+
+class TokenBudgetExceededError(Exception):
+    """La progression dépasse le budget de tokens par requête (politique "reject")."""
+
+    def __init__(self, estimated_tokens: int, budget: int) -> None:
+        super().__init__(
+            f"Progression trop longue : ~{estimated_tokens} tokens estimés pour un budget "
+            f"de {budget} par requête."
+        )
+        self.estimated_tokens = estimated_tokens
+        self.budget = budget
+
+
+@dataclass
+class TokenUsage:
+    """Tokens consommés par les appels au LLM d'une requête (tous threads confondus)."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Ajoute la consommation d'un appel."""
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.calls += 1
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens du prompt et de la réponse."""
+        return self.prompt_tokens + self.completion_tokens
+
+
+# Consommation de la requête en cours ; les pools de threads (fenêtres, couverture)
+# propagent le contexte pour que leurs appels soient comptés dans la même requête
+_request_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """Comptabilise les tokens des appels au LLM effectués dans le bloc."""
+    usage = TokenUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def add_token_usage(response: Any) -> None:
+    """Ajoute les tokens d'une réponse Gemini (`usage_metadata`) à la requête en cours."""
+    usage = _request_usage.get()
+    metadata = getattr(response, "usage_metadata", None)
+    if usage is None or metadata is None:
+        return
+    usage.add(
+        getattr(metadata, "prompt_token_count", 0) or 0,
+        getattr(metadata, "candidates_token_count", 0) or 0,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_token_budget() -> Optional[int]:
+    """Budget de tokens de prompt estimés par requête (`LLM_TOKEN_BUDGET`), None sans limite."""
+    budget = os.getenv("LLM_TOKEN_BUDGET")
+    return int(budget) if budget else None
+
+
+def get_budget_policy() -> str:
+    """Au-delà du budget : "reject" (413) ou "truncate" (`LLM_TOKEN_BUDGET_POLICY`)."""
+    policy = os.getenv("LLM_TOKEN_BUDGET_POLICY", "reject")
+    if policy not in BUDGET_POLICIES:
+        raise ValueError(f"Politique de budget inconnue : '{policy}'")
+    return policy
+
+
+def fit_to_budget(
+    progression: List[str],
+    estimate: Callable[[List[str]], int],
+    budget: Optional[int] = None,
+    policy: Optional[str] = None,
+) -> int:
+    """
+    Nombre d'accords de la progression à envoyer au LLM pour respecter le budget.
+
+    Sans budget ou sous le budget : toute la progression. Au-delà : lève
+    `TokenBudgetExceededError` (politique "reject") ou retourne le plus long début de
+    progression dont l'estimation tient dans le budget (politique "truncate").
+    """
+    budget = get_token_budget() if budget is None else budget
+    if budget is None:
+        return len(progression)
+    estimated = estimate(progression)
+    if estimated <= budget:
+        return len(progression)
+    if (policy or get_budget_policy()) == "reject":
+        raise TokenBudgetExceededError(estimated, budget)
+
+    # Recherche dichotomique : l'estimation croît avec le nombre d'accords
+    low, high = 0, len(progression) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate(progression[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low == 0:
+        raise TokenBudgetExceededError(estimated, budget)
+    return low
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.services.llm_limiter import LLMOverloadedError, llm_limiters
+from app.services.metrics import record_llm_fallback
+from app.services.token_budget import fit_to_budget
+from app.services.windowed_analysis import detect_by_windows, get_windows
+from app.utils.local_mode_detection import detect_tonic_and_mode_locally
+from app.utils.mode_detection_gemini import (
+    LLM_CALLS_PER_STYLE,
+    detect_tonic_and_mode,
+    estimate_prompt_tokens,
+    get_prompt_style,
+)
+
+
+class LLMAnalysisError(Exception):
+    """Le LLM a répondu, mais sans analyse exploitable (tonique "Error")."""
+
+
+class AnalysisCache:
+    """
+    Dernières analyses LLM réussies par progression et par modèle (LRU), servies quand
+    Gemini est indisponible : le repli d'un modèle ne sert jamais l'analyse d'un autre.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, progression: List[str], model: str) -> Optional[Dict[str, Any]]:
+        """Analyse en cache de la progression par ce modèle, ou None."""
+        key = (model, tuple(progression))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, progression: List[str], model: str, analysis: Dict[str, Any]) -> None:
+        """Mémorise une analyse réussie."""
+        key = (model, tuple(progression))
+        with self._lock:
+            self._entries[key] = analysis
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+analysis_cache = AnalysisCache()
+
+
+def is_failed_analysis(analysis: Dict[str, Any]) -> bool:
+    return analysis.get("global_analysis", {}).get("tonic") == "Error"
+
+
+def is_local_analysis(analysis: Dict[str, Any]) -> bool:
+    """Indique une analyse de repli locale, moins fiable : elle ne doit pas être mise en cache."""
+    return analysis.get("source") == "local"
+
+
+def estimate_request_tokens(progression: List[str]) -> int:
+    """Tokens de prompt estimés pour analyser la progression, toutes fenêtres comprises."""
+    return sum(
+        estimate_prompt_tokens(progression[start : end + 1])
+        for start, end in get_windows(len(progression))
+    )
+
+
+def extend_analysis(analysis: Dict[str, Any], length: int) -> Dict[str, Any]:
+    """Étend le dernier segment d'une analyse tronquée jusqu'au dernier accord."""
+    last_segment = analysis["harmonic_segments"][-1]
+    global_analysis = analysis["global_analysis"]
+    explanation = (
+        f"{global_analysis.get('explanation', '')} "
+        f"(analyse limitée aux {last_segment['end_index'] + 1} premiers accords)"
+    )
+    return {
+        **analysis,
+        "global_analysis": {**global_analysis, "explanation": explanation},
+        "harmonic_segments": [
+            *analysis["harmonic_segments"][:-1],
+            {**last_segment, "end_index": length - 1},
+        ],
+    }
+
+
+def detect_with_fallback(progression: List[str], model: str) -> Dict[str, Any]:
+    """
+    `detect_tonic_and_mode` protégé par le limiteur et le disjoncteur du modèle.
+
+    Si le disjoncteur est ouvert, si l'appel échoue ou si le LLM ne renvoie pas
+    d'analyse exploitable, la réponse vient du cache des analyses réussies, sinon
+    de la détection locale : la requête n'attend pas un Gemini dégradé et le pipeline
+    ne reçoit jamais la tonique "Error". Seul le refus du limiteur (429) est propagé.
+    Les longues progressions sont analysées par fenêtres parallèles (`detect_by_windows`).
+
+    Au-delà du budget de tokens (`LLM_TOKEN_BUDGET`), la requête est refusée
+    (`TokenBudgetExceededError`) ou seul le début de la progression est envoyé au LLM,
+    le dernier segment étant prolongé jusqu'au dernier accord.
+    """
+    analyzed_length = fit_to_budget(progression, estimate_request_tokens)
+    breaker = circuit_breakers.get(model)
+    try:
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Circuit '{model}' ouvert : appel non tenté.")
+        # Les longues progressions sont analysées par fenêtres (une analyse chacune) ; les
+        # appels imprévus (doublement, formatage de secours) sont décomptés au fil de l'eau
+        windows = get_windows(analyzed_length)
+        calls = LLM_CALLS_PER_STYLE[get_prompt_style()] * len(windows)
+        try:
+            with llm_limiters.get(model).acquire(calls):
+                # Seul l'appel au LLM est chronométré, pas l'attente dans le limiteur
+                start = time.perf_counter()
+                try:
+                    analysis = detect_by_windows(
+                        progression[:analyzed_length], model, detect_tonic_and_mode, windows
+                    )
+                    if is_failed_analysis(analysis):
+                        raise LLMAnalysisError(analysis["global_analysis"]["explanation"])
+                    if analyzed_length < len(progression):
+                        analysis = extend_analysis(analysis, len(progression))
+                except Exception:
+                    breaker.record_failure()
+                    raise
+                breaker.record_success(time.perf_counter() - start)
+        except LLMOverloadedError:
+            breaker.release_probe()
+            raise
+    except LLMOverloadedError:
+        raise
+    except Exception as e:
+        print(f"Analyse LLM indisponible pour '{model}', utilisation d'un repli : {e}")
+        cached = analysis_cache.get(progression, model)
+        if cached is not None:
+            record_llm_fallback(model, "cache")
+            return cached
+        record_llm_fallback(model, "local")
+        return detect_tonic_and_mode_locally(progression)
+
+    analysis_cache.put(progression, model, analysis)
+    return analysis
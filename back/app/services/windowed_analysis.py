@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.analysis_repair import get_dominant_segment, get_key, link_segments
+
+# Au-delà de `window_size` accords, la progression est analysée par fenêtres qui se
+# chevauchent de `overlap` accords : la latence dépend de la taille d'une fenêtre et
+# plus de la longueur du morceau
+DEFAULT_WINDOW_SIZE = 32
+DEFAULT_WINDOW_OVERLAP = 8
+
+Detector = Callable[[List[str], str], Dict[str, Any]]
+
+# Threads dédiés aux fenêtres analysées en parallèle
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-window")
+
+
+def get_window_config() -> Tuple[int, int]:
+    """Taille et chevauchement des fenêtres (`LLM_WINDOW_SIZE`, `LLM_WINDOW_OVERLAP`)."""
+    size = int(os.getenv("LLM_WINDOW_SIZE", DEFAULT_WINDOW_SIZE))
+    overlap = int(os.getenv("LLM_WINDOW_OVERLAP", DEFAULT_WINDOW_OVERLAP))
+    return size, min(overlap, size - 1)
+
+
+def get_windows(
+    length: int, size: Optional[int] = None, overlap: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Fenêtres (début, fin incluse) couvrant `length` accords, la dernière calée sur la fin."""
+    default_size, default_overlap = get_window_config()
+    size = size or default_size
+    overlap = default_overlap if overlap is None else overlap
+    if length <= size:
+        return [(0, length - 1)]
+    step = size - overlap
+    starts = list(range(0, length - size + 1, step))
+    if starts[-1] + size < length:
+        starts.append(length - size)
+    return [(start, start + size - 1) for start in starts]
+
+
+def stitch_segments(
+    windows: List[Tuple[int, int]], results: List[Dict[str, Any]], length: int
+) -> List[Dict[str, Any]]:
+    """
+    Recolle les `harmonic_segments` des fenêtres en une segmentation de toute la progression.
+
+    Chaque fenêtre fait autorité jusqu'au milieu de son chevauchement avec la suivante
+    (les accords en bord de fenêtre, analysés avec moins de contexte, sont ainsi attribués
+    à la fenêtre qui les voit au centre). Les segments sont ramenés aux indices globaux et
+    rognés à cette zone, les trous comblés par le segment précédent, puis les segments
+    adjacents de même centre tonal (un segment coupé par un bord de fenêtre) fusionnés.
+    """
+    segments: List[Dict[str, Any]] = []
+    for k, ((start, end), result) in enumerate(zip(windows, results)):
+        own_start = 0 if k == 0 else (windows[k - 1][1] + start) // 2 + 1
+        own_end = length - 1 if k == len(windows) - 1 else (end + windows[k + 1][0]) // 2
+        for segment in result.get("harmonic_segments", []):
+            segment_start = max(own_start, start + int(segment["start_index"]))
+            segment_end = min(own_end, start + int(segment["end_index"]))
+            if segment_start <= segment_end:
+                segments.append({**segment, "start_index": segment_start, "end_index": segment_end})
+
+    return link_segments(segments, length, merge_same_key=True)
+
+
+def get_global_analysis(
+    segments: List[Dict[str, Any]], results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Tonalité globale : le centre tonal qui couvre le plus d'accords."""
+    best_segment = get_dominant_segment(segments)
+    if best_segment is None:
+        return results[0]["global_analysis"]
+    best_key = get_key(best_segment)
+    explanation = next(
+        (
+            result["global_analysis"].get("explanation", "")
+            for result in results
+            if get_key(result["global_analysis"]) == best_key
+        ),
+        best_segment.get("explanation", ""),
+    )
+    return {"tonic": best_segment["tonic"], "mode": best_key[1], "explanation": explanation}
+
+
+def detect_by_windows(
+    progression: List[str],
+    model: str,
+    detect: Detector,
+    windows: Optional[List[Tuple[int, int]]] = None,
+) -> Dict[str, Any]:
+    """
+    Analyse la progression avec `detect` (au format de `detect_tonic_and_mode`), fenêtre
+    par fenêtre et en parallèle si elle est longue. Si une fenêtre échoue, son erreur (ou
+    son analyse "Error") est renvoyée telle quelle : l'appelant applique son repli.
+    """
+    windows = windows or get_windows(len(progression))
+    if len(windows) == 1:
+        return detect(progression, model)
+
+    # Le contexte est propagé (tokens comptés dans la requête en cours)
+    futures = [
+        _executor.submit(copy_context().run, detect, progression[start : end + 1], model)
+        for start, end in windows
+    ]
+    results = [future.result() for future in futures]
+    for result in results:
+        if result.get("global_analysis", {}).get("tonic") == "Error":
+            return result
+
+    segments = stitch_segments(windows, results, len(progression))
+    return {
+        "global_analysis": get_global_analysis(segments, results),
+        "harmonic_segments": segments,
+    }
@@ -0,0 +1,277 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.chord_validation import SUPPORTED_ROOTS
+from app.utils.common import get_note_from_index, get_note_index
+from constants import MODES_DATA
+
+_TONIC_PATTERN = re.compile(r"^([A-Ga-g])([#b♯♭]*)")
+
+# Noms de modes courants renvoyés par le LLM au lieu des clés de `MODES_DATA`
+MODE_ALIASES = {
+    "major": "Ionian",
+    "minor": "Aeolian",
+    "natural minor": "Aeolian",
+    "harmonic": "Harmonic Minor",
+    "melodic": "Melodic Minor",
+    "jazz minor": "Melodic Minor",
+    "altered": "Altered Scale",
+    "super locrian": "Altered Scale",
+    "superlocrian": "Altered Scale",
+    "ultralocrian": "Super Locrian bb7",
+    "spanish phrygian": "Phrygian Dominant",
+    "phrygian major": "Phrygian Dominant",
+    "acoustic": "Lydian Dominant",
+    "overtone": "Lydian Dominant",
+    "lydian b7": "Lydian Dominant",
+    "aeolian dominant": "Mixolydian b6",
+    "hindu": "Mixolydian b6",
+    "half diminished": "Locrian ♮2",
+    "lydian augmented": "Lydian #5",
+    "dorian b9": "Dorian b2",
+    "phrygian #6": "Dorian b2",
+    "ukrainian dorian": "Dorian #4",
+    "romanian minor": "Dorian #4",
+    "locrian #2": "Locrian ♮2",
+    "locrian #6": "Locrian ♮6",
+}
+
+
+def _mode_key(name: str) -> str:
+    key = name.strip().lower().replace("♮", "nat ").replace("natural", "nat ")
+    key = re.sub(r"[\s_\-]+", " ", key).strip()
+    return re.sub(r" (mode|scale)$", "", key)
+
+
+_MODES_BY_KEY = {
+    **{_mode_key(alias): mode_name for alias, mode_name in MODE_ALIASES.items()},
+    **{_mode_key(mode_name): mode_name for mode_name in MODES_DATA},
+}
+
+
+def normalize_mode(value: Any) -> str:
+    """Clé de `MODES_DATA` correspondant au mode (casse et alias tolérés), sinon ValueError."""
+    mode_name = _MODES_BY_KEY.get(_mode_key(str(value)))
+    if mode_name is None:
+        raise ValueError(f"Mode inconnu : '{value}'")
+    return mode_name
+
+
+def normalize_tonic(value: Any) -> str:
+    """
+    Tonique écrite comme un nom de note connu ("Ebb" -> "D", "f#" -> "F#", "A minor" -> "A").
+
+    Les toniques déjà valides gardent leur orthographe ; les doubles altérations sont
+    résolues à partir de `get_note_index`. Lève une ValueError si aucune note n'est lue.
+    """
+    tonic = str(value).strip()
+    if tonic in SUPPORTED_ROOTS:
+        return tonic
+    match = _TONIC_PATTERN.match(tonic)
+    if match is None:
+        raise ValueError(f"Tonique non reconnue : '{value}'")
+    letter = match.group(1).upper()
+    accidentals = match.group(2).replace("♯", "#").replace("♭", "b")
+    if len(accidentals) <= 1 and f"{letter}{accidentals}" in SUPPORTED_ROOTS:
+        return f"{letter}{accidentals}"
+    offset = accidentals.count("#") - accidentals.count("b")
+    return get_note_from_index(get_note_index(letter) + offset)
+
+
+def get_key(segment: Dict[str, Any]) -> Tuple[int, str]:
+    """Centre tonal d'un segment (indice de la tonique, mode), quelle que soit l'orthographe."""
+    return get_note_index(segment["tonic"]), segment["mode"]
+
+
+def get_dominant_segment(segments: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Premier segment du centre tonal qui couvre le plus d'accords (None sans segment)."""
+    coverage: Dict[Tuple[int, str], int] = {}
+    for segment in segments:
+        key = get_key(segment)
+        coverage[key] = coverage.get(key, 0) + segment["end_index"] - segment["start_index"] + 1
+    if not coverage:
+        return None
+    best_key = max(coverage, key=coverage.__getitem__)
+    return next(segment for segment in segments if get_key(segment) == best_key)
+
+
+def link_segments(
+    segments: List[Dict[str, Any]], length: int, merge_same_key: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Rend une liste de segments contigus couvrant les accords 0 à `length - 1`.
+
+    Les segments sont triés par début ; en cas de chevauchement, le segment précédent est
+    prioritaire, un trou est comblé en prolongeant le segment précédent. Avec
+    `merge_same_key`, les segments adjacents de même centre tonal sont fusionnés.
+    """
+    segments = sorted(segments, key=lambda segment: segment["start_index"])
+    linked: List[Dict[str, Any]] = []
+    for segment in segments:
+        if linked:
+            previous = linked[-1]
+            segment["start_index"] = max(segment["start_index"], previous["end_index"] + 1)
+            if segment["start_index"] > segment["end_index"]:
+                continue
+            previous["end_index"] = segment["start_index"] - 1
+            if merge_same_key and get_key(previous) == get_key(segment):
+                previous["end_index"] = segment["end_index"]
+                continue
+        linked.append(segment)
+
+    if linked:
+        linked[0]["start_index"] = 0
+        linked[-1]["end_index"] = length - 1
+    return linked
+
+
+def _to_index(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"Indice invalide : {value!r}")
+    return int(float(value))
+
+
+def _repair_segment(segment: Any, length: int) -> Optional[Dict[str, Any]]:
+    """Segment aux indices bornés, tonique et mode normalisés, ou None s'il est inutilisable."""
+    if not isinstance(segment, dict):
+        return None
+    try:
+        start = _to_index(segment["start_index"])
+        end = _to_index(segment["end_index"])
+        tonic = normalize_tonic(segment["tonic"])
+        mode = normalize_mode(segment["mode"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    start, end = sorted((start, end))
+    start, end = max(start, 0), min(end, length - 1)
+    if start > end:
+        return None
+    return {
+        **segment,
+        "start_index": start,
+        "end_index": end,
+        "tonic": tonic,
+        "mode": mode,
+        "explanation": str(segment.get("explanation") or ""),
+    }
+
+
+def _repair_global_analysis(
+    global_analysis: Any, segments: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Tonalité globale normalisée, sinon le centre tonal qui couvre le plus d'accords."""
+    explanation = ""
+    if isinstance(global_analysis, dict):
+        explanation = str(global_analysis.get("explanation") or "")
+        try:
+            return {
+                **global_analysis,
+                "tonic": normalize_tonic(global_analysis["tonic"]),
+                "mode": normalize_mode(global_analysis["mode"]),
+                "explanation": explanation,
+            }
+        except (KeyError, ValueError):
+            pass
+    best_segment = get_dominant_segment(segments)
+    if best_segment is None:
+        return None
+    return {
+        "tonic": best_segment["tonic"],
+        "mode": best_segment["mode"],
+        "explanation": explanation or best_segment["explanation"],
+    }
+
+
+def find_analysis_issues(analysis: Any, length: int) -> List[str]:
+    """
+    Écarts d'une analyse du LLM au format attendu par `analyze_progression_segments`
+    (liste vide si l'analyse est utilisable telle quelle).
+    """
+    if not isinstance(analysis, dict):
+        return ["analyse absente"]
+    issues = []
+    global_analysis = analysis.get("global_analysis")
+    if not isinstance(global_analysis, dict):
+        issues.append("global_analysis absente")
+    else:
+        if global_analysis.get("tonic") not in SUPPORTED_ROOTS:
+            issues.append(f"tonique globale invalide : {global_analysis.get('tonic')!r}")
+        if global_analysis.get("mode") not in MODES_DATA:
+            issues.append(f"mode global invalide : {global_analysis.get('mode')!r}")
+
+    segments = analysis.get("harmonic_segments")
+    if not isinstance(segments, list) or not segments:
+        return [*issues, "harmonic_segments absents"]
+    expected_start = 0
+    for index, segment in enumerate(segments):
+        if not isinstance(segment, dict):
+            issues.append(f"segment {index} invalide")
+            continue
+        if segment.get("tonic") not in SUPPORTED_ROOTS:
+            issues.append(f"segment {index} : tonique invalide {segment.get('tonic')!r}")
+        if segment.get("mode") not in MODES_DATA:
+            issues.append(f"segment {index} : mode invalide {segment.get('mode')!r}")
+        if not isinstance(segment.get("explanation"), str):
+            issues.append(f"segment {index} : explication absente")
+        start, end = segment.get("start_index"), segment.get("end_index")
+        if not isinstance(start, int) or not isinstance(end, int) or start > end:
+            issues.append(f"segment {index} : indices invalides ({start!r}, {end!r})")
+            continue
+        if start != expected_start:
+            issues.append(f"segment {index} : commence à {start} au lieu de {expected_start}")
+        expected_start = end + 1
+    if expected_start != length:
+        issues.append(f"segments terminés à {expected_start - 1} au lieu de {length - 1}")
+    return issues
+
+
+def repair_analysis(analysis: Any, length: int) -> Dict[str, Any]:
+    """
+    Corrige localement une analyse du LLM pour une progression de `length` accords.
+
+    Une analyse valide est renvoyée telle quelle. Sinon : indices convertis, bornés et
+    remis dans l'ordre, trous et chevauchements résolus (`link_segments`), modes ramenés
+    aux clés de `MODES_DATA` (`MODE_ALIASES`), toniques normalisées ; les segments
+    inutilisables sont écartés. Si rien n'est récupérable, une analyse "Error" est
+    renvoyée pour que l'appelant applique son repli.
+    """
+    if not find_analysis_issues(analysis, length):
+        return analysis
+    if not isinstance(analysis, dict):
+        analysis = {}
+    raw_global = analysis.get("global_analysis")
+    # Échec déjà signalé (formatage JSON impossible) : rien à réparer
+    if isinstance(raw_global, dict) and raw_global.get("tonic") == "Error":
+        return analysis
+
+    raw_segments = analysis.get("harmonic_segments")
+    if not isinstance(raw_segments, list):
+        raw_segments = []
+    segments = [
+        repaired
+        for repaired in (_repair_segment(segment, length) for segment in raw_segments)
+        if repaired is not None
+    ]
+    segments = link_segments(segments, length)
+    global_analysis = _repair_global_analysis(raw_global, segments)
+    if global_analysis is None:
+        return {
+            "global_analysis": {
+                "tonic": "Error",
+                "mode": "Error",
+                "explanation": "Analyse du LLM irréparable : "
+                + "; ".join(find_analysis_issues(analysis, length)),
+            },
+            "harmonic_segments": [],
+        }
+    if not segments:
+        segments = [
+            {
+                "start_index": 0,
+                "end_index": length - 1,
+                "tonic": global_analysis["tonic"],
+                "mode": global_analysis["mode"],
+                "explanation": global_analysis["explanation"],
+            }
+        ]
+    return {**analysis, "global_analysis": global_analysis, "harmonic_segments": segments}
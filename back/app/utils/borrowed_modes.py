@@ -136,22 +136,14 @@ def get_notes_from_chord(chord_name: str) -> Optional[Set[str]]:
     # 2. Extraire la qualité (tout ce qui n'est pas la fondamentale)
     quality_str = chord_name[len(root_name) :]
 
-    # 3. Trouver la meilleure correspondance pour la qualité dans le dictionnaire INTERVALS
-    # On trie les clés par longueur décroissante pour trouver la correspondance la plus spécifique
-    # (ex: "maj7" sera trouvé avant "maj" ou "7")
-    best_match_quality = ""
-    for quality in sorted(INTERVALS.keys(), key=lambda k: len(str(k)), reverse=True):
-        if quality_str == quality:
-            best_match_quality = str(quality)
-            break
-
-    if best_match_quality == "" and quality_str != "":
-        # Si aucune correspondance exacte n'est trouvée pour une qualité non vide
+    # 3. La qualité doit correspondre exactement à une entrée du dictionnaire INTERVALS
+    # (recherche directe dans le dictionnaire plutôt qu'un parcours des clés triées)
+    final_intervals = INTERVALS.get(quality_str)
+    if final_intervals is None:
         return None
 
     # 4. Construire le set de notes
     root_index = NOTE_TO_INDEX[root_name]
-    final_intervals = INTERVALS[best_match_quality]
 
     # On utilise un set de notes normalisées (sans octave)
     chord_notes = {NOTES[(root_index + i) % 12] for i in final_intervals}
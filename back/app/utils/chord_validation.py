@@ -0,0 +1,126 @@
+from difflib import get_close_matches
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.schema import ChordItem
+from app.utils.borrowed_modes import INTERVALS
+from app.utils.common import CHORD_FORMULAS, get_note_from_index, parse_chord
+from constants import CORE_QUALITIES, NOTE_INDEX_MAP
+
+# Noms de notes tels qu'on les écrit (C#, Db... mais pas les clés en majuscules "DB")
+NOTE_NAMES = [note for note in NOTE_INDEX_MAP if len(note) == 1 or note[1] in "#b"]
+# Fondamentales réellement acceptées par `parse_chord` (E#, par exemple, ne l'est pas)
+SUPPORTED_ROOTS = [note for note in NOTE_NAMES if parse_chord(note) is not None]
+# Toutes les qualités connues du backend (et proposées par l'éditeur d'accords)
+KNOWN_QUALITIES = list(
+    dict.fromkeys([*CORE_QUALITIES, *CHORD_FORMULAS, *(q for q in INTERVALS if isinstance(q, str))])
+)
+KNOWN_QUALITIES_SET = frozenset(KNOWN_QUALITIES)
+# Notation allemande : H = si
+_ROOT_ALIASES = {"H": "B"}
+MAX_SUGGESTIONS = 3
+
+
+class InvalidProgressionError(Exception):
+    """Des accords ne peuvent pas être analysés : `errors` les détaille (index, suggestions)."""
+
+    def __init__(self, errors: List[Dict[str, Any]]) -> None:
+        chords = ", ".join(f"'{error['chord']}'" for error in errors)
+        super().__init__(f"Accord(s) non reconnu(s) : {chords}")
+        self.errors = errors
+
+
+def _get_enharmonic(root: str) -> str:
+    """Orthographe acceptée par `parse_chord` d'une note (ex: E# -> F)."""
+    return get_note_from_index(NOTE_INDEX_MAP[root])
+
+
+def _suggest_roots(root: str) -> List[str]:
+    root = _ROOT_ALIASES.get(root.capitalize(), root.capitalize())
+    if root in SUPPORTED_ROOTS:
+        return [root]
+    if root in NOTE_NAMES:
+        return [_get_enharmonic(root)]
+    return get_close_matches(root, SUPPORTED_ROOTS, n=MAX_SUGGESTIONS, cutoff=0.5)
+
+
+def _suggest_qualities(quality: str) -> List[str]:
+    return get_close_matches(quality, KNOWN_QUALITIES, n=MAX_SUGGESTIONS, cutoff=0.6)
+
+
+@lru_cache(maxsize=4096)
+def check_chord(root: str, quality: str) -> Optional[Dict[str, Any]]:
+    """
+    Vérifie qu'un accord est compris par le backend, sans appel réseau.
+
+    Retourne None si l'accord est reconnu, sinon `{"severity", "reason", "suggestions"}` :
+    - "error" : fondamentale ou qualité inconnue, ou accord rejeté par `parse_chord` (une
+      fondamentale non prise en charge, comme E#, est suggérée sous son enharmonique) ;
+    - "warning" : qualité connue mais lue autrement par `parse_chord` (ex: "7(no5)"),
+      l'accord sera analysé comme `parsed`.
+    """
+    root, quality = root.strip(), quality.strip()
+    quality_is_known = quality in KNOWN_QUALITIES_SET
+    qualities = [quality] if quality_is_known else _suggest_qualities(quality) or [""]
+    if root not in SUPPORTED_ROOTS:
+        reason = (
+            f"Fondamentale non prise en charge : '{root}'"
+            if root in NOTE_NAMES
+            else f"Fondamentale non reconnue : '{root}'"
+        )
+        return {
+            "severity": "error",
+            "reason": reason,
+            "suggestions": [
+                f"{suggested_root}{suggested_quality}"
+                for suggested_root in _suggest_roots(root)
+                for suggested_quality in qualities
+            ][:MAX_SUGGESTIONS],
+        }
+
+    parsed_chord = parse_chord(f"{root}{quality}")
+    if quality_is_known and parsed_chord is None:
+        # Qualité connue : c'est l'écriture de la fondamentale qui n'est pas comprise
+        return {
+            "severity": "error",
+            "reason": f"Fondamentale non prise en charge : '{root}'",
+            "suggestions": [f"{_get_enharmonic(root)}{quality}"],
+        }
+    if not quality_is_known or parsed_chord is None:
+        return {
+            "severity": "error",
+            "reason": f"Qualité non reconnue : '{quality}'",
+            "suggestions": [f"{root}{suggested}" for suggested in _suggest_qualities(quality)],
+        }
+    _, parsed_quality, parsed_root = parsed_chord
+    if parsed_root != root:
+        parsed = f"{root}{parsed_quality}"
+        return {
+            "severity": "warning",
+            "reason": f"'{root}{quality}' sera analysé comme '{parsed}'",
+            "parsed": parsed,
+            "suggestions": [],
+        }
+    return None
+
+
+def validate_progression(progression_data: Sequence[ChordItem]) -> Dict[str, List[Dict[str, Any]]]:
+    """Erreurs (accords non analysables) et avertissements de chaque accord, par index."""
+    report: Dict[str, List[Dict[str, Any]]] = {"errors": [], "warnings": []}
+    for index, item in enumerate(progression_data):
+        issue = check_chord(item.root, item.quality)
+        if issue is None:
+            continue
+        severity = issue["severity"]
+        details = {key: value for key, value in issue.items() if key != "severity"}
+        report[f"{severity}s"].append(
+            {"index": index, "chord": f"{item.root}{item.quality}", **details}
+        )
+    return report
+
+
+def ensure_valid_progression(progression_data: Sequence[ChordItem]) -> None:
+    """Lève `InvalidProgressionError` avant tout appel au LLM si un accord est inanalysable."""
+    errors = validate_progression(progression_data)["errors"]
+    if errors:
+        raise InvalidProgressionError(errors)
@@ -1,3 +1,5 @@
+import sys
+from functools import lru_cache
 from typing import Any, Dict, NotRequired, Optional, TypedDict
 
 from app.utils.common import format_numeral, get_note_from_index, is_chord_diatonic, parse_chord
@@ -19,37 +21,145 @@ class QualityAnalysisItem(TypedDict):
     duration: NotRequired[int]
 
 
+def _intern(value: Optional[str]) -> Optional[str]:
+    return None if value is None else sys.intern(value)
+
+
+class ChordAnalysis:
+    """
+    Analyse d'un accord dans un contexte tonal (champs de `QualityAnalysisItem`).
+
+    Les instances renvoyées par `analyze_chord` sont partagées par toutes les requêtes :
+    elles ne doivent pas être modifiées. Le pipeline les manipule telles quelles et ne
+    les convertit en dict qu'à la construction de la réponse (`to_json`).
+    """
+
+    __slots__ = (
+        "chord",
+        "found_numeral",
+        "expected_numeral",
+        "found_quality",
+        "expected_quality",
+        "expected_chord_name",
+        "is_diatonic",
+        "_json",
+    )
+
+    FIELDS = __slots__[:-1]
+
+    def __init__(
+        self,
+        chord: str,
+        found_numeral: Optional[str] = None,
+        expected_numeral: Optional[str] = None,
+        found_quality: Optional[str] = None,
+        expected_quality: Optional[str] = None,
+        expected_chord_name: Optional[str] = None,
+        is_diatonic: Optional[bool] = None,
+    ) -> None:
+        self.chord = sys.intern(chord)
+        self.found_numeral = _intern(found_numeral)
+        self.expected_numeral = _intern(expected_numeral)
+        self.found_quality = _intern(found_quality)
+        self.expected_quality = _intern(expected_quality)
+        self.expected_chord_name = _intern(expected_chord_name)
+        self.is_diatonic = is_diatonic
+        self._json: Optional[QualityAnalysisItem] = None
+
+    def __getitem__(self, key: str) -> Any:
+        """Accès par clé, comme sur un `QualityAnalysisItem`."""
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __getstate__(self) -> tuple:
+        """État picklable (sans le dict mis en cache)."""
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def __setstate__(self, state: tuple) -> None:
+        """Restaure l'état produit par `__getstate__`."""
+        self.__init__(*state)  # type: ignore[misc]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Accès par clé avec valeur par défaut, comme sur un `QualityAnalysisItem`."""
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def as_dict(self) -> QualityAnalysisItem:
+        """Nouveau dict modifiable au format `QualityAnalysisItem`."""
+        return {
+            "chord": self.chord,
+            "found_numeral": self.found_numeral,
+            "expected_numeral": self.expected_numeral,
+            "found_quality": self.found_quality,
+            "expected_quality": self.expected_quality,
+            "expected_chord_name": self.expected_chord_name,
+            "is_diatonic": self.is_diatonic,
+        }
+
+    def to_json(self) -> QualityAnalysisItem:
+        """Dict de la réponse, construit une seule fois et partagé : à ne pas modifier."""
+        if self._json is None:
+            self._json = self.as_dict()
+        return self._json
+
+
+class AnalyzedChord:
+    """
+    Accord de la progression analysée : son analyse (partagée), le contexte de son
+    segment (partagé par les accords du segment) et l'accord d'origine pour les
+    propriétés de l'éditeur (id, renversement, durée, notes).
+    """
+
+    __slots__ = ("analysis", "segment_context", "item")
+
+    def __init__(
+        self, analysis: ChordAnalysis, segment_context: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.analysis = analysis
+        self.segment_context = segment_context
+        self.item: Any = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Accès par clé avec valeur par défaut, comme sur un `QualityAnalysisItem`."""
+        if key == "segment_context":
+            return default if self.segment_context is None else self.segment_context
+        return self.analysis.get(key, default)
+
+    def to_json(self) -> QualityAnalysisItem:
+        """Dict de la réponse, au format `QualityAnalysisItem`."""
+        data = self.analysis.as_dict()
+        if self.segment_context is not None:
+            data["segment_context"] = self.segment_context
+        if self.item is not None:
+            data["id"] = self.item.id
+            data["inversion"] = self.item.inversion
+            data["duration"] = self.item.duration
+            if getattr(self.item, "notes", None):
+                data["notes"] = self.item.notes
+        return data
+
+
 def analyze_chord_in_context(chord_name, tonic_index, mode_name) -> QualityAnalysisItem:
     """
     Analyse un accord dans un contexte tonal/modal, en gérant les accords
     diatoniques et les emprunts.
     """
+    return analyze_chord(chord_name, tonic_index, mode_name).as_dict()
+
+
+@lru_cache(maxsize=8192)
+def analyze_chord(chord_name: str, tonic_index: int, mode_name: str) -> ChordAnalysis:
+    """`analyze_chord_in_context` sous forme d'enregistrement partagé (mis en cache)."""
     parsed_chord = parse_chord(chord_name)
     if not parsed_chord:
-        return {
-            "chord": chord_name,
-            "found_numeral": None,
-            "expected_numeral": None,
-            "found_quality": None,
-            "expected_quality": None,
-            "expected_chord_name": None,
-            "is_diatonic": None,
-        }
+        return ChordAnalysis(chord_name)
 
     chord_index, found_quality, parsed_root = parsed_chord
     interval = (chord_index - tonic_index + 12) % 12
     base_numeral = CHROMATIC_DEGREES_MAP.get(interval)
 
     if not base_numeral:
-        return {
-            "chord": chord_name,
-            "found_numeral": None,
-            "expected_numeral": None,
-            "found_quality": None,
-            "expected_quality": None,
-            "expected_chord_name": None,
-            "is_diatonic": None,
-        }
+        return ChordAnalysis(chord_name)
 
     found_numeral = format_numeral(base_numeral, found_quality)
     is_diatonic_flag = is_chord_diatonic(chord_name, get_note_from_index(tonic_index), mode_name)
@@ -97,16 +207,16 @@ def analyze_chord_in_context(chord_name, tonic_index, mode_name) -> QualityAnaly
             expected_root_name = sharp_notes[expected_root_index]
         expected_chord_name = expected_root_name + expected_quality
 
-    return {
+    return ChordAnalysis(
         # Normalize displayed chord root according to the base numeral (so D# -> Eb when bIII)
-        "chord": (
+        chord=(
             (flat_notes[chord_index] if base_numeral.startswith("b") else sharp_notes[chord_index])
             + found_quality
         ),
-        "found_numeral": found_numeral,
-        "expected_numeral": expected_numeral,
-        "found_quality": found_quality,
-        "expected_quality": expected_quality,
-        "expected_chord_name": expected_chord_name,
-        "is_diatonic": is_diatonic_flag,
-    }
+        found_numeral=found_numeral,
+        expected_numeral=expected_numeral,
+        found_quality=found_quality,
+        expected_quality=expected_quality,
+        expected_chord_name=expected_chord_name,
+        is_diatonic=is_diatonic_flag,
+    )
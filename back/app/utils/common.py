@@ -1,13 +1,94 @@
 from constants import CORE_QUALITIES, MODES_DATA, NOTE_INDEX_MAP, NOTES
 
+# Tables dérivées des constantes, construites une seule fois à l'import du module
+_ENHARMONIC_NOTE_MAP = {
+    "DB": "C#",
+    "EB": "D#",
+    "FB": "E",
+    "GB": "F#",
+    "AB": "G#",
+    "BB": "A#",
+    "B#": "C",
+}
+
+# Qualités reconnues, de la plus longue à la plus courte (ex: "maj7" avant "7")
+_KNOWN_QUALITIES = sorted(CORE_QUALITIES.keys(), key=lambda q: -len(q))
+
+CHORD_FORMULAS = {
+    # --- Triades de base ---
+    "": [0, 4, 7],
+    "M": [0, 4, 7],
+    "maj": [0, 4, 7],
+    "m": [0, 3, 7],
+    "min": [0, 3, 7],
+    "dim": [0, 3, 6],
+    "d": [0, 3, 6],
+    "aug": [0, 4, 8],
+    "+": [0, 4, 8],
+    "5": [0, 7],
+    # --- Accords suspendus ---
+    "sus2": [0, 2, 7],
+    "sus4": [0, 5, 7],
+    "7sus2": [0, 2, 7, 10],
+    "7sus4": [0, 5, 7, 10],
+    "9sus4": [0, 5, 7, 10, 14],
+    "13sus4": [0, 5, 7, 10, 14, 21],
+    # --- Accords "add" ---
+    "add9": [0, 4, 7, 14],
+    "m(add9)": [0, 3, 7, 14],
+    # --- Accords de 6ème ---
+    "6": [0, 4, 7, 9],
+    "m6": [0, 3, 7, 9],
+    "6/9": [0, 4, 7, 9, 14],
+    # --- Accords de 7ème ---
+    "7": [0, 4, 7, 10],
+    "maj7": [0, 4, 7, 11],
+    "m7": [0, 3, 7, 10],
+    "dim7": [0, 3, 6, 9],
+    "m7b5": [0, 3, 6, 10],
+    "m(maj7)": [0, 3, 7, 11],
+    "maj7b5": [0, 4, 6, 11],
+    "maj7#5": [0, 4, 8, 11],
+    "maj7#11": [0, 4, 7, 11, 18],
+    # --- Accords de dominante altérés ---
+    "7b5": [0, 4, 6, 10],
+    "7#5": [0, 4, 8, 10],
+    "7b9": [0, 4, 7, 10, 13],
+    "7b13": [0, 4, 7, 10, 20],
+    "7#9": [0, 4, 7, 10, 15],
+    "7#11": [0, 4, 7, 10, 18],
+    "7alt": [0, 4, 10, 13, 18],  # Altéré générique : b9 et #11
+    "7b9b5": [0, 4, 6, 10, 13],
+    "7b9#5": [0, 4, 8, 10, 13],
+    "7#9b5": [0, 4, 6, 10, 15],
+    "7#9#5": [0, 4, 8, 10, 15],
+    "7b9#9": [0, 4, 7, 10, 13, 15],  # double altération de la 9e
+    "7b9#11": [0, 4, 7, 10, 13, 18],
+    "7#9#11": [0, 4, 7, 10, 15, 18],
+    "7b9b13": [0, 4, 7, 10, 13, 20],  # b13 = A# = +20 demi-tons
+    "7#9b13": [0, 4, 7, 10, 15, 20],
+    # --- Accords de 9ème ---
+    "9": [0, 4, 7, 10, 14],
+    "maj9": [0, 4, 7, 11, 14],
+    "m9": [0, 3, 7, 10, 14],
+    # --- Accords de 11ème ---
+    "11": [0, 4, 7, 10, 14, 17],
+    "m11": [0, 3, 7, 10, 14, 17],
+    # --- Accords de 13ème ---
+    "13": [0, 4, 7, 10, 14, 21],
+    "13#11": [0, 4, 7, 10, 14, 18, 21],
+    "m13": [0, 3, 7, 10, 14, 21],
+    "maj13": [0, 4, 7, 11, 14, 21],
+}
+
+_CHORD_FORMULA_QUALITIES = sorted(CHORD_FORMULAS.keys(), key=len, reverse=True)
+
 
 def get_note_index(note_str: str) -> int:
     """
     Converts a note string (e.g., "C#", "Gb") into its chromatic index (0-11).
     This function is guaranteed to return an integer or raise a ValueError.
     """
-    note_map = {"DB": "C#", "EB": "D#", "FB": "E", "GB": "F#", "AB": "G#", "BB": "A#", "B#": "C"}
-
     clean_note = (
         note_str.upper()
         .replace("♭", "B")
@@ -25,8 +106,8 @@ def get_note_index(note_str: str) -> int:
     if clean_note == "CB":
         return 11
 
-    if clean_note in note_map:
-        clean_note = note_map[clean_note]
+    if clean_note in _ENHARMONIC_NOTE_MAP:
+        clean_note = _ENHARMONIC_NOTE_MAP[clean_note]
 
     note_to_find = (
         clean_note[:2] if len(clean_note) > 1 and clean_note[1] in ["#", "B"] else clean_note[0]
@@ -50,9 +131,7 @@ def parse_chord(chord_name: str) -> tuple[int, str, str] | None:
     chord_name = chord_name.strip()
 
     # Utilisation des qualités reconnues depuis CORE_QUALITIES
-    known_qualities = sorted(CORE_QUALITIES.keys(), key=lambda q: -len(q))
-
-    for quality in known_qualities:
+    for quality in _KNOWN_QUALITIES:
         if chord_name.endswith(quality):
             root = chord_name[: -len(quality)] if len(quality) > 0 else chord_name
             try:
@@ -184,9 +263,8 @@ def format_numeral(base_numeral, quality):
 
 def get_chord_notes(chord_name: str) -> list[str] | None:
     """
-    Analyse un nom d'accord et renvoie ses notes constitutives.
-    Cette version est autonome et définit ses propres constantes pour éviter
-    les problèmes d'environnement.
+    Analyse un nom d'accord et renvoie ses notes constitutives,
+    à partir des formules de `CHORD_FORMULAS`.
 
     Args:
         chord_name (str): Le nom de l'accord (ex: "C6", "F#m7", "Bb").
@@ -195,81 +273,10 @@ def get_chord_notes(chord_name: str) -> list[str] | None:
         list[str] | None: Une liste de notes ou None si l'accord est invalide.
 
     """
-    chord_formulas = {
-        # --- Triades de base ---
-        "": [0, 4, 7],
-        "M": [0, 4, 7],
-        "maj": [0, 4, 7],
-        "m": [0, 3, 7],
-        "min": [0, 3, 7],
-        "dim": [0, 3, 6],
-        "d": [0, 3, 6],
-        "aug": [0, 4, 8],
-        "+": [0, 4, 8],
-        "5": [0, 7],
-        # --- Accords suspendus ---
-        "sus2": [0, 2, 7],
-        "sus4": [0, 5, 7],
-        "7sus2": [0, 2, 7, 10],
-        "7sus4": [0, 5, 7, 10],
-        "9sus4": [0, 5, 7, 10, 14],
-        "13sus4": [0, 5, 7, 10, 14, 21],
-        # --- Accords "add" ---
-        "add9": [0, 4, 7, 14],
-        "m(add9)": [0, 3, 7, 14],
-        # --- Accords de 6ème ---
-        "6": [0, 4, 7, 9],
-        "m6": [0, 3, 7, 9],
-        "6/9": [0, 4, 7, 9, 14],
-        # --- Accords de 7ème ---
-        "7": [0, 4, 7, 10],
-        "maj7": [0, 4, 7, 11],
-        "m7": [0, 3, 7, 10],
-        "dim7": [0, 3, 6, 9],
-        "m7b5": [0, 3, 6, 10],
-        "m(maj7)": [0, 3, 7, 11],
-        "maj7b5": [0, 4, 6, 11],
-        "maj7#5": [0, 4, 8, 11],
-        "maj7#11": [0, 4, 7, 11, 18],
-        # --- Accords de dominante altérés ---
-        "7b5": [0, 4, 6, 10],
-        "7#5": [0, 4, 8, 10],
-        "7b9": [0, 4, 7, 10, 13],
-        "7b13": [0, 4, 7, 10, 20],
-        "7#9": [0, 4, 7, 10, 15],
-        "7#11": [0, 4, 7, 10, 18],
-        "7alt": [0, 4, 10, 13, 18],  # Altéré générique : b9 et #11
-        "7b9b5": [0, 4, 6, 10, 13],
-        "7b9#5": [0, 4, 8, 10, 13],
-        "7#9b5": [0, 4, 6, 10, 15],
-        "7#9#5": [0, 4, 8, 10, 15],
-        "7b9#9": [0, 4, 7, 10, 13, 15],  # double altération de la 9e
-        "7b9#11": [0, 4, 7, 10, 13, 18],
-        "7#9#11": [0, 4, 7, 10, 15, 18],
-        "7b9b13": [0, 4, 7, 10, 13, 20],  # b13 = A# = +20 demi-tons
-        "7#9b13": [0, 4, 7, 10, 15, 20],
-        # --- Accords de 9ème ---
-        "9": [0, 4, 7, 10, 14],
-        "maj9": [0, 4, 7, 11, 14],
-        "m9": [0, 3, 7, 10, 14],
-        # --- Accords de 11ème ---
-        "11": [0, 4, 7, 10, 14, 17],
-        "m11": [0, 3, 7, 10, 14, 17],
-        # --- Accords de 13ème ---
-        "13": [0, 4, 7, 10, 14, 21],
-        "13#11": [0, 4, 7, 10, 14, 18, 21],
-        "m13": [0, 3, 7, 10, 14, 21],
-        "maj13": [0, 4, 7, 11, 14, 21],
-    }
-
-    # Trier les qualités de la plus longue à la plus courte pour une analyse correcte
-    known_qualities = sorted(chord_formulas.keys(), key=len, reverse=True)
-
-    # --- Logique de la fonction ---
     chord_name = chord_name.strip()
 
-    # 1. Itérer sur les qualités connues pour trouver la bonne correspondance
-    for quality in known_qualities:
+    # 1. Itérer sur les qualités connues (triées de la plus longue à la plus courte)
+    for quality in _CHORD_FORMULA_QUALITIES:
         if chord_name.endswith(quality):
             # Extraire la partie racine potentielle
             root_str = chord_name[: -len(quality)] if quality else chord_name
@@ -277,7 +284,7 @@ def get_chord_notes(chord_name: str) -> list[str] | None:
                 root_index = NOTE_INDEX_MAP[root_str]
 
                 # Construire les notes de l'accord
-                intervals = chord_formulas[quality]
+                intervals = CHORD_FORMULAS[quality]
                 chord_notes = []
                 for interval in intervals:
                     note_index = (root_index + interval) % 12
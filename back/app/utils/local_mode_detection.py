@@ -0,0 +1,72 @@
+from collections import Counter
+from typing import Any, Dict, List
+
+from app.utils.chords_analyzer import analyze_chord
+from app.utils.common import get_note_from_index, parse_chord
+
+# Modes candidats, du plus courant au plus rare (départage les tonalités relatives)
+LOCAL_DETECTION_MODES = (
+    "Ionian",
+    "Aeolian",
+    "Dorian",
+    "Mixolydian",
+    "Lydian",
+    "Phrygian",
+    "Harmonic Minor",
+    "Melodic Minor",
+)
+# Bonus quand la tonique est la fondamentale du dernier (cadence) ou du premier accord
+LAST_CHORD_BONUS = 0.5
+FIRST_CHORD_BONUS = 0.25
+
+
+def detect_tonic_and_mode_locally(progression: List[str]) -> Dict[str, Any]:
+    """
+    Détection locale, sans LLM, de la tonalité d'une progression : la tonique et le mode
+    qui rendent le plus d'accords diatoniques, départagés par la fondamentale du dernier
+    puis du premier accord. Un seul segment couvre toute la progression.
+
+    Moins fine que `detect_tonic_and_mode`, elle sert de repli quand Gemini est
+    indisponible et retourne le même format, marqué `"source": "local"`.
+    """
+    roots = [parsed[0] for parsed in map(parse_chord, progression) if parsed]
+    # Chaque accord distinct n'est analysé qu'une fois par tonalité
+    chord_counts = Counter(progression)
+    best_score = -1.0
+    best_diatonic_count = 0
+    best_tonic_index, best_mode = 0, "Ionian"
+    for mode_name in LOCAL_DETECTION_MODES:
+        for tonic_index in range(12):
+            diatonic_count = sum(
+                count
+                for chord, count in chord_counts.items()
+                if analyze_chord(chord, tonic_index, mode_name).is_diatonic
+            )
+            score = float(diatonic_count)
+            if roots and roots[-1] == tonic_index:
+                score += LAST_CHORD_BONUS
+            if roots and roots[0] == tonic_index:
+                score += FIRST_CHORD_BONUS
+            if score > best_score:
+                best_score = score
+                best_diatonic_count = diatonic_count
+                best_tonic_index, best_mode = tonic_index, mode_name
+
+    tonic = get_note_from_index(best_tonic_index)
+    explanation = (
+        f"Analyse locale (service d'IA indisponible) : {best_diatonic_count} accord(s) "
+        f"sur {len(progression)} diatonique(s) en {tonic} {best_mode}."
+    )
+    return {
+        "source": "local",
+        "global_analysis": {"tonic": tonic, "mode": best_mode, "explanation": explanation},
+        "harmonic_segments": [
+            {
+                "start_index": 0,
+                "end_index": len(progression) - 1,
+                "tonic": tonic,
+                "mode": best_mode,
+                "explanation": explanation,
+            }
+        ],
+    }
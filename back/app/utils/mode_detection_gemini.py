@@ -1,10 +1,27 @@
 import json
 import os
+import time
+from typing import Any, Callable, Dict, List, Optional
 
-import google.generativeai as genai
-
+from app.services.gemini_clients import gemini_clients
+from app.services.hedging import (
+    HedgePolicy,
+    get_hedge_delay,
+    get_hedge_policy,
+    hedged_call,
+    llm_latencies,
+)
+from app.services.llm_limiter import record_llm_call
+from app.services.metrics import record_analysis_repair, record_token_usage, track_llm_call
+from app.services.token_budget import add_token_usage, estimate_tokens
+from app.utils.analysis_repair import find_analysis_issues, normalize_mode, repair_analysis
 from constants import MODES_DATA
 
+MODE_NAMES = list(MODES_DATA.keys())
+PROMPT_STYLES = ("full", "compact")
+# Appels au LLM d'une analyse sans incident : analyse puis formatage, ou un prompt compact
+LLM_CALLS_PER_STYLE = {"full": 2, "compact": 1}
+
 
 def extract_json_from_response(text: str) -> str:
     """
@@ -18,33 +35,58 @@ def extract_json_from_response(text: str) -> str:
         raise ValueError("Aucun objet JSON valide n'a été trouvé dans la réponse de l'IA.")
 
 
-def detect_tonic_and_mode(progression: list[str], model: str) -> dict:
-    """
-    Détermine la tonique, le mode et les segments en utilisant une approche fiable
-    en deux étapes pour garantir la qualité de l'analyse ET la rigueur du formatage.
-    """
-    # --- Configuration et Initialisation ---
+def call_model(model: str, step: str, prompt: str) -> Any:
+    """Appel au modèle (instance partagée du processus), avec métriques et latence observée."""
+    model_instance = gemini_clients.get(model)
+    record_llm_call(model)
+    start = time.perf_counter()
+    with track_llm_call(model, step):
+        response = model_instance.generate_content(prompt)
+    llm_latencies.observe(model, step, time.perf_counter() - start)
+    record_token_usage(model, step, response)
+    add_token_usage(response)
+    return response
+
+
+def generate(
+    model: str,
+    step: str,
+    prompt: str,
+    hedge: Optional[HedgePolicy] = None,
+    is_valid: Callable[[Any], bool] = lambda _: True,
+) -> Any:
+    """Appelle le modèle, en doublant l'appel s'il tarde quand une politique `hedge` est donnée."""
+    if hedge is None:
+        return call_model(model, step, prompt)
+    return hedged_call(
+        lambda: call_model(model, step, prompt),
+        lambda: call_model(hedge.fallback_model or model, step, prompt),
+        get_hedge_delay(hedge, model, step),
+        is_valid=is_valid,
+        labels=(model, step),
+    )
+
+
+def _has_text(response: Any) -> bool:
     try:
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return bool(response.text.strip())
     except Exception:
-        raise ValueError(
-            "Clé API Gemini non trouvée. Veuillez la définir dans vos variables d'environnement."
-        )
+        return False
 
-    model_instance = genai.GenerativeModel(model)
-    progression_str = " - ".join(progression)
 
+def _has_json(response: Any) -> bool:
     try:
-        modes_list_str = str(list(MODES_DATA.keys()))
-    except NameError:
-        print(
-            "Avertissement : MODES_DATA non trouvé, la contrainte de mode ne sera pas dans le prompt."
-        )
-        modes_list_str = "['Ionian', 'Dorian', 'Phrygian', 'Lydian', 'Mixolydian', 'Aeolian', 'Locrian', 'Harmonic Minor', 'Melodic Minor']"
+        json.loads(extract_json_from_response(response.text))
+        return True
+    except Exception:
+        return False
 
-    # === ÉTAPE 1 : L'ANALYSE EN PROSE (Le "Penseur") ===
 
-    prompt_step_1 = (
+def build_analysis_prompt(progression: List[str]) -> str:
+    """Prompt de l'étape 1 : analyse en prose de la progression."""
+    progression_str = " - ".join(progression)
+
+    return (
         "# Rôle et Objectif\n"
         "Tu es un analyste expert en harmonie et en théorie musicale. Ta mission est d'analyser en "
         "profondeur une progression d'accords. Tu dois identifier la "
@@ -69,16 +111,12 @@ def detect_tonic_and_mode(progression: list[str], model: str) -> dict:
         f"Progression à analyser : {progression_str}"
     )
 
-    try:
-        response_step_1 = model_instance.generate_content(prompt_step_1)
-        prose_analysis = response_step_1.text.strip()
-    except Exception as e:
-        print(f"Erreur lors de l'étape 1 (Analyse) : {e}")
-        raise
 
-    # === ÉTAPE 2 : LE FORMATAGE JSON (Le "Formateur") ===
+def build_formatting_prompt(prose_analysis: str) -> str:
+    """Prompt de l'étape 2 : conversion de l'analyse en prose au format JSON."""
+    modes_list_str = str(MODE_NAMES)
 
-    prompt_step_2 = (
+    return (
         "# Rôle et Objectif\n"
         "Tu es un expert en formatage de données. Ta mission est de convertir une analyse "
         "textuelle en un objet JSON strict, sans rien interpréter ni modifier.\n"
@@ -122,13 +160,155 @@ def detect_tonic_and_mode(progression: list[str], model: str) -> dict:
         f"- Le `mode` doit **obligatoirement** appartenir à la liste suivante : {modes_list_str}.\n"
     )
 
+
+def build_compact_prompt(progression: List[str]) -> str:
+    """
+    Prompt compact en une seule étape : accords indexés, modes numérotés et réponse en
+    lignes `G|...` / `S|...` analysées localement, sans étape de formatage JSON.
+    """
+    chords = " ".join(f"{index}:{chord}" for index, chord in enumerate(progression))
+    modes = " ".join(f"{index}={mode_name}" for index, mode_name in enumerate(MODE_NAMES))
+    return (
+        "Analyse harmonique experte. Donne la tonalité principale puis découpe la "
+        "progression en segments (au moins 4 accords, deux segments voisins de centres "
+        "tonals différents). Notes en notation anglo-saxonne (C, C#, Eb...).\n"
+        f"Accords (index:accord) : {chords}\n"
+        f"Modes : {modes}\n"
+        "Réponds uniquement par ces lignes, explications en une phrase :\n"
+        "G|tonique|n° du mode|explication\n"
+        "S|index de début|index de fin|tonique|n° du mode|explication"
+    )
+
+
+def _parse_mode(value: str) -> str:
+    value = value.strip()
+    if value.isdigit() and int(value) < len(MODE_NAMES):
+        return MODE_NAMES[int(value)]
+    return normalize_mode(value)
+
+
+def parse_compact_analysis(text: str) -> Dict[str, Any]:
+    """
+    Convertit la réponse au prompt compact au format de `detect_tonic_and_mode`.
+    Lève une ValueError si la réponse ne respecte pas le format.
+    """
+    global_analysis = None
+    segments = []
+    for line in text.splitlines():
+        line = line.strip().strip("`")
+        kind = line.split("|", 1)[0].strip()
+        # L'explication (dernier champ) peut elle-même contenir des "|"
+        if kind == "G" and line.count("|") >= 3:
+            _, tonic, mode, explanation = line.split("|", 3)
+            global_analysis = {
+                "tonic": tonic.strip(),
+                "mode": _parse_mode(mode),
+                "explanation": explanation.strip(),
+            }
+        elif kind == "S" and line.count("|") >= 5:
+            _, start, end, tonic, mode, explanation = line.split("|", 5)
+            segments.append(
+                {
+                    "start_index": int(start),
+                    "end_index": int(end),
+                    "tonic": tonic.strip(),
+                    "mode": _parse_mode(mode),
+                    "explanation": explanation.strip(),
+                }
+            )
+    if global_analysis is None or not segments:
+        raise ValueError("Réponse compacte incomplète (lignes G| et S| attendues).")
+    return {"global_analysis": global_analysis, "harmonic_segments": segments}
+
+
+def check_analysis(analysis: Any, length: int, model: str) -> Dict[str, Any]:
+    """
+    Valide l'analyse renvoyée par le LLM et la corrige localement si besoin
+    (`repair_analysis`) plutôt que de relancer un appel de plusieurs secondes.
+    """
+    issues = find_analysis_issues(analysis, length)
+    if not issues:
+        return analysis
+    repaired = repair_analysis(analysis, length)
+    failed = repaired["global_analysis"]["tonic"] == "Error"
+    record_analysis_repair(model, "failed" if failed else "repaired")
+    print(f"Analyse du LLM hors format ({'irréparable' if failed else 'corrigée'}) : {issues}")
+    return repaired
+
+
+def get_prompt_style() -> str:
+    """Style des prompts : "full" (deux étapes, par défaut) ou "compact" (`LLM_PROMPT_STYLE`)."""
+    style = os.getenv("LLM_PROMPT_STYLE", "full")
+    if style not in PROMPT_STYLES:
+        raise ValueError(f"Style de prompt inconnu : '{style}'")
+    return style
+
+
+def estimate_prompt_tokens(progression: List[str], style: Optional[str] = None) -> int:
+    """
+    Tokens de prompt estimés pour analyser la progression (sans compter, en style
+    "full", l'analyse en prose renvoyée à l'étape 2).
+    """
+    if (style or get_prompt_style()) == "compact":
+        return estimate_tokens(build_compact_prompt(progression))
+    return estimate_tokens(build_analysis_prompt(progression)) + estimate_tokens(
+        build_formatting_prompt("")
+    )
+
+
+def detect_tonic_and_mode(
+    progression: list[str],
+    model: str,
+    hedge: Optional[HedgePolicy] = None,
+    style: Optional[str] = None,
+) -> dict:
+    """
+    Détermine la tonique, le mode et les segments en utilisant une approche fiable
+    en deux étapes pour garantir la qualité de l'analyse ET la rigueur du formatage.
+
+    En style "compact" (`get_prompt_style()`), un seul prompt court est envoyé et sa
+    réponse en lignes est analysée localement ; l'étape 2 ne sert plus que si elle ne
+    respecte pas le format.
+
+    `hedge` (par défaut : `get_hedge_policy()`, désactivée sans configuration) double
+    chaque étape qui tarde à répondre pour couper la traîne de latence.
+    """
+    hedge = hedge or get_hedge_policy()
+    style = style or get_prompt_style()
+
+    # === ÉTAPE 1 : L'ANALYSE EN PROSE (Le "Penseur") ===
+
+    try:
+        if style == "compact":
+            response_step_1 = generate(
+                model, "compact_analysis", build_compact_prompt(progression), hedge, _has_text
+            )
+        else:
+            response_step_1 = generate(
+                model, "analysis", build_analysis_prompt(progression), hedge, _has_text
+            )
+        prose_analysis = response_step_1.text.strip()
+    except Exception as e:
+        print(f"Erreur lors de l'étape 1 (Analyse) : {e}")
+        raise
+
+    if style == "compact":
+        try:
+            return check_analysis(parse_compact_analysis(prose_analysis), len(progression), model)
+        except ValueError as e:
+            print(f"Réponse compacte non conforme, passage au formatage JSON : {e}")
+
+    # === ÉTAPE 2 : LE FORMATAGE JSON (Le "Formateur") ===
+
     try:
-        response_step_2 = model_instance.generate_content(prompt_step_2)
+        response_step_2 = generate(
+            model, "formatting", build_formatting_prompt(prose_analysis), hedge, _has_json
+        )
         raw_text = response_step_2.text.strip()
 
         json_string = extract_json_from_response(raw_text)
         analysis_data = json.loads(json_string)
-        return analysis_data
+        return check_analysis(analysis_data, len(progression), model)
 
     except Exception as e:
         print(f"Erreur lors de l'étape 2 (Formatage JSON) : {e}")
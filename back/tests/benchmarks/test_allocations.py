@@ -0,0 +1,52 @@
+import tracemalloc
+
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from app.services.allocations import AllocationTracker
+from app.services.pipeline import run_analysis_pipeline
+
+# Budgets par accord de la mémoire retenue par le pipeline post-LLM (mesuré : ~2,5 Ko et
+# ~20 blocs, contre ~14 Ko et ~180 blocs avec un dict par accord analysé). Une régression
+# mémoire (nouveaux dicts/listes par accord et par mode) les fera dépasser.
+RETAINED_BYTES_PER_CHORD_BUDGET = 5_000
+RETAINED_BLOCKS_PER_CHORD_BUDGET = 50
+# Pic mémoire d'une requête par accord : pipeline et sérialisation par `ORJSONResponse`,
+# comme `/analyze` (mesuré : ~10,5 Ko ; ~44 Ko avec `JSONResponse` et `jsonable_encoder`)
+REQUEST_PEAK_BYTES_PER_CHORD_BUDGET = 20_000
+
+
+@pytest.mark.parametrize("repeat", [1, 8])
+def test_pipeline_retained_memory_budget_per_chord(repeat, reference_progression):
+    progression_data, analysis_result = reference_progression(repeat)
+    # Premier passage pour écarter les allocations ponctuelles (imports, caches)
+    run_analysis_pipeline(progression_data, analysis_result)
+
+    with AllocationTracker() as tracker:
+        run_analysis_pipeline(progression_data, analysis_result, stage=tracker.stage)
+    report = tracker.report(chords_count=len(progression_data))
+
+    assert [stage["stage"] for stage in report["stages"]] == [
+        "segments_analysis",
+        "borrowed_chords",
+        "major_modes_substitutions",
+        "harmonization",
+        "secondary_dominants",
+        "tritone_substitutions",
+        "response",
+    ]
+    assert report["per_chord"]["retained_bytes"] <= RETAINED_BYTES_PER_CHORD_BUDGET
+    assert report["per_chord"]["retained_blocks"] <= RETAINED_BLOCKS_PER_CHORD_BUDGET
+
+
+def test_request_peak_memory_per_chord(reference_progression):
+    progression_data, analysis_result = reference_progression(8)
+    ORJSONResponse(run_analysis_pipeline(progression_data, analysis_result))
+
+    tracemalloc.start()
+    try:
+        ORJSONResponse(run_analysis_pipeline(progression_data, analysis_result))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak / len(progression_data) <= REQUEST_PEAK_BYTES_PER_CHORD_BUDGET
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.services.pipeline import run_analysis_pipeline
+
+# Budget de sérialisation de la réponse de `/analyze` (mesuré : ~2-3 µs par Ko avec orjson,
+# ~17 µs avec le module json et ~160 µs en passant aussi par `jsonable_encoder`)
+SERIALIZATION_MICROSECONDS_PER_KB_BUDGET = 10
+# La sérialisation rapide doit rester bien plus rapide que l'ancien chemin
+MIN_SPEEDUP_OVER_JSONABLE_ENCODER = 5
+
+REPEAT = 8
+
+
+@pytest.fixture
+def response(reference_progression):
+    """Réponse de `/analyze` pour la progression de `data.py` répétée `REPEAT` fois."""
+    return run_analysis_pipeline(*reference_progression(REPEAT))
+
+
+def microseconds_per_kb(serialize, size, rounds=20):
+    """Meilleur temps de sérialisation sur `rounds` essais, ramené au Ko produit."""
+    best = min(_time(serialize) for _ in range(rounds))
+    return best * 1e6 / (size / 1024)
+
+
+def _time(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def test_fast_serialization_matches_fastapi_encoding(response):
+    assert ORJSONResponse(response).body == JSONResponse(jsonable_encoder(response)).body
+
+
+def test_serialization_time_per_kb(response):
+    size = len(ORJSONResponse(response).body)
+
+    fast = microseconds_per_kb(lambda: ORJSONResponse(response).body, size)
+    previous = microseconds_per_kb(
+        lambda: JSONResponse(jsonable_encoder(response)).body, size, rounds=3
+    )
+
+    assert fast <= SERIALIZATION_MICROSECONDS_PER_KB_BUDGET
+    assert previous / fast >= MIN_SPEEDUP_OVER_JSONABLE_ENCODER
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+# Budget de démarrage à froid de `app.main` (mesuré : ~0,4 s, dont ~0,3 s pour FastAPI).
+# Le SDK Gemini (~0,7 s à lui seul) ne doit être importé qu'au premier appel au LLM.
+IMPORT_TIME_BUDGET_SECONDS = 1.0
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure_cold_import():
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_IMPORT],
+        cwd=BACK_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": BACK_DIR},
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_heavy_sdk_is_not_imported_at_startup():
+    modules = measure_cold_import()["modules"]
+    assert "google.generativeai" not in modules
+
+
+def test_cold_import_within_budget():
+    # Meilleur de 3 mesures pour lisser le bruit de la machine
+    elapsed = min(measure_cold_import()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_TIME_BUDGET_SECONDS
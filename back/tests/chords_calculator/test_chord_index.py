@@ -0,0 +1,61 @@
+from app.chords_calculator.chord_index import (
+    CHORD_INDEX,
+    QUALITIES,
+    QUALITY_INTERVALS,
+    get_chord_index_blob,
+    identify_chord,
+    pitch_class_mask,
+)
+from app.utils.borrowed_modes import INTERVALS
+
+
+def test_pitch_class_mask():
+    assert pitch_class_mask([0, 4, 7]) == 0b10010001
+    assert pitch_class_mask([12, 16, 19]) == pitch_class_mask([0, 4, 7])
+
+
+def test_aliases_are_merged():
+    """Une seule qualité par ensemble de notes, sous son nom le plus courant."""
+    assert "" in QUALITIES
+    assert "M" not in QUALITIES and "maj" not in QUALITIES
+    assert len({frozenset(intervals) for intervals in QUALITY_INTERVALS}) == len(QUALITIES)
+
+
+def test_every_registered_quality_is_indexed():
+    """Chaque qualité du registre, sur chaque fondamentale, est retrouvée par l'index."""
+    for quality, intervals in INTERVALS.items():
+        if not isinstance(quality, str):
+            continue
+        for root in range(12):
+            mask = pitch_class_mask(root + interval for interval in intervals)
+            assert any(candidate_root == root for candidate_root, _ in CHORD_INDEX[mask])
+
+
+class TestIdentifyChord:
+    def test_root_position(self):
+        """Sans basse, les accords sont classés par pertinence."""
+        assert identify_chord([0, 4, 7])[0]["chord"] == "C"
+        assert [result["chord"] for result in identify_chord([0, 4, 7, 9])] == ["C6", "Am7"]
+
+    def test_bass_selects_chord_and_inversion(self):
+        """La basse fait passer en premier l'accord dont elle est la fondamentale."""
+        results = identify_chord([0, 4, 7, 9], bass=9)
+        assert results[0] == {"chord": "Am7", "root": "A", "quality": "m7", "inversion": 0}
+        assert results[1]["chord"] == "C6" and results[1]["inversion"] == 3
+
+    def test_inversion_matches_player(self):
+        """E à la basse de Do majeur : premier renversement."""
+        assert identify_chord([0, 4, 7], bass=4)[0]["inversion"] == 1
+
+    def test_unknown_set(self):
+        """Un ensemble de notes sans accord connu ne renvoie rien."""
+        assert identify_chord([0, 1, 2]) == []
+
+
+def test_blob_is_compact_and_versioned():
+    blob = get_chord_index_blob()
+    c_major = blob["chords"][str(pitch_class_mask([0, 4, 7]))]
+    root, quality_index = divmod(c_major[0], 256)
+    assert blob["notes"][root] == "C"
+    assert blob["qualities"][quality_index] == ""
+    assert len(blob["version"]) == 16
@@ -1,6 +1,11 @@
 import pytest
 
-from app.chords_calculator.modal_substitution import get_substitution_info, get_substitutions
+from app.chords_calculator.modal_substitution import (
+    SUBSTITUTION_TABLE,
+    get_substitution_info,
+    get_substitutions,
+)
+from constants import MODES_DATA
 
 
 class TestGetSubstitutionInfo:
@@ -125,3 +130,35 @@ class TestGetSubstitutions:
             {"chord": "C7", "roman": None, "quality": None},
         ]
         assert result == expected
+
+    def test_substitution_in_non_major_mode(self):
+        """
+        Substitution en La mineur harmonique (tonique_index = 9) : le Ve degré
+        donne une dominante majeure et le VIIe un accord diminué.
+        """
+        progression = ["Em7", "G#dim", "Am"]
+        sub_info = [
+            {"degree": 5, "is_triad": False},
+            {"degree": 7, "is_triad": True},
+            {"degree": 1, "is_triad": True},
+        ]
+        result = get_substitutions(progression, 9, sub_info, "Harmonic Minor")
+
+        expected = [
+            {"chord": "E7", "roman": "V", "quality": "7"},
+            {"chord": "G#dim", "roman": "vii°", "quality": "dim"},
+            {"chord": "Am", "roman": "i", "quality": "m"},
+        ]
+        assert result == expected
+
+    def test_unknown_mode_raises(self):
+        """Un mode inconnu lève une ValueError dès qu'un accord doit être substitué."""
+        with pytest.raises(ValueError):
+            get_substitutions(["C"], 0, [{"degree": 1, "is_triad": True}], "Unknown")
+
+
+def test_substitution_table_covers_all_modes():
+    """La table contient une entrée par mode, degré, tonique et nature d'accord."""
+    assert len(SUBSTITUTION_TABLE) == len(MODES_DATA) * 7 * 12 * 2
+    assert SUBSTITUTION_TABLE[("Dorian", 4, 2, False)] == ("G7", "IV", "7")
+    assert SUBSTITUTION_TABLE[("Dorian", 4, 2, True)] == ("G", "IV", "")
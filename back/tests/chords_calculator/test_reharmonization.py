@@ -0,0 +1,127 @@
+import pytest
+
+from app.chords_calculator import reharmonization
+from app.chords_calculator.reharmonization import (
+    get_reharmonization_options,
+    reharmonize,
+    transition_cost,
+    voice_leading_distance,
+)
+
+
+def test_voice_leading_distance():
+    c_major = frozenset({0, 4, 7})
+    a_minor = frozenset({9, 0, 4})
+    assert voice_leading_distance(c_major, c_major) == 0
+    # Seule la quinte (Sol) bouge d'un ton vers La
+    assert voice_leading_distance(c_major, a_minor) == pytest.approx(4 / 6)
+
+
+def test_transition_cost_rewards_resolutions():
+    # V7 -> I et subV7 -> I sont moins coûteux que V7 -> ii
+    assert transition_cost("G7", "Cmaj7") < transition_cost("G7", "Dm7")
+    assert transition_cost("C#7", "Cmaj7") < transition_cost("C#7", "Dm7")
+
+
+class TestGetReharmonizationOptions:
+    def test_dominant_chord_options(self):
+        """G7 en Do ionien : substitution tritonique, V7/x et ii–V sont proposés."""
+        options = get_reharmonization_options("G7", 4, 0, "Ionian")
+        by_move = {}
+        for move, chords, _ in options:
+            by_move.setdefault(move, []).append([name for name, _ in chords])
+
+        assert by_move["original"] == [["G7"]]
+        assert by_move["tritone_substitution"] == [["C#7"]]
+        assert by_move["secondary_dominant"] == [["D7", "G7"]]
+        assert by_move["ii_v"] == [["Am7", "D7", "G7"]]
+        assert ["Gm7"] in by_move["modal_interchange"]  # v7 de Do dorien / mixolydien
+
+    def test_inserted_chords_share_target_duration(self):
+        """Les accords insérés se partagent la première moitié de la durée de la cible."""
+        options = get_reharmonization_options("Am7", 4, 0, "Ionian")
+        durations = {move: [duration for _, duration in chords] for move, chords, _ in options}
+        assert durations["secondary_dominant"] == [2, 2]
+        assert durations["ii_v"] == [1, 1, 2]
+
+    def test_short_chords_get_no_insertion(self):
+        """Aucune insertion n'est possible sur un accord d'une seule unité de durée."""
+        moves = {move for move, _, _ in get_reharmonization_options("Am7", 1, 0, "Ionian")}
+        assert "secondary_dominant" not in moves
+        assert "ii_v" not in moves
+
+    def test_unknown_chord_is_kept(self):
+        """Un accord non reconnu n'a que lui-même comme option."""
+        assert get_reharmonization_options("Hm7", 2, 0, "Ionian") == [
+            ("original", (("Hm7", 2),), 0.0)
+        ]
+
+
+class TestReharmonize:
+    def test_candidates_are_complete_and_ranked(self):
+        """Les candidats couvrent toute la progression et sont triés par coût."""
+        progression = ["Dm7", "G7", "Cmaj7", "Am7"]
+        result = reharmonize(progression, [2, 2, 4, 4], "C", top_k=3)
+
+        assert result["truncated"] is False
+        assert len(result["candidates"]) == 3
+        scores = [candidate["score"] for candidate in result["candidates"]]
+        assert scores == sorted(scores)
+        for candidate in result["candidates"]:
+            # Chaque accord d'origine est couvert, dans l'ordre, sans changer la durée totale
+            source_indexes = [chord["source_index"] for chord in candidate["chords"]]
+            assert sorted(set(source_indexes)) == [0, 1, 2, 3]
+            assert source_indexes == sorted(source_indexes)
+            assert sum(chord["duration"] for chord in candidate["chords"]) == 12
+
+    def test_candidates_are_unique(self):
+        """Une même suite d'accords n'apparaît qu'une fois."""
+        result = reharmonize(["C", "F", "G", "C"], [4, 4, 4, 4], "C", beam_width=16, top_k=16)
+        sequences = [
+            tuple(chord["chord"] for chord in candidate["chords"])
+            for candidate in result["candidates"]
+        ]
+        assert len(sequences) == len(set(sequences))
+
+    def test_time_budget_bounds_long_progressions(self):
+        """Le budget de temps borne la recherche sur une longue progression."""
+        progression = ["Dm7", "G7", "Cmaj7", "A7"] * 100
+        result = reharmonize(progression, [4] * 400, "C", time_budget_ms=1e-6)
+
+        assert result["truncated"] is True
+        best = result["candidates"][0]["chords"]
+        # Une fois le budget épuisé, les accords restants sont conservés tels quels
+        assert [chord["chord"] for chord in best[-4:]] == ["Dm7", "G7", "Cmaj7", "A7"]
+        assert all(chord["move"] == "original" for chord in best[-4:])
+
+    def test_exhausted_budget_skips_option_generation(self, monkeypatch):
+        """Une fois le budget épuisé, les options des accords restants ne sont plus générées."""
+        calls = []
+
+        def counting_options(*args):
+            calls.append(args)
+            return get_reharmonization_options(*args)
+
+        monkeypatch.setattr(reharmonization, "get_reharmonization_options", counting_options)
+        result = reharmonize(["Dm7", "G7", "Cmaj7"] * 50, [4] * 150, "C", time_budget_ms=0)
+
+        assert result["truncated"] is True
+        assert calls == []
+        best = result["candidates"][0]
+        assert [chord["chord"] for chord in best["chords"]] == ["Dm7", "G7", "Cmaj7"] * 50
+
+    def test_exhausted_budget_keeps_the_original_cost(self):
+        """L'accord conservé tel quel coûte autant que son option « original »."""
+        progression = ["Dm7", "G7", "Cmaj7", "Ab7"]
+        expected = sum(
+            get_reharmonization_options(name, 4, 0, "Ionian")[0][2] for name in progression
+        )
+        expected += sum(transition_cost(a, b) for a, b in zip(progression, progression[1:]))
+
+        result = reharmonize(progression, [4] * 4, "C", time_budget_ms=0)
+        assert result["candidates"][0]["score"] == round(expected, 3)
+
+    def test_unknown_mode_raises(self):
+        """Un mode inconnu lève une ValueError."""
+        with pytest.raises(ValueError):
+            reharmonize(["C"], [2], "C", "Unknown")
@@ -0,0 +1,60 @@
+import pytest
+
+from app.chords_calculator.secondary_dominant import (
+    get_secondary_dominant_for_target,
+    get_secondary_dominants_for_modes,
+)
+from constants import MAJOR_MODES_DATA
+
+
+class TestGetSecondaryDominantForTarget:
+    @pytest.mark.parametrize(
+        "target, expected",
+        [
+            ("Am7", ("E7", "V7/vi7")),
+            ("C", ("G7", "V7 (Dominante Primaire)")),
+            ("Bm7b5", ("N/A", "(Cible diminuée)")),
+            ("Dbmaj7", ("G#7", "V7/(Dbmaj7)")),  # Cible hors du mode
+            ("", ("N/A", "Pas d'accord d'origine")),
+            ("Hmaj7", ("N/A", "Accord non reconnu")),
+        ],
+    )
+    def test_in_c_ionian(self, target, expected):
+        """Dominante et analyse de quelques cibles en Do ionien."""
+        assert get_secondary_dominant_for_target(target, "C", "Ionian") == expected
+
+
+class TestGetSecondaryDominantsForModes:
+    def test_returns_current_tuple_structure(self):
+        """Le résultat garde la structure {mode: [(dominante, cible, analyse)]}."""
+        substitutions = {
+            "Ionian": {"substitution": [{"chord": "Am7"}, {"chord": "G7"}, {"chord": "C"}]},
+        }
+        assert get_secondary_dominants_for_modes(substitutions, "C") == {
+            "Ionian": [
+                ("E7", "Am7", "V7/vi7"),
+                ("D7", "G7", "V7/V7"),
+                ("G7", "C", "V7 (Dominante Primaire)"),
+            ]
+        }
+
+    @pytest.mark.parametrize("tonic", ["C", "Eb", "F#", "Bb"])
+    def test_matches_per_chord_computation(self, tonic):
+        """Le calcul groupé (tables + repli) donne exactement les résultats accord par accord."""
+        chords = [
+            "Dm7", "G7", "Cmaj7", "Bm7b5", "F#dim", "Ebmaj7", "Abm", "Db7",
+            "Bbmaj7", "C#m7", "E", "Am", "Gsus4", "Fmaj9(no5)", "Hm7", "", "c7",
+        ]  # fmt: skip
+        substitutions = {
+            mode_name: {"substitution": [{"chord": chord} for chord in chords]}
+            for mode_name in MAJOR_MODES_DATA
+        }
+
+        result = get_secondary_dominants_for_modes(substitutions, tonic)
+
+        for mode_name in MAJOR_MODES_DATA:
+            expected = []
+            for chord in chords:
+                dominant, analysis = get_secondary_dominant_for_target(chord, tonic, mode_name)
+                expected.append((dominant, chord, analysis))
+            assert result[mode_name] == expected
@@ -0,0 +1,81 @@
+from app.chords_calculator.voice_leading import (
+    get_voicings,
+    midi_to_note,
+    movement_cost,
+    note_to_midi,
+    optimize_voicings,
+)
+
+
+def test_voicings_match_frontend_player():
+    """Les notes de chaque inversion sont celles que calcule `getNotesForChord`."""
+    voicings = dict(get_voicings(0, ""))
+    assert sorted(voicings) == list(range(-3, 6))
+    assert [midi_to_note(note) for note in voicings[0]] == ["C3", "E3", "G3"]
+    assert [midi_to_note(note) for note in voicings[1]] == ["E3", "G3", "C4"]
+    assert [midi_to_note(note) for note in voicings[3]] == ["C4", "E4", "G4"]
+    assert [midi_to_note(note) for note in voicings[-1]] == ["G2", "C3", "E3"]
+
+
+def test_unknown_quality_has_no_voicing():
+    assert get_voicings(0, "unknown") == ()
+
+
+def test_note_conversion_round_trip():
+    assert note_to_midi("D#4") == 51
+    assert midi_to_note(51) == "D#4"
+
+
+def test_movement_cost_penalizes_repeated_bass():
+    c_major = (36, 40, 43)
+    assert movement_cost(c_major, c_major) == 10.0
+    # Soprano +2, voix appariées +1 en moyenne, basse tenue : 3 * 2 + 1 + pénalité
+    assert movement_cost(c_major, (36, 41, 45)) == 7.0 + 10.0
+
+
+class TestOptimizeVoicings:
+    def test_common_tones_are_kept(self):
+        """C -> Am : le voicing optimal ne bouge qu'une voix d'un ton."""
+        result = optimize_voicings([("C", ""), ("A", "m")])
+        first, second = (voicing["notes"] for voicing in result["voicings"])
+        moved = [a != b for a, b in zip(first, second)]
+        assert sum(moved) == 1
+
+    def test_returns_one_voicing_per_chord(self):
+        """Chaque accord reçoit une inversion et ses notes au format du lecteur."""
+        chords = [("D#", "maj7"), ("D", "7sus4"), ("G", "7"), ("C", "m7")]
+        result = optimize_voicings(chords)
+        assert len(result["voicings"]) == 4
+        for (root, quality), voicing in zip(chords, result["voicings"]):
+            assert dict(get_voicings(note_to_midi(f"{root}0"), quality))[voicing["inversion"]] == (
+                tuple(note_to_midi(note) for note in voicing["notes"])
+            )
+
+    def test_dp_beats_greedy_choice(self):
+        """Le coût total n'est jamais supérieur à celui de l'inversion 0 partout."""
+        chords = [("C", ""), ("F", ""), ("G", "7"), ("C", ""), ("A", "m"), ("D", "m7")]
+        result = optimize_voicings(chords)
+        root_position = optimize_voicings(
+            chords,
+            [
+                [midi_to_note(n) for n in dict(get_voicings(note_to_midi(f"{r}0"), q))[0]]
+                for r, q in chords
+            ],
+        )
+        assert result["total_cost"] <= root_position["total_cost"]
+
+    def test_fixed_notes_are_kept(self):
+        """Les notes imposées par l'utilisateur servent d'ancre et ne sont pas modifiées."""
+        result = optimize_voicings([("C", ""), ("G", "")], [["C4", "E4", "G4"], None])
+        assert result["voicings"][0]["notes"] == ["C4", "E4", "G4"]
+        assert all(note_to_midi(note) >= 43 for note in result["voicings"][1]["notes"])
+
+    def test_unknown_chords_are_skipped(self):
+        """Un accord inconnu n'est pas voicé et n'interrompt pas l'enchaînement."""
+        result = optimize_voicings([("C", ""), ("C", "unknown"), ("G", "")])
+        assert result["voicings"][1] == {"inversion": None, "notes": None}
+        assert result["voicings"][2]["notes"] is not None
+
+    def test_empty_progression(self):
+        """Une progression vide donne un coût nul."""
+        assert optimize_voicings([]) == {"total_cost": 0.0, "voicings": []}
@@ -0,0 +1,47 @@
+import pytest
+
+import data
+from app.schema import ChordItem
+
+# Progression de `data.py`, dont les segments harmoniques sont dans `data.harmonic_segments`
+REFERENCE_CHORDS = [
+    ("D#", "maj7"),
+    ("D", "7sus4"),
+    ("G", "7"),
+    ("C", "m7"),
+    ("F", "7"),
+    ("A#", "maj7"),
+    ("E", "7"),
+    ("A", "m7"),
+]
+
+
+@pytest.fixture
+def reference_progression():
+    """
+    Fabrique `(progression_data, analysis_result)` : la progression de `data.py` (et ses
+    segments) répétée `repeat` fois, prête pour `run_analysis_pipeline`.
+    """
+
+    def build(repeat):
+        size = len(REFERENCE_CHORDS)
+        progression_data = [
+            ChordItem(id=index, root=root, quality=quality)
+            for index, (root, quality) in enumerate(REFERENCE_CHORDS * repeat)
+        ]
+        harmonic_segments = [
+            {
+                **segment,
+                "start_index": segment["start_index"] + offset * size,
+                "end_index": segment["end_index"] + offset * size,
+            }
+            for offset in range(repeat)
+            for segment in data.harmonic_segments
+        ]
+        analysis_result = {
+            "global_analysis": data.global_analysis,
+            "harmonic_segments": harmonic_segments,
+        }
+        return progression_data, analysis_result
+
+    return build
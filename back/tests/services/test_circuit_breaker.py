@@ -0,0 +1,87 @@
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        """Temps courant simulé."""
+        return self.now
+
+
+def make_breaker(clock):
+    return CircuitBreaker(
+        "test", failure_threshold=3, slow_call_threshold=5.0, reset_timeout=30.0, clock=clock
+    )
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker(FakeClock())
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = make_breaker(FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker(FakeClock())
+    for _ in range(3):
+        breaker.record_success(duration=6.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_a_single_probe():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 31.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # Un seul appel d'essai à la fois
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 31.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 50.0
+    assert not breaker.allow_request()
+    clock.now = 62.0
+    assert breaker.allow_request()
+
+
+def test_released_probe_can_be_retried():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 31.0
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.allow_request()
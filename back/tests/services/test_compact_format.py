@@ -0,0 +1,138 @@
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.compact_format import (
+    COMPACT_FORMAT,
+    COMPACT_MEDIA_TYPE,
+    decode_compact,
+    encode_compact,
+    wants_compact,
+)
+from app.services.pipeline import run_analysis_pipeline
+from app.services.progression_encoding import analysis_responses, get_analysis_etag
+
+# Réduction minimale de la taille de la réponse de la progression de référence (mesuré : ~18x)
+MIN_SIZE_REDUCTION = 5
+
+LLM_ANALYSIS = {
+    "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": "ii-V-I"},
+    "harmonic_segments": [
+        {"start_index": 0, "end_index": 2, "tonic": "C", "mode": "Ionian", "explanation": ""}
+    ],
+}
+CHORDS_DATA = [
+    {"id": 0, "root": "D", "quality": "m7"},
+    {"id": 1, "root": "G", "quality": "7", "inversion": 1},
+    {"id": 2, "root": "C", "quality": "maj7", "duration": 4, "notes": ["C4", "E4", "G4", "B4"]},
+]
+COMPACT_HEADERS = {"Accept": COMPACT_MEDIA_TYPE}
+
+REPEAT = 8
+
+
+@pytest.fixture
+def response(reference_progression):
+    """Réponse de `/analyze` pour la progression de `data.py` répétée `REPEAT` fois."""
+    return run_analysis_pipeline(*reference_progression(REPEAT))
+
+
+@pytest.fixture(autouse=True)
+def reset_responses():
+    analysis_responses.clear()
+    yield
+    analysis_responses.clear()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "detect_with_fallback", lambda progression, model: LLM_ANALYSIS)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (COMPACT_MEDIA_TYPE, True),
+        (f"application/json;q=0.5, {COMPACT_MEDIA_TYPE}", True),
+        (f"{COMPACT_MEDIA_TYPE}; q=0.8", True),
+        (f"{COMPACT_MEDIA_TYPE};q=0", False),
+        ("application/json", False),
+        ("*/*", False),
+        (None, False),
+    ],
+)
+def test_wants_compact(accept, expected):
+    assert wants_compact(accept) is expected
+
+
+def test_round_trip_is_exact(response):
+    payload = orjson.loads(orjson.dumps(encode_compact(response)))
+    assert orjson.dumps(decode_compact(payload)) == orjson.dumps(response)
+
+
+def test_compact_payload_is_much_smaller(response):
+    compact = encode_compact(response)
+    assert compact["format"] == COMPACT_FORMAT
+    assert len(orjson.dumps(response)) / len(orjson.dumps(compact)) >= MIN_SIZE_REDUCTION
+
+
+def test_shared_rows_are_deduplicated(response):
+    compact = encode_compact(response)
+    chord_rows = compact["tables"]["chords"]["rows"]
+    assert len({tuple(map(str, row)) for row in chord_rows}) == len(chord_rows)
+    # La progression répète 8 fois les mêmes 8 accords dans les mêmes segments
+    assert len(set(compact["quality_analysis"]["chord"])) <= 8
+
+
+class TestAnalyzeNegotiation:
+    def test_post_default_is_full_json(self, client):
+        """Sans `Accept` compact, `POST /analyze` renvoie le JSON complet."""
+        response = client.post(
+            "/analyze", json={"model": "gemini-3-flash-preview", "chords_data": CHORDS_DATA}
+        )
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["Vary"] == "Accept"
+        assert "tables" not in response.json()
+
+    def test_post_compact_decodes_to_full_json(self, client):
+        """La réponse compacte de `POST /analyze` restitue exactement le JSON complet."""
+        body = {"model": "gemini-3-flash-preview", "chords_data": CHORDS_DATA}
+        full = client.post("/analyze", json=body)
+        compact = client.post("/analyze", json=body, headers=COMPACT_HEADERS)
+        assert compact.headers["content-type"] == COMPACT_MEDIA_TYPE
+        assert compact.headers["Vary"] == "Accept"
+        assert decode_compact(compact.json()) == full.json()
+
+    def test_get_compact_has_its_own_etag_and_cache_entry(self, client, monkeypatch):
+        """Chaque format a son ETag ; une seule analyse LLM sert les deux."""
+        calls = []
+        monkeypatch.setattr(
+            main,
+            "detect_with_fallback",
+            lambda progression, model: calls.append(progression) or LLM_ANALYSIS,
+        )
+        params = {"p": "Dm7_G7_Cmaj7", "model": "gemini-3-flash-preview"}
+
+        compact = client.get("/analyze", params=params, headers=COMPACT_HEADERS)
+        full = client.get("/analyze", params=params)
+        assert len(calls) == 1
+        assert compact.headers["content-type"] == COMPACT_MEDIA_TYPE
+        assert full.headers["ETag"] == get_analysis_etag("Dm7_G7_Cmaj7", "gemini-3-flash-preview")
+        assert compact.headers["ETag"] == get_analysis_etag(
+            "Dm7_G7_Cmaj7", "gemini-3-flash-preview", COMPACT_FORMAT
+        )
+        assert decode_compact(compact.json()) == full.json()
+
+        not_modified = client.get(
+            "/analyze",
+            params=params,
+            headers={**COMPACT_HEADERS, "If-None-Match": compact.headers["ETag"]},
+        )
+        assert not_modified.status_code == 304
+        # L'ETag d'un format ne valide pas l'autre
+        refreshed = client.get(
+            "/analyze", params=params, headers={"If-None-Match": compact.headers["ETag"]}
+        )
+        assert refreshed.status_code == 200
@@ -0,0 +1,98 @@
+import json
+
+import data
+from app.services import corpus
+from app.services.corpus import analyze_record, read_records, run_corpus, to_chord_items
+
+
+def fake_analyze(record, model):
+    """Analyse factice (exécutée dans les processus du pool)."""
+    if "X" in record["chords"]:
+        return {"id": record["id"], "error": "Accord non reconnu : 'X'"}
+    return {"id": record["id"], "result": {"chords": len(record["chords"]), "model": model}}
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as output_file:
+        return [json.loads(line) for line in output_file]
+
+
+def test_read_text_records(tmp_path):
+    path = tmp_path / "songs.txt"
+    path.write_text("Dm7 G7 Cmaj7\n\n# commentaire\nC-7, F7; Bbmaj7 - Ebmaj7\n")
+    records = list(read_records(str(path)))
+    assert records == [
+        {"id": 1, "chords": ["Dm7", "G7", "Cmaj7"]},
+        {"id": 4, "chords": ["C-7", "F7", "Bbmaj7", "Ebmaj7"]},
+    ]
+
+
+def test_read_jsonl_records(tmp_path):
+    path = tmp_path / "songs.jsonl"
+    path.write_text('{"id": "a", "chords": ["C"]}\n{"chords": ["G7"], "model": "m"}\n')
+    assert list(read_records(str(path))) == [
+        {"id": "a", "chords": ["C"]},
+        {"id": 2, "chords": ["G7"], "model": "m"},
+    ]
+
+
+def test_to_chord_items():
+    items = to_chord_items({"chords": ["D#maj7", "Cm7"]})
+    assert [(item.root, item.quality) for item in items] == [("D#", "maj7"), ("C", "m7")]
+    items = to_chord_items({"chords_data": [{"id": 1, "root": "C", "quality": "7"}]})
+    assert items[0].quality == "7"
+
+
+def test_analyze_record_runs_pipeline(monkeypatch):
+    analysis_result = {
+        "global_analysis": data.global_analysis,
+        "harmonic_segments": data.harmonic_segments,
+    }
+    monkeypatch.setattr(corpus, "detect_tonic_and_mode", lambda progression, model: analysis_result)
+    chords = ["D#maj7", "D7sus4", "G7", "Cm7", "F7", "A#maj7", "E7", "Am7"]
+    output = analyze_record({"id": 7, "chords": chords})
+    assert output["id"] == 7
+    assert output["result"]["tonic"] == "Eb"
+    assert len(output["result"]["quality_analysis"]) == len(chords)
+
+
+def test_analyze_record_reports_errors():
+    output = analyze_record({"id": 1, "chords": ["Hm7"]})
+    assert output == {"id": 1, "error": "Accord non reconnu : 'Hm7'"}
+
+
+def test_run_corpus_streams_and_resumes(tmp_path):
+    input_path = tmp_path / "songs.txt"
+    input_path.write_text("C F G\nDm7 G7\nC X\nAm\n")
+    output_path = str(tmp_path / "out.jsonl")
+
+    stats = run_corpus(str(input_path), output_path, workers=2, analyze=fake_analyze)
+    assert stats == {"analyzed": 3, "failed": 1, "skipped": 0}
+    outputs = read_output(output_path)
+    assert sorted(output["id"] for output in outputs) == [1, 2, 3, 4]
+    assert {output["id"]: output.get("result", {}).get("chords") for output in outputs}[1] == 3
+
+    # Relance : seules les progressions en erreur sont retentées
+    stats = run_corpus(str(input_path), output_path, workers=2, analyze=fake_analyze)
+    assert stats == {"analyzed": 0, "failed": 1, "skipped": 3}
+    assert len(read_output(output_path)) == 5
+
+
+def test_malformed_jsonl_records_are_reported_and_retried(tmp_path):
+    input_path = tmp_path / "songs.jsonl"
+    input_path.write_text(
+        '{"id": "a", "chords": ["C"]}\n{"chords": [\n[1, 2]\n{"chords": ["G7"]}\n'
+    )
+    output_path = str(tmp_path / "out.jsonl")
+
+    stats = run_corpus(str(input_path), output_path, workers=1, analyze=fake_analyze)
+    assert stats == {"analyzed": 2, "failed": 2, "skipped": 0}
+    errors = {
+        output["id"]: output["error"] for output in read_output(output_path) if "error" in output
+    }
+    assert sorted(errors) == [2, 3]
+    assert all(error.startswith("JSON invalide") for error in errors.values())
+
+    # Les lignes illisibles ne sont pas marquées comme terminées : retentées à la relance
+    stats = run_corpus(str(input_path), output_path, workers=1, analyze=fake_analyze)
+    assert stats == {"analyzed": 0, "failed": 2, "skipped": 2}
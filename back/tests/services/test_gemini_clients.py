@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import gemini_clients as gemini_clients_module
+from app.services.gemini_clients import (
+    GeminiClientRegistry,
+    get_allowed_models,
+    get_warmup_models,
+)
+
+
+class FakeGenAI:
+    def __init__(self):
+        self.configure_calls = 0
+        self.created_models = []
+
+    def configure(self, api_key):
+        """Simule `genai.configure`."""
+        self.configure_calls += 1
+
+    def GenerativeModel(self, model_name):  # noqa: N802
+        """Simule `genai.GenerativeModel`."""
+        model = object()
+        self.created_models.append((model_name, model))
+        return model
+
+    def get_model(self, name):
+        """Simule `genai.get_model`."""
+        if "broken" in name:
+            raise RuntimeError("unavailable")
+
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    fake = FakeGenAI()
+    monkeypatch.setattr(gemini_clients_module, "_import_genai", lambda: fake)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    return fake
+
+
+def test_get_returns_one_instance_per_model(fake_genai):
+    registry = GeminiClientRegistry()
+
+    flash = registry.get("gemini-flash")
+    assert registry.get("gemini-flash") is flash
+    assert registry.get("gemini-pro") is not flash
+    assert fake_genai.configure_calls == 1
+    assert [name for name, _ in fake_genai.created_models] == ["gemini-flash", "gemini-pro"]
+
+
+def test_concurrent_get_configures_once(fake_genai):
+    registry = GeminiClientRegistry()
+    results = []
+    barrier = threading.Barrier(16)
+
+    def worker():
+        barrier.wait()
+        results.append(registry.get("gemini-flash"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_genai.configure_calls == 1
+    assert len(fake_genai.created_models) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_missing_api_key_raises(fake_genai, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY")
+    with pytest.raises(ValueError):
+        GeminiClientRegistry().get("gemini-flash")
+
+
+def test_warm_up_ignores_failures(fake_genai):
+    registry = GeminiClientRegistry()
+    registry.warm_up(["gemini-broken", "gemini-flash"])
+
+    assert [name for name, _ in fake_genai.created_models] == ["gemini-broken", "gemini-flash"]
+
+
+def test_get_warmup_models(monkeypatch):
+    monkeypatch.delenv("GEMINI_WARMUP_MODELS", raising=False)
+    assert get_warmup_models() == list(gemini_clients_module.DEFAULT_WARMUP_MODELS)
+
+    monkeypatch.setenv("GEMINI_WARMUP_MODELS", "gemini-a, gemini-b,")
+    assert get_warmup_models() == ["gemini-a", "gemini-b"]
+
+    monkeypatch.setenv("GEMINI_WARMUP_MODELS", "")
+    assert get_warmup_models() == []
+
+
+def test_get_allowed_models(monkeypatch):
+    monkeypatch.delenv("GEMINI_ALLOWED_MODELS", raising=False)
+    monkeypatch.setenv("GEMINI_WARMUP_MODELS", "gemini-a")
+    assert get_allowed_models() == [*gemini_clients_module.DEFAULT_WARMUP_MODELS, "gemini-a"]
+
+    monkeypatch.setenv("GEMINI_ALLOWED_MODELS", "gemini-a, gemini-b")
+    assert get_allowed_models() == ["gemini-a", "gemini-b"]
+
+
+def test_analyze_rejects_unknown_models(monkeypatch):
+    monkeypatch.delenv("GEMINI_ALLOWED_MODELS", raising=False)
+    calls = []
+    monkeypatch.setattr(main, "detect_with_fallback", lambda *args: calls.append(args))
+    client = TestClient(main.app)
+    chords_data = [{"id": 0, "root": "D", "quality": "m7"}]
+
+    response = client.post("/analyze", json={"chords_data": chords_data, "model": "made-up"})
+    assert response.status_code == 422
+    assert client.get("/analyze", params={"p": "Dm7", "model": "made-up"}).status_code == 422
+    assert calls == []
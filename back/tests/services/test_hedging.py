@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.hedging import (
+    HedgePolicy,
+    LatencyTracker,
+    get_hedge_delay,
+    hedged_call,
+    llm_latencies,
+)
+from app.utils import mode_detection_gemini
+from app.utils.mode_detection_gemini import detect_tonic_and_mode
+
+
+@pytest.fixture(autouse=True)
+def allowed_models(monkeypatch):
+    monkeypatch.setenv("GEMINI_ALLOWED_MODELS", "test-model")
+
+
+def _hedges(winner, model="test-model", step="analysis"):
+    labels = {"model": model, "step": step, "winner": winner}
+    return REGISTRY.get_sample_value("chords_llm_hedges_total", labels) or 0.0
+
+
+def slow(value, delay):
+    def call():
+        time.sleep(delay)
+        return value
+
+    return call
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile("m", "analysis", 95) is None
+    for i in range(1, 101):
+        tracker.observe("m", "analysis", i / 100)
+    assert tracker.percentile("m", "analysis", 95) == (0.96, 100)
+    assert tracker.percentile("m", "analysis", 50) == (0.51, 100)
+
+
+def test_hedge_delay_uses_default_until_enough_samples():
+    llm_latencies.clear()
+    policy = HedgePolicy(percentile=90, default_delay=3.0, min_delay=0.1, min_samples=5)
+    assert get_hedge_delay(policy, "test-model", "analysis") == 3.0
+    for _ in range(5):
+        llm_latencies.observe("test-model", "analysis", 0.2)
+    assert get_hedge_delay(policy, "test-model", "analysis") == 0.2
+    llm_latencies.clear()
+
+
+class TestHedgedCall:
+    def test_fast_primary_is_not_hedged(self):
+        """Une réponse avant le délai n'entraîne aucun doublon."""
+        hedge_called = threading.Event()
+
+        def hedge():
+            hedge_called.set()
+            return "hedge"
+
+        assert hedged_call(lambda: "primary", hedge, delay=1.0) == "primary"
+        assert not hedge_called.is_set()
+
+    def test_slow_primary_loses_to_hedge(self):
+        """Un appel principal trop lent est doublé et le doublon le plus rapide l'emporte."""
+        before = _hedges("hedge")
+        result = hedged_call(
+            slow("primary", 1.0), slow("hedge", 0.01), delay=0.05, labels=("test-model", "analysis")
+        )
+        assert result == "hedge"
+        assert _hedges("hedge") == before + 1
+
+    def test_invalid_answer_does_not_win(self):
+        """La première réponse n'est retenue que si elle est valide."""
+        result = hedged_call(
+            slow("primary", 0.2),
+            slow("", 0.0),
+            delay=0.05,
+            is_valid=bool,
+            labels=("test-model", "analysis"),
+        )
+        assert result == "primary"
+
+    def test_primary_error_when_nothing_is_valid(self):
+        """Sans réponse valide, l'erreur de l'appel principal est propagée."""
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError("quota")
+
+        before = _hedges("none")
+        with pytest.raises(RuntimeError):
+            hedged_call(
+                failing, slow("", 0.0), delay=0.05, is_valid=bool, labels=("test-model", "analysis")
+            )
+        assert _hedges("none") == before + 1
+
+
+class FakeModel:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    def generate_content(self, prompt):
+        """Répond après `delay` secondes : de la prose, puis le JSON attendu."""
+        time.sleep(self.delay)
+        if "Progression à analyser" in prompt:
+            return SimpleNamespace(text=f"Analyse Globale: C - Ionian - {self.name}")
+        payload = {
+            "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": self.name},
+            "harmonic_segments": [],
+        }
+        return SimpleNamespace(text=json.dumps(payload))
+
+
+def test_detect_tonic_and_mode_hedges_to_fallback_model(monkeypatch):
+    models = {"slow-model": FakeModel("slow", 1.0), "fast-model": FakeModel("fast", 0.0)}
+    monkeypatch.setattr(mode_detection_gemini.gemini_clients, "get", models.__getitem__)
+
+    policy = HedgePolicy(fallback_model="fast-model", default_delay=0.05, min_delay=0.01)
+    result = detect_tonic_and_mode(["C", "F", "G"], "slow-model", hedge=policy)
+    assert result["global_analysis"]["explanation"] == "fast"
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import llm_limiter
+from app.services.llm_limiter import (
+    LLMLimiter,
+    LLMLimiterRegistry,
+    LLMOverloadedError,
+    TokenBucket,
+    record_llm_call,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        """Temps courant simulé."""
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=4, clock=clock)
+    assert bucket.try_acquire(4) == 0
+    assert bucket.try_acquire(1) == pytest.approx(0.5)
+    clock.now = 1.0
+    assert bucket.try_acquire(2) == 0
+    clock.now = 100.0
+    # La réserve est plafonnée à la capacité
+    assert bucket.try_acquire(4) == 0
+    assert bucket.try_acquire(1) > 0
+
+
+def test_token_bucket_charge_goes_into_debt():
+    bucket = TokenBucket(rate=1, capacity=2, clock=FakeClock())
+    bucket.charge(3)
+    assert bucket.try_acquire(1) == pytest.approx(2)
+
+
+def test_calls_beyond_the_reservation_are_charged(monkeypatch):
+    limiter = LLMLimiter("test-model", requests_per_minute=60, burst=4, clock=FakeClock())
+    monkeypatch.setattr(llm_limiter.llm_limiters, "get", lambda model: limiter)
+
+    # Hors analyse (CLI du corpus...), un appel n'est pas décompté
+    record_llm_call("test-model")
+    with limiter.acquire(1):
+        record_llm_call("test-model")
+        # Appel doublé : prélevé en plus de la réservation
+        record_llm_call("test-model")
+    assert limiter._bucket.try_acquire(2) == 0
+    assert limiter._bucket.try_acquire(1) > 0
+
+
+class TestLLMLimiter:
+    def test_rejects_when_queue_is_full(self):
+        """Sans place libre ni file d'attente, la requête est refusée immédiatement."""
+        limiter = LLMLimiter("test-model", max_concurrency=1, max_queue=0, max_wait=5)
+        with limiter.acquire():
+            with pytest.raises(LLMOverloadedError) as error:
+                with limiter.acquire():
+                    pass
+        assert error.value.reason == "queue_full"
+        assert error.value.retry_after >= 1
+
+    def test_rejects_after_max_wait(self):
+        """Une requête en file est refusée si aucune place ne se libère à temps."""
+        limiter = LLMLimiter("test-model", max_concurrency=1, max_queue=4, max_wait=0.05)
+        with limiter.acquire():
+            with pytest.raises(LLMOverloadedError) as error:
+                with limiter.acquire():
+                    pass
+        assert error.value.reason == "timeout"
+
+    def test_waiting_request_gets_released_slot(self):
+        """Une requête en file obtient la place libérée par la précédente."""
+        limiter = LLMLimiter("test-model", max_concurrency=1, max_queue=4, max_wait=5)
+        entered = []
+        release = threading.Event()
+
+        def hold_slot():
+            with limiter.acquire():
+                entered.append("first")
+                release.wait()
+
+        holder = threading.Thread(target=hold_slot)
+        holder.start()
+        while not entered:
+            pass
+        threading.Timer(0.05, release.set).start()
+        with limiter.acquire():
+            entered.append("second")
+        holder.join()
+        assert entered == ["first", "second"]
+
+    def test_rate_limit(self):
+        """Au-delà du débit autorisé, la requête est refusée avec le délai avant le prochain jeton."""
+        limiter = LLMLimiter("test-model", requests_per_minute=60, burst=2, max_wait=0.1)
+        with limiter.acquire(tokens=2):
+            pass
+        with pytest.raises(LLMOverloadedError) as error:
+            with limiter.acquire(tokens=2):
+                pass
+        assert error.value.reason == "rate_limited"
+        assert error.value.retry_after == 2
+
+
+def test_registry_merges_limits_per_model():
+    registry = LLMLimiterRegistry(
+        {"default": {"max_queue": 3}, "slow-model": {"max_queue": 1, "max_wait": 2}}
+    )
+    assert registry.get("slow-model").max_queue == 1
+    assert registry.get("slow-model").max_wait == 2
+    assert registry.get("other-model").max_queue == 3
+    assert registry.get("other-model") is registry.get("other-model")
+
+
+def test_analyze_returns_429_with_retry_after(monkeypatch):
+    limiter = LLMLimiter("test-model", max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(llm_limiter.llm_limiters, "get", lambda model: limiter)
+    chords_data = [{"id": 1, "root": "C", "quality": "maj7"}]
+
+    with limiter.acquire():
+        response = TestClient(main.app).post(
+            "/analyze", json={"chords_data": chords_data, "model": "gemini-3-flash-preview"}
+        )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
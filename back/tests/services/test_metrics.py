@@ -0,0 +1,88 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.metrics import (
+    OTHER_MODEL,
+    model_label,
+    record_token_usage,
+    register_cache,
+    track_llm_call,
+    track_stage,
+)
+
+
+@pytest.fixture(autouse=True)
+def allowed_models(monkeypatch):
+    monkeypatch.setenv("GEMINI_ALLOWED_MODELS", "test-model")
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_track_stage_observes_duration():
+    before = _sample("chords_pipeline_stage_duration_seconds_count", stage="test_stage")
+    with track_stage("test_stage"):
+        pass
+    after = _sample("chords_pipeline_stage_duration_seconds_count", stage="test_stage")
+    assert after == before + 1
+
+
+def test_track_llm_call_counts_failures():
+    labels = {"model": "test-model", "step": "analysis"}
+    failures_before = _sample("chords_llm_call_failures_total", **labels)
+    calls_before = _sample("chords_llm_call_duration_seconds_count", **labels)
+
+    with pytest.raises(RuntimeError):
+        with track_llm_call("test-model", "analysis"):
+            raise RuntimeError("boom")
+
+    assert _sample("chords_llm_call_failures_total", **labels) == failures_before + 1
+    assert _sample("chords_llm_call_duration_seconds_count", **labels) == calls_before + 1
+
+
+def test_record_token_usage():
+    response = SimpleNamespace(
+        usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+    )
+    labels = {"model": "test-model", "step": "formatting"}
+    prompt_before = _sample("chords_llm_tokens_total", kind="prompt", **labels)
+
+    record_token_usage("test-model", "formatting", response)
+    record_token_usage("test-model", "formatting", SimpleNamespace())  # Pas de métadonnées
+
+    assert _sample("chords_llm_tokens_total", kind="prompt", **labels) == prompt_before + 120
+    assert _sample("chords_llm_tokens_total", kind="completion", **labels) >= 30
+
+
+def test_unknown_models_share_one_label(monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_MODEL", "hedge-model")
+    assert model_label("test-model") == "test-model"
+    assert model_label("hedge-model") == "hedge-model"
+    assert model_label("") == ""
+    assert model_label("made-up-1") == model_label("made-up-2") == OTHER_MODEL
+
+    labels = {"model": OTHER_MODEL, "step": "analysis"}
+    before = _sample("chords_llm_call_duration_seconds_count", **labels)
+    with track_llm_call("made-up-3", "analysis"):
+        pass
+    assert _sample("chords_llm_call_duration_seconds_count", **labels) == before + 1
+
+
+def test_registered_cache_hit_ratio():
+    @lru_cache
+    def square(x):
+        return x * x
+
+    register_cache("test_square", square.cache_info)
+    square(2)
+    square(2)
+    square(2)
+    square(3)
+
+    assert _sample("chords_cache_hits_total", cache="test_square") == 2
+    assert _sample("chords_cache_misses_total", cache="test_square") == 2
+    assert _sample("chords_cache_hit_ratio", cache="test_square") == 0.5
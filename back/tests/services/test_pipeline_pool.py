@@ -0,0 +1,136 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.schema import ChordItem
+from app.services.pipeline import run_analysis_pipeline
+from app.services.pipeline_pool import PipelinePool, run_pipeline_task
+from app.utils.local_mode_detection import detect_tonic_and_mode_locally
+
+CHORDS = [("D", "m7"), ("G", "7"), ("C", "maj7"), ("A", "m7"), ("F", "maj7"), ("E", "7")]
+
+
+def progression(length):
+    return [
+        ChordItem(id=i, root=CHORDS[i % len(CHORDS)][0], quality=CHORDS[i % len(CHORDS)][1])
+        for i in range(length)
+    ]
+
+
+def local_analysis(progression_data):
+    return detect_tonic_and_mode_locally([f"{c.root}{c.quality}" for c in progression_data])
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        """Exécute la tâche sur place en notant son appel."""
+        self.submitted.append(args)
+        future: Future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+class BrokenExecutor:
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, function, *args):
+        """Tâche échouée comme après la mort d'un worker."""
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool("worker killed"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Note l'arrêt du pool."""
+        self.shut_down = True
+
+
+def test_run_pipeline_task_returns_result_and_stage_timings():
+    progression_data = progression(8)
+    analysis = local_analysis(progression_data)
+    result, timings = run_pipeline_task(progression_data, analysis)
+    assert result == run_analysis_pipeline(progression_data, analysis)
+    assert {"segments_analysis", "harmonization"} <= {stage for stage, _ in timings}
+
+
+def test_small_progressions_stay_inline(monkeypatch):
+    monkeypatch.setenv("PIPELINE_POOL_THRESHOLD", "16")
+    pool = PipelinePool()
+    pool._executor = executor = RecordingExecutor()  # type: ignore[assignment]
+    progression_data = progression(8)
+    pool.run(progression_data, local_analysis(progression_data))
+    assert executor.submitted == []
+
+    progression_data = progression(16)
+    pool.run(progression_data, local_analysis(progression_data))
+    assert len(executor.submitted) == 1
+
+
+def test_disabled_pool_runs_inline(monkeypatch):
+    monkeypatch.setenv("PIPELINE_POOL_WORKERS", "0")
+    pool = PipelinePool()
+    pool.start()
+    assert not pool.started
+    progression_data = progression(40)
+    analysis = local_analysis(progression_data)
+    assert pool.run(progression_data, analysis) == run_analysis_pipeline(progression_data, analysis)
+
+
+def test_long_progressions_run_in_a_worker_process(monkeypatch):
+    monkeypatch.setenv("PIPELINE_POOL_WORKERS", "1")
+    monkeypatch.setenv("PIPELINE_POOL_THRESHOLD", "4")
+    pool = PipelinePool()
+    pool.start()
+    try:
+        progression_data = progression(12)
+        analysis = local_analysis(progression_data)
+        expected = run_analysis_pipeline(progression_data, analysis)
+        assert pool.run(progression_data, analysis) == expected
+    finally:
+        pool.shutdown()
+    assert not pool.started
+
+
+def test_broken_pool_restarts_once_in_background(monkeypatch):
+    monkeypatch.setenv("PIPELINE_POOL_THRESHOLD", "4")
+    pool = PipelinePool()
+    pool._executor = broken = BrokenExecutor()  # type: ignore[assignment]
+    restarts = []
+    restarted = threading.Event()
+    monkeypatch.setattr(pool, "start", lambda: restarts.append(1) or restarted.set())
+    progression_data = progression(12)
+    analysis = local_analysis(progression_data)
+    expected = run_analysis_pipeline(progression_data, analysis)
+
+    # La requête qui constate la panne est servie sur place, les suivantes aussi
+    assert pool.run(progression_data, analysis) == expected
+    assert not pool.started
+    assert pool.run(progression_data, analysis) == expected
+    assert restarted.wait(timeout=5)
+    assert restarts == [1]
+    assert broken.shut_down
+
+
+def test_profiled_analysis_runs_inline(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    progression_data = progression(40)
+    analysis = local_analysis(progression_data)
+    monkeypatch.setattr(main, "detect_with_fallback", lambda progression, model: analysis)
+    ran_in_pool = []
+    monkeypatch.setattr(main.pipeline_pool, "run", lambda *args: ran_in_pool.append(args))
+    response = TestClient(main.app).post(
+        "/admin/profile/analyze",
+        json={
+            "model": "gemini-3-flash-preview",
+            "chords_data": [item.model_dump() for item in progression_data],
+        },
+        headers={"X-Admin-Token": "secret"},
+    )
+    assert response.status_code == 200
+    assert ran_in_pool == []
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import presets
+from app.services.presets import (
+    PRESETS,
+    PresetStore,
+    analyze_preset,
+    get_preset_key,
+    serialize,
+)
+
+
+def test_preset_key_is_normalized():
+    assert get_preset_key("ii-v-i", "Db") == "ii-v-i/C#"
+    with pytest.raises(ValueError):
+        get_preset_key("unknown", "C")
+    with pytest.raises(ValueError):
+        get_preset_key("ii-v-i", "H")
+
+
+def test_preset_analysis_is_diatonic_in_its_mode():
+    result = analyze_preset("ii-v-i", "D")
+    assert result["tonic"] == "D"
+    assert [item["chord"] for item in result["quality_analysis"]] == ["Em7", "A7", "Dmaj7"]
+    assert all(item["is_diatonic"] for item in result["quality_analysis"])
+    assert result["preset"] == {"id": "ii-v-i", "name": "ii–V–I", "key": "D"}
+
+
+class TestPresetStore:
+    def test_serves_the_computed_response(self):
+        """Les réponses servies sont identiques à un calcul direct."""
+        store = PresetStore()
+        assert store.get("pop-axis", "A") == serialize(analyze_preset("pop-axis", "A"))
+        assert json.loads(store.get("andalusian", "Eb"))["tonic"] == "D#"
+
+    def test_responses_are_computed_once(self, monkeypatch):
+        """Chaque réponse n'est calculée qu'une fois, quelle que soit l'orthographe de la tonalité."""
+        calls = []
+
+        def analyze(preset_id, key):
+            calls.append((preset_id, key))
+            return {"tonic": key}
+
+        monkeypatch.setattr(presets, "analyze_preset", analyze)
+        store = PresetStore()
+        assert store.get("ii-v-i", "Gb") == store.get("ii-v-i", "F#") == b'{"tonic":"F#"}'
+        assert calls == [("ii-v-i", "F#")]
+
+
+def test_preset_endpoints(monkeypatch):
+    monkeypatch.setattr(main, "preset_store", PresetStore())
+    client = TestClient(main.app)
+
+    catalog = client.get("/presets").json()
+    assert {preset["id"] for preset in catalog} == set(PRESETS)
+
+    response = client.get("/presets/twelve-bar-blues/G")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["tonic"] == "G"
+    assert len(response.json()["quality_analysis"]) == 12
+
+    assert "error" in client.get("/presets/unknown/C").json()
@@ -0,0 +1,43 @@
+import os
+import time
+
+from app.services.profiling import SamplingProfiler, save_profile
+
+
+def busy_theory_function(duration):
+    end = time.perf_counter() + duration
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy_theory_function(0.1)
+
+    collapsed = profiler.collapsed()
+    assert "busy_theory_function (test_profiling.py:" in collapsed
+
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        # La racine de la pile est à gauche, la feuille à droite
+        assert stack.split(";")[-1] != ""
+
+
+def test_sampling_profiler_leaf_is_profiled_function():
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy_theory_function(0.1)
+
+    hottest_stack = profiler.samples.most_common(1)[0][0]
+    assert "busy_theory_function" in hottest_stack
+
+
+def test_save_profile(tmp_path):
+    path = save_profile("main;analyze 3\n", str(tmp_path / "profiles"))
+
+    assert os.path.dirname(path) == str(tmp_path / "profiles")
+    assert path.endswith(".folded")
+    with open(path, encoding="utf-8") as profile_file:
+        assert profile_file.read() == "main;analyze 3\n"
@@ -0,0 +1,137 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.schema import ChordItem
+from app.services.progression_encoding import (
+    analysis_responses,
+    decode_progression,
+    encode_progression,
+    etag_matches,
+    get_analysis_etag,
+)
+from app.utils.local_mode_detection import detect_tonic_and_mode_locally
+
+LLM_ANALYSIS = {
+    "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": "ii-V-I"},
+    "harmonic_segments": [
+        {"start_index": 0, "end_index": 2, "tonic": "C", "mode": "Ionian", "explanation": ""}
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_responses():
+    analysis_responses.clear()
+    yield
+    analysis_responses.clear()
+
+
+def test_encoding_round_trip():
+    progression_data = [
+        ChordItem(id=1700000000000.0, root="D", quality="m7"),
+        ChordItem(id=2, root="G", quality="7b9#11", inversion=1),
+        ChordItem(id=3, root="Db", quality="maj7", duration=4),
+    ]
+    encoded = encode_progression(progression_data)
+    assert encoded == "Dm7_G7b9#11~1_Dbmaj7*4"
+
+    decoded = decode_progression(encoded)
+    assert [item.id for item in decoded] == [0, 1, 2]
+    assert [(item.root, item.quality, item.inversion, item.duration) for item in decoded] == [
+        ("D", "m7", 0, 2),
+        ("G", "7b9#11", 1, 2),
+        ("Db", "maj7", 0, 4),
+    ]
+    assert encode_progression(decoded) == encoded
+
+
+def test_negative_inversions_round_trip():
+    progression_data = [
+        ChordItem(id=0, root="C", quality="maj7", inversion=-1),
+        ChordItem(id=1, root="G", quality="7", inversion=-3, duration=4),
+    ]
+    encoded = encode_progression(progression_data)
+    assert encoded == "Cmaj7~-1_G7~-3*4"
+    assert [item.inversion for item in decode_progression(encoded)] == [-1, -3]
+    assert encode_progression(decode_progression(encoded)) == encoded
+
+
+def test_canonical_form_ignores_defaults_and_spaces():
+    assert encode_progression(decode_progression(" Dm7~0 _ G7*2 ")) == "Dm7_G7"
+
+
+@pytest.mark.parametrize("encoded", ["Hm7", "Dm7_", "Dm7~x", "Dm7~--1", "Dm7~-", "G7*-1"])
+def test_invalid_progressions(encoded):
+    with pytest.raises(ValueError):
+        decode_progression(encoded)
+
+
+def test_etag_depends_on_progression_and_model():
+    etag = get_analysis_etag("Dm7_G7", "flash")
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == get_analysis_etag("Dm7_G7", "flash")
+    assert etag != get_analysis_etag("Dm7_G7", "pro")
+    assert etag != get_analysis_etag("Dm7_G7_C", "flash")
+
+
+def test_etag_matches():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches('"b"', 'W/"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+class TestGetAnalyze:
+    def client(self, monkeypatch, analysis):
+        """Client de test dont l'analyse LLM est remplacée, avec le décompte des appels."""
+        calls = []
+
+        def detect(progression, model):
+            calls.append(progression)
+            return analysis(progression)
+
+        monkeypatch.setattr(main, "detect_with_fallback", detect)
+        return TestClient(main.app), calls
+
+    def test_conditional_request_skips_analysis(self, monkeypatch):
+        """Un If-None-Match correspondant reçoit un 304 sans nouvelle analyse."""
+        client, calls = self.client(monkeypatch, lambda _: LLM_ANALYSIS)
+        params = {"p": "Dm7_G7_Cmaj7", "model": "gemini-3-flash-preview"}
+
+        response = client.get("/analyze", params=params)
+        assert response.status_code == 200
+        assert response.json()["tonic"] == "C"
+        etag = response.headers["ETag"]
+        assert etag == get_analysis_etag("Dm7_G7_Cmaj7", "gemini-3-flash-preview")
+        assert "max-age" in response.headers["Cache-Control"]
+
+        not_modified = client.get("/analyze", params=params, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+        # Sans en-tête conditionnel : mêmes octets, servis depuis le cache
+        assert client.get("/analyze", params=params).content == response.content
+        assert len(calls) == 1
+
+    def test_local_fallback_is_not_cached(self, monkeypatch):
+        """Une analyse de repli locale n'a pas d'ETag et n'est pas mise en cache."""
+        client, calls = self.client(monkeypatch, detect_tonic_and_mode_locally)
+        params = {"p": "Dm7_G7_Cmaj7", "model": "gemini-3-flash-preview"}
+
+        response = client.get("/analyze", params=params)
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+        assert response.headers["Cache-Control"] == "no-store"
+        client.get("/analyze", params=params)
+        assert len(calls) == 2
+
+    def test_invalid_progression(self, monkeypatch):
+        """Une progression mal encodée renvoie une erreur sans appel au LLM."""
+        client, calls = self.client(monkeypatch, lambda _: LLM_ANALYSIS)
+        response = client.get("/analyze", params={"p": "Xm7", "model": "gemini-3-flash-preview"})
+        assert "error" in response.json()
+        assert calls == []
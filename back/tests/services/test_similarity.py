@@ -0,0 +1,181 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.similarity import (
+    NUM_PERMUTATIONS,
+    LibraryFullError,
+    ProgressionIndex,
+    get_minhash,
+    get_numerals,
+    get_shingles,
+)
+
+JAZZ_TURNAROUND = ["ii7", "V7", "Imaj7", "vi7", "ii7", "V7", "Imaj7"]
+LIBRARY_REQUEST = {
+    "chords_data": [
+        {"id": 1, "root": "D", "quality": "m7"},
+        {"id": 2, "root": "G", "quality": "7"},
+        {"id": 3, "root": "C", "quality": "maj7"},
+    ],
+    "tonic": "C",
+    "title": "ii-V-I",
+}
+
+
+def test_numerals_are_transposition_invariant():
+    in_c = get_numerals(["Dm7", "G7", "Cmaj7"], "C")
+    in_e_flat = get_numerals(["Fm7", "A#7", "D#maj7"], "D#")
+    assert in_c == in_e_flat == ["ii7", "V7", "Imaj7"]
+
+
+def test_shingles():
+    assert get_shingles(["ii7", "V7", "Imaj7", "vi7"]) == {"ii7|V7|Imaj7", "V7|Imaj7|vi7"}
+    assert get_shingles(["ii7", "V7"]) == {"ii7|V7"}
+    assert get_shingles([]) == frozenset()
+
+
+def test_minhash_is_deterministic():
+    signature = get_minhash(get_shingles(JAZZ_TURNAROUND))
+    assert len(signature) == NUM_PERMUTATIONS
+    assert signature == get_minhash(get_shingles(list(JAZZ_TURNAROUND)))
+
+
+class TestProgressionIndex:
+    def build_index(self, path=None):
+        """Bibliothèque de test : une progression proche, une différente."""
+        index = ProgressionIndex(path)
+        index.add("turnaround", JAZZ_TURNAROUND, title="Turnaround")
+        index.add("blues", ["I7", "IV7", "I7", "I7", "IV7", "IV7", "I7", "V7"], title="Blues")
+        return index
+
+    def test_query_finds_identical_progression(self):
+        """Une progression identique est retrouvée avec une similarité de 1."""
+        results = self.build_index().query(JAZZ_TURNAROUND)
+        assert results[0]["id"] == "turnaround"
+        assert results[0]["similarity"] == 1.0
+        assert results[0]["title"] == "Turnaround"
+
+    def test_query_ranks_close_progressions_first(self):
+        """Une variante proche est mieux classée, les progressions sans rapport sont absentes."""
+        index = self.build_index()
+        index.add("variant", ["ii7", "V7", "Imaj7", "vi7", "ii7", "V7", "Imaj7", "IVmaj7"])
+        ids = [result["id"] for result in index.query(JAZZ_TURNAROUND)]
+        assert ids[:2] == ["turnaround", "variant"]
+        assert "blues" not in ids
+
+    def test_min_similarity_and_top_k(self):
+        """Les résultats sont filtrés par similarité minimale et limités à top_k."""
+        index = self.build_index()
+        for i in range(5):
+            index.add(f"copy-{i}", JAZZ_TURNAROUND)
+        assert len(index.query(JAZZ_TURNAROUND, top_k=3)) == 3
+        assert index.query(["bIImaj7", "bVImaj7"], min_similarity=0.5) == []
+
+    def test_persistence(self, tmp_path):
+        """Les progressions ajoutées sont rechargées depuis le fichier de la bibliothèque."""
+        path = str(tmp_path / "library.jsonl")
+        self.build_index(path)
+
+        reloaded = ProgressionIndex(path)
+        assert reloaded.load() == 2
+        assert len(reloaded) == 2
+        assert reloaded.query(JAZZ_TURNAROUND)[0]["id"] == "turnaround"
+
+    def test_load_without_file(self, tmp_path):
+        """Sans fichier, la bibliothèque démarre vide."""
+        assert ProgressionIndex(str(tmp_path / "missing.jsonl")).load() == 0
+        assert ProgressionIndex().load() == 0
+
+    def test_empty_numerals_are_rejected(self):
+        """Une progression sans chiffrage n'est pas indexée et ne retrouve rien."""
+        index = self.build_index()
+        with pytest.raises(ValueError):
+            index.add("empty", [])
+        assert len(index) == 2
+        assert index.query([]) == []
+
+    def test_max_size(self, tmp_path):
+        """Au-delà de `max_size`, les ajouts sont refusés et le fichier ne grossit plus."""
+        path = tmp_path / "library.jsonl"
+        index = ProgressionIndex(str(path), max_size=2)
+        index.add("turnaround", JAZZ_TURNAROUND)
+        index.add("copy", JAZZ_TURNAROUND)
+        with pytest.raises(LibraryFullError):
+            index.add("overflow", JAZZ_TURNAROUND)
+        assert len(index) == 2
+        assert len(path.read_text().splitlines()) == 2
+
+    def test_load_stops_at_max_size(self, tmp_path):
+        """Un fichier plus grand que `max_size` ne contourne pas la limite."""
+        path = str(tmp_path / "library.jsonl")
+        self.build_index(path)
+        reloaded = ProgressionIndex(path, max_size=1)
+        assert reloaded.load() == 1
+        assert len(reloaded) == 1
+
+    def test_load_skips_malformed_lines(self, tmp_path):
+        """Les lignes illisibles sont ignorées sans interrompre le chargement."""
+        path = tmp_path / "library.jsonl"
+        self.build_index(str(path))
+        lines = path.read_text().splitlines()
+        malformed = [
+            "{not json",
+            json.dumps({"numerals": JAZZ_TURNAROUND}),  # Sans identifiant
+            json.dumps(["ii7", "V7"]),
+            json.dumps({"id": "bad-signature", "numerals": ["I"], "signature": [-1] * 64}),
+        ]
+        path.write_text("\n".join([lines[0], *malformed, lines[1]]) + "\n")
+
+        reloaded = ProgressionIndex(str(path))
+        assert reloaded.load() == 2
+        assert len(reloaded) == 2
+        assert reloaded.query(JAZZ_TURNAROUND)[0]["id"] == "turnaround"
+
+
+class TestAddLibraryProgressionEndpoint:
+    @pytest.fixture(autouse=True)
+    def library(self, monkeypatch):
+        """Bibliothèque vide en mémoire et jeton d'administration de test."""
+        index = ProgressionIndex(max_size=1)
+        monkeypatch.setattr(main, "progression_library", index)
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        return index
+
+    def post(self, json, token="secret"):
+        """Ajoute une progression via l'API."""
+        headers = {"X-Admin-Token": token} if token else {}
+        return TestClient(main.app).post("/library/progressions", json=json, headers=headers)
+
+    def test_requires_admin_token(self, library):
+        """Sans jeton d'administration, rien n'est ajouté."""
+        assert self.post(LIBRARY_REQUEST, token=None).status_code == 403
+        assert self.post(LIBRARY_REQUEST, token="wrong").status_code == 403
+        assert len(library) == 0
+
+    def test_adds_progression(self, library):
+        """Avec le jeton, la progression est indexée par ses chiffrages."""
+        response = self.post(LIBRARY_REQUEST)
+        assert response.status_code == 200
+        assert response.json()["numerals"] == ["ii7", "V7", "Imaj7"]
+        assert len(library) == 1
+
+    def test_full_library(self):
+        """Une bibliothèque pleine refuse l'ajout (507)."""
+        self.post(LIBRARY_REQUEST)
+        assert self.post(LIBRARY_REQUEST).status_code == 507
+
+    def test_title_length_is_bounded(self, library):
+        """Un titre trop long est refusé (422)."""
+        response = self.post({**LIBRARY_REQUEST, "title": "x" * 1000})
+        assert response.status_code == 422
+        assert len(library) == 0
+
+    def test_unrecognized_chords_are_rejected(self, library):
+        """Une progression sans accord reconnu n'est pas ajoutée."""
+        chords_data = [{"id": 1, "root": "H", "quality": "m7"}]
+        response = self.post({**LIBRARY_REQUEST, "chords_data": chords_data})
+        assert "error" in response.json()
+        assert len(library) == 0
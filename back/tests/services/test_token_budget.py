@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.token_budget import (
+    TokenBudgetExceededError,
+    add_token_usage,
+    fit_to_budget,
+    track_token_usage,
+)
+from app.services.windowed_analysis import detect_by_windows
+
+
+class FakeResponse:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.usage_metadata = type(
+            "Usage",
+            (),
+            {"prompt_token_count": prompt_tokens, "candidates_token_count": completion_tokens},
+        )()
+
+
+def test_usage_outside_a_request_is_ignored():
+    add_token_usage(FakeResponse(10, 5))
+
+
+def test_usage_is_summed_across_window_threads():
+    """Les appels des fenêtres, exécutés dans d'autres threads, sont comptés dans la requête."""
+    threads = set()
+
+    def detect(window, model):
+        threads.add(threading.get_ident())
+        add_token_usage(FakeResponse(100, 20))
+        return {
+            "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": ""},
+            "harmonic_segments": [
+                {"start_index": 0, "end_index": len(window) - 1, "tonic": "C", "mode": "Ionian"}
+            ],
+        }
+
+    with track_token_usage() as usage:
+        detect_by_windows([f"C{i}" for i in range(60)], "model", detect, [(0, 31), (28, 59)])
+    assert threading.get_ident() not in threads
+    assert (usage.calls, usage.prompt_tokens, usage.completion_tokens) == (2, 200, 40)
+    assert usage.total_tokens == 240
+
+
+class TestFitToBudget:
+    def test_no_budget_or_under_budget(self):
+        """Sans budget ou sous le budget, toute la progression est analysée."""
+        assert fit_to_budget(["C"] * 10, len, budget=None) == 10
+        assert fit_to_budget(["C"] * 10, len, budget=10) == 10
+
+    def test_reject_policy(self):
+        """Politique "reject" : la progression trop longue est refusée."""
+        with pytest.raises(TokenBudgetExceededError) as exc_info:
+            fit_to_budget(["C"] * 10, len, budget=4, policy="reject")
+        assert exc_info.value.estimated_tokens == 10
+
+    def test_truncate_policy(self):
+        """Politique "truncate" : le plus long début qui tient dans le budget."""
+        assert fit_to_budget(["C"] * 10, lambda chords: 2 * len(chords), 9, "truncate") == 4
+
+    def test_truncate_policy_needs_at_least_one_chord(self):
+        """Si même un seul accord dépasse le budget, la requête est refusée."""
+        with pytest.raises(TokenBudgetExceededError):
+            fit_to_budget(["C"] * 10, lambda chords: 100, 10, "truncate")
+
+
+def test_token_usage_header(monkeypatch):
+    def detect(progression, model):
+        add_token_usage(FakeResponse(120, 30))
+        return {
+            "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": ""},
+            "harmonic_segments": [
+                {
+                    "start_index": 0,
+                    "end_index": 2,
+                    "tonic": "C",
+                    "mode": "Ionian",
+                    "explanation": "",
+                }
+            ],
+        }
+
+    monkeypatch.setattr(main, "detect_with_fallback", detect)
+    chords_data = [
+        {"id": 0, "root": "D", "quality": "m7"},
+        {"id": 1, "root": "G", "quality": "7"},
+        {"id": 2, "root": "C", "quality": "maj7"},
+    ]
+    response = TestClient(main.app).post(
+        "/analyze", json={"chords_data": chords_data, "model": "gemini-3-flash-preview"}
+    )
+    assert response.headers["X-LLM-Tokens"] == "prompt=120, completion=30"
+    assert "X-LLM-Tokens" not in TestClient(main.app).get("/presets").headers
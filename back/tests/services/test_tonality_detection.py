@@ -0,0 +1,139 @@
+import pytest
+
+from app.services import tonality_detection
+from app.services.circuit_breaker import OPEN, circuit_breakers
+from app.services.llm_limiter import LLMLimiter, LLMOverloadedError, llm_limiters
+from app.services.token_budget import TokenBudgetExceededError
+from app.services.tonality_detection import analysis_cache, detect_with_fallback
+
+PROGRESSION = ["Dm7", "G7", "Cmaj7"]
+LLM_ANALYSIS = {
+    "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": "ii-V-I"},
+    "harmonic_segments": [
+        {"start_index": 0, "end_index": 2, "tonic": "C", "mode": "Ionian", "explanation": ""}
+    ],
+}
+ERROR_ANALYSIS = {
+    "global_analysis": {"tonic": "Error", "mode": "Error", "explanation": "Failed to parse"},
+    "harmonic_segments": [],
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    circuit_breakers.clear()
+    analysis_cache.clear()
+    yield
+    circuit_breakers.clear()
+    analysis_cache.clear()
+
+
+def fake_detector(results):
+    calls = []
+
+    def detect(progression, model):
+        calls.append(progression)
+        result = results[min(len(calls), len(results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return detect, calls
+
+
+def test_successful_analysis_is_cached(monkeypatch):
+    detect, _ = fake_detector([LLM_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    assert detect_with_fallback(PROGRESSION, "test-model") == LLM_ANALYSIS
+    assert analysis_cache.get(PROGRESSION, "test-model") == LLM_ANALYSIS
+    assert analysis_cache.get(PROGRESSION, "other-model") is None
+
+
+def test_error_tonic_falls_back_to_local_detection(monkeypatch):
+    detect, _ = fake_detector([ERROR_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    result = detect_with_fallback(PROGRESSION, "test-model")
+    assert result["global_analysis"]["tonic"] == "C"
+    assert result["harmonic_segments"][0]["end_index"] == 2
+
+
+def test_failure_falls_back_to_cache(monkeypatch):
+    detect, _ = fake_detector([LLM_ANALYSIS, RuntimeError("503")])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    detect_with_fallback(PROGRESSION, "test-model")
+    assert detect_with_fallback(PROGRESSION, "test-model") == LLM_ANALYSIS
+
+
+def test_cache_fallback_does_not_cross_models(monkeypatch):
+    detect, _ = fake_detector([LLM_ANALYSIS, RuntimeError("503")])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    detect_with_fallback(PROGRESSION, "test-model")
+    # L'autre modèle échoue : repli local, pas l'analyse de "test-model"
+    result = detect_with_fallback(PROGRESSION, "other-model")
+    assert result != LLM_ANALYSIS
+    assert result["source"] == "local"
+
+
+def test_open_circuit_fails_fast(monkeypatch):
+    detect, calls = fake_detector([RuntimeError("503")])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    for _ in range(3):
+        detect_with_fallback(PROGRESSION, "test-model")
+    assert circuit_breakers.get("test-model").state == OPEN
+
+    # Disjoncteur ouvert : plus aucun appel au LLM, réponse locale immédiate
+    result = detect_with_fallback(PROGRESSION, "test-model")
+    assert len(calls) == 3
+    assert result["global_analysis"]["tonic"] == "C"
+
+
+def test_overloaded_limiter_is_not_a_failure(monkeypatch):
+    detect, calls = fake_detector([LLM_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    limiter = LLMLimiter("test-model", max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(llm_limiters, "get", lambda model: limiter)
+
+    with limiter.acquire():
+        for _ in range(5):
+            with pytest.raises(LLMOverloadedError):
+                detect_with_fallback(PROGRESSION, "test-model")
+    assert calls == []
+    assert circuit_breakers.get("test-model").allow_request()
+
+
+def test_reserves_the_calls_of_the_prompt_style(monkeypatch):
+    detect, _ = fake_detector([LLM_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    limiter = LLMLimiter("test-model")
+    reserved = []
+    acquire = limiter.acquire
+    monkeypatch.setattr(limiter, "acquire", lambda calls: reserved.append(calls) or acquire(calls))
+    monkeypatch.setattr(llm_limiters, "get", lambda model: limiter)
+
+    monkeypatch.setenv("LLM_PROMPT_STYLE", "full")
+    detect_with_fallback(PROGRESSION, "test-model")
+    monkeypatch.setenv("LLM_PROMPT_STYLE", "compact")
+    detect_with_fallback(PROGRESSION, "test-model")
+    assert reserved == [2, 1]
+
+
+def test_token_budget_rejects_oversized_progression(monkeypatch):
+    detect, calls = fake_detector([LLM_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "10")
+    with pytest.raises(TokenBudgetExceededError):
+        detect_with_fallback(PROGRESSION, "test-model")
+    assert calls == []
+
+
+def test_token_budget_truncates_progression(monkeypatch):
+    detect, calls = fake_detector([LLM_ANALYSIS])
+    monkeypatch.setattr(tonality_detection, "detect_tonic_and_mode", detect)
+    monkeypatch.setattr(tonality_detection, "estimate_request_tokens", len)
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "3")
+    monkeypatch.setenv("LLM_TOKEN_BUDGET_POLICY", "truncate")
+
+    result = detect_with_fallback([*PROGRESSION, "Am7", "D7"], "test-model")
+    assert calls == [PROGRESSION]
+    assert result["harmonic_segments"][-1]["end_index"] == 4
+    assert "3 premiers accords" in result["global_analysis"]["explanation"]
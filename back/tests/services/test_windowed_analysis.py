@@ -0,0 +1,116 @@
+import threading
+import time
+
+from app.services.windowed_analysis import detect_by_windows, get_windows, stitch_segments
+
+
+def segment(start, end, tonic, mode="Ionian"):
+    return {
+        "start_index": start,
+        "end_index": end,
+        "tonic": tonic,
+        "mode": mode,
+        "explanation": f"{tonic} {mode}",
+    }
+
+
+def analysis(tonic, segments, mode="Ionian"):
+    return {
+        "global_analysis": {"tonic": tonic, "mode": mode, "explanation": f"{tonic} {mode}"},
+        "harmonic_segments": segments,
+    }
+
+
+def test_short_progression_is_a_single_window():
+    assert get_windows(10, size=32, overlap=8) == [(0, 9)]
+    assert get_windows(32, size=32, overlap=8) == [(0, 31)]
+
+
+def test_windows_overlap_and_cover_the_end():
+    assert get_windows(60, size=32, overlap=8) == [(0, 31), (24, 55), (28, 59)]
+    assert get_windows(56, size=32, overlap=8) == [(0, 31), (24, 55)]
+
+
+class TestStitchSegments:
+    def test_segment_crossing_a_window_edge_is_merged(self):
+        """Un même centre tonal vu par deux fenêtres devient un seul segment."""
+        windows = [(0, 31), (24, 55)]
+        results = [
+            analysis("C", [segment(0, 15, "C"), segment(16, 31, "G")]),
+            analysis("G", [segment(0, 11, "G"), segment(12, 31, "Eb")]),
+        ]
+        stitched = stitch_segments(windows, results, 56)
+        assert [(s["start_index"], s["end_index"], s["tonic"]) for s in stitched] == [
+            (0, 15, "C"),
+            (16, 35, "G"),
+            (36, 55, "Eb"),
+        ]
+
+    def test_enharmonic_tonics_are_merged(self):
+        """Les toniques sont comparées par hauteur (D# = Eb)."""
+        windows = [(0, 31), (24, 55)]
+        results = [
+            analysis("D#", [segment(0, 31, "D#")]),
+            analysis("Eb", [segment(0, 31, "Eb")]),
+        ]
+        stitched = stitch_segments(windows, results, 56)
+        assert [(s["start_index"], s["end_index"]) for s in stitched] == [(0, 55)]
+
+    def test_gaps_and_overlaps_are_repaired(self):
+        """Les trous sont comblés par le segment précédent, la segmentation couvre tout."""
+        windows = [(0, 31), (24, 55)]
+        results = [
+            analysis("C", [segment(2, 10, "C"), segment(8, 20, "A", "Aeolian")]),
+            analysis("F", [segment(10, 31, "F")]),
+        ]
+        stitched = stitch_segments(windows, results, 56)
+        assert [(s["start_index"], s["end_index"], s["tonic"]) for s in stitched] == [
+            (0, 10, "C"),
+            (11, 33, "A"),
+            (34, 55, "F"),
+        ]
+
+
+def test_detect_by_windows_runs_windows_concurrently():
+    progression = [f"C{i}" for i in range(60)]
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def detect(window, model):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        tonic = "C" if window[0] == "C0" else "G"
+        return analysis(tonic, [segment(0, len(window) - 1, tonic)])
+
+    result = detect_by_windows(progression, "model", detect, get_windows(60, 32, 8))
+    assert peak[0] == 3
+    assert result["global_analysis"]["tonic"] == "G"
+    segments = result["harmonic_segments"]
+    assert (segments[0]["start_index"], segments[-1]["end_index"]) == (0, 59)
+
+
+def test_detect_by_windows_propagates_failed_window():
+    def detect(window, model):
+        if window[0] == "C24":
+            return analysis("Error", [], mode="Error")
+        return analysis("C", [segment(0, len(window) - 1, "C")])
+
+    progression = [f"C{i}" for i in range(56)]
+    result = detect_by_windows(progression, "model", detect, get_windows(56, 32, 8))
+    assert result["global_analysis"]["tonic"] == "Error"
+
+
+def test_short_progression_is_analyzed_in_one_call():
+    calls = []
+
+    def detect(window, model):
+        calls.append(window)
+        return analysis("C", [segment(0, 2, "C")])
+
+    result = detect_by_windows(["Dm7", "G7", "Cmaj7"], "model", detect)
+    assert calls == [["Dm7", "G7", "Cmaj7"]]
+    assert result["global_analysis"]["tonic"] == "C"
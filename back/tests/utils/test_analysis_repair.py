@@ -0,0 +1,139 @@
+import pytest
+
+from app.schema import ChordItem
+from app.services.pipeline import run_analysis_pipeline
+from app.utils.analysis_repair import (
+    find_analysis_issues,
+    get_dominant_segment,
+    normalize_mode,
+    normalize_tonic,
+    repair_analysis,
+)
+
+
+def segment(start, end, tonic="C", mode="Ionian"):
+    return {
+        "start_index": start,
+        "end_index": end,
+        "tonic": tonic,
+        "mode": mode,
+        "explanation": f"{tonic} {mode}",
+    }
+
+
+def analysis(segments, tonic="C", mode="Ionian"):
+    return {
+        "global_analysis": {"tonic": tonic, "mode": mode, "explanation": "x"},
+        "harmonic_segments": segments,
+    }
+
+
+def bounds(result):
+    return [
+        (s["start_index"], s["end_index"], s["tonic"], s["mode"])
+        for s in result["harmonic_segments"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Eb", "Eb"),
+        ("Ebb", "D"),
+        ("f#", "F#"),
+        ("A minor", "A"),
+        ("B♭", "Bb"),
+        ("C##", "D"),
+        ("E#", "F"),
+    ],
+)
+def test_normalize_tonic(value, expected):
+    assert normalize_tonic(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Dorian", "Dorian"),
+        ("dorian mode", "Dorian"),
+        ("Major", "Ionian"),
+        ("natural minor", "Aeolian"),
+        ("Locrian natural 6", "Locrian ♮6"),
+        ("altered", "Altered Scale"),
+        ("harmonic-minor", "Harmonic Minor"),
+    ],
+)
+def test_normalize_mode(value, expected):
+    assert normalize_mode(value) == expected
+
+
+@pytest.mark.parametrize("value", ["Blues", "", None])
+def test_unknown_mode_is_rejected(value):
+    with pytest.raises(ValueError):
+        normalize_mode(value)
+
+
+def test_valid_analysis_is_returned_unchanged():
+    result = analysis([segment(0, 3), segment(4, 7, "A", "Aeolian")])
+    assert find_analysis_issues(result, 8) == []
+    assert repair_analysis(result, 8) is result
+
+
+def test_gaps_overlaps_and_out_of_range_indices_are_repaired():
+    result = analysis(
+        [segment(5, 12, "A", "Aeolian"), segment("1", 6), segment(6, 4, "F", "Lydian")]
+    )
+    repaired = repair_analysis(result, 8)
+    assert find_analysis_issues(repaired, 8) == []
+    assert bounds(repaired) == [(0, 6, "C", "Ionian"), (7, 7, "A", "Aeolian")]
+
+
+def test_modes_and_tonics_are_normalized():
+    result = analysis([segment(0, 3, "Ebb", "minor"), segment(4, 7, "g", "mixolydian")], "Ebb")
+    repaired = repair_analysis(result, 8)
+    assert bounds(repaired) == [(0, 3, "D", "Aeolian"), (4, 7, "G", "Mixolydian")]
+    assert repaired["global_analysis"]["tonic"] == "D"
+
+
+def test_unusable_segments_are_dropped():
+    result = analysis([segment(0, 3, "X"), segment(4, 7, "G", "Blues"), segment(2, 5, "F")])
+    assert bounds(repair_analysis(result, 8)) == [(0, 7, "F", "Ionian")]
+
+
+def test_global_analysis_is_rebuilt_from_segments():
+    result = analysis([segment(0, 1), segment(2, 7, "A", "Aeolian")], tonic=None)
+    global_analysis = repair_analysis(result, 8)["global_analysis"]
+    assert (global_analysis["tonic"], global_analysis["mode"]) == ("A", "Aeolian")
+
+
+def test_missing_segments_cover_the_progression_with_the_global_key():
+    repaired = repair_analysis(analysis([], "G", "Dorian"), 8)
+    assert bounds(repaired) == [(0, 7, "G", "Dorian")]
+
+
+def test_irreparable_analysis_becomes_an_error():
+    repaired = repair_analysis({"harmonic_segments": [segment(0, 3, "X")]}, 8)
+    assert repaired["global_analysis"]["tonic"] == "Error"
+    assert repaired["harmonic_segments"] == []
+
+
+def test_repaired_analysis_runs_through_the_pipeline():
+    chords = [("D", "m7"), ("G", "7"), ("C", "maj7"), ("A", "m7")]
+    progression_data = [
+        ChordItem(id=i, root=root, quality=quality) for i, (root, quality) in enumerate(chords)
+    ]
+    result = analysis([segment(2, 9, "c", "major")], tonic="C", mode="major")
+    response = run_analysis_pipeline(progression_data, repair_analysis(result, len(chords)))
+    assert response["tonic"] == "C"
+    assert len(response["quality_analysis"]) == len(chords)
+
+
+def test_dominant_segment_sums_coverage_across_spellings():
+    segments = [
+        segment(0, 3, "C#", "Aeolian"),
+        segment(4, 8, "E", "Ionian"),
+        segment(9, 11, "Db", "Aeolian"),
+    ]
+    # C# et Db Aeolian couvrent 7 accords à eux deux, E Ionian 5
+    assert get_dominant_segment(segments) == segments[0]
+    assert get_dominant_segment([]) is None
@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.schema import ChordItem
+from app.utils.chord_validation import (
+    InvalidProgressionError,
+    check_chord,
+    ensure_valid_progression,
+    validate_progression,
+)
+
+
+def chords(*names):
+    return [ChordItem(id=i, root=root, quality=quality) for i, (root, quality) in enumerate(names)]
+
+
+@pytest.mark.parametrize(
+    "root, quality", [("C", ""), ("Db", "m7"), ("F#", "7b9#11"), ("Bb", "min7"), ("E", "ø")]
+)
+def test_known_chords_are_valid(root, quality):
+    assert check_chord(root, quality) is None
+
+
+def test_unknown_root_suggests_note_names():
+    issue = check_chord("H", "7")
+    assert issue["severity"] == "error"
+    assert issue["suggestions"] == ["B7"]
+    assert check_chord("c", "maj7")["suggestions"] == ["Cmaj7"]
+
+
+@pytest.mark.parametrize("root", ["B#", "Fb", "Cb"])
+def test_enharmonic_roots_accepted_by_parse_chord_are_valid(root):
+    assert check_chord(root, "") is None
+    assert check_chord(root, "m7") is None
+
+
+@pytest.mark.parametrize(
+    "root, quality, suggestion", [("E#", "", "F"), ("E#", "m7", "Fm7"), ("e#", "7", "F7")]
+)
+def test_unsupported_root_suggests_its_enharmonic(root, quality, suggestion):
+    issue = check_chord(root, quality)
+    assert issue["severity"] == "error"
+    assert "Fondamentale" in issue["reason"]
+    assert issue["suggestions"] == [suggestion]
+
+
+def test_unknown_quality_suggests_close_qualities():
+    issue = check_chord("C", "maj8")
+    assert issue["severity"] == "error"
+    assert "Cmaj7" in issue["suggestions"]
+
+
+def test_misread_quality_is_a_warning():
+    issue = check_chord("C", "7(no5)")
+    assert issue["severity"] == "warning"
+    assert issue["parsed"] == "C"
+
+
+def test_validate_progression_reports_indices():
+    report = validate_progression(chords(("D", "m7"), ("H", "7"), ("C", "7(no5)"), ("C", "xx")))
+    assert [error["index"] for error in report["errors"]] == [1, 3]
+    assert report["errors"][0]["chord"] == "H7"
+    assert [warning["index"] for warning in report["warnings"]] == [2]
+
+
+def test_ensure_valid_progression():
+    ensure_valid_progression(chords(("D", "m7"), ("G", "7")))
+    with pytest.raises(InvalidProgressionError) as exc_info:
+        ensure_valid_progression(chords(("D", "m7"), ("H", "7")))
+    assert exc_info.value.errors[0]["index"] == 1
+
+
+def test_analyze_rejects_invalid_chords_before_llm_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "detect_with_fallback", lambda *args: calls.append(args))
+    body = {
+        "model": "gemini-3-flash-preview",
+        "chords_data": [
+            {"id": 0, "root": "D", "quality": "m7"},
+            {"id": 1, "root": "H", "quality": "7"},
+        ],
+    }
+    response = TestClient(main.app).post("/analyze", json=body)
+    assert response.status_code == 422
+    assert response.json()["invalid_chords"][0]["index"] == 1
+    assert response.json()["invalid_chords"][0]["suggestions"] == ["B7"]
+    assert calls == []
+
+
+def test_validate_endpoint():
+    body = {
+        "chords_data": [
+            {"id": 0, "root": "D", "quality": "m7"},
+            {"id": 1, "root": "G", "quality": "7"},
+        ]
+    }
+    response = TestClient(main.app).post("/validate", json=body)
+    assert response.json() == {"valid": True, "errors": [], "warnings": []}
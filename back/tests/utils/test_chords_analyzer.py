@@ -1,4 +1,4 @@
-from app.utils.chords_analyzer import analyze_chord_in_context
+from app.utils.chords_analyzer import analyze_chord, analyze_chord_in_context
 
 
 def test_analyze_diatonic_major_triad():
@@ -118,3 +118,16 @@ def test_analyze_borrowed_chord_from_parallel_minor():
         "is_diatonic": False,
     }
     assert result == expected
+
+
+def test_analyze_chord_records_are_shared_and_match_dicts():
+    record = analyze_chord("Dm7", 0, "Ionian")
+    assert analyze_chord("Dm7", 0, "Ionian") is record
+    assert record.to_json() == analyze_chord_in_context("Dm7", 0, "Ionian")
+    assert record["found_numeral"] == record.get("found_numeral") == "ii7"
+    assert record.get("segment_context", {}) == {}
+
+
+def test_analyze_chord_in_context_returns_a_fresh_dict():
+    analyze_chord_in_context("G7", 0, "Ionian")["chord"] = "X"
+    assert analyze_chord_in_context("G7", 0, "Ionian")["chord"] == "G7"
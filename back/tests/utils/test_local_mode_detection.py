@@ -0,0 +1,20 @@
+from app.utils.local_mode_detection import detect_tonic_and_mode_locally
+
+
+def test_detects_major_key():
+    result = detect_tonic_and_mode_locally(["Am7", "Dm7", "G7", "Cmaj7"])
+    assert result["global_analysis"]["tonic"] == "C"
+    assert result["global_analysis"]["mode"] == "Ionian"
+
+
+def test_detects_minor_key_from_cadence():
+    result = detect_tonic_and_mode_locally(["Am", "Dm", "E7", "Am"])
+    assert result["global_analysis"]["tonic"] == "A"
+    assert result["global_analysis"]["mode"] == "Harmonic Minor"
+
+
+def test_single_segment_covers_progression():
+    progression = ["C", "F", "G7", "C", "Unknown"]
+    segments = detect_tonic_and_mode_locally(progression)["harmonic_segments"]
+    assert len(segments) == 1
+    assert (segments[0]["start_index"], segments[0]["end_index"]) == (0, 4)
@@ -0,0 +1,105 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import mode_detection_gemini
+from app.utils.mode_detection_gemini import (
+    MODE_NAMES,
+    build_analysis_prompt,
+    build_compact_prompt,
+    detect_tonic_and_mode,
+    estimate_prompt_tokens,
+    parse_compact_analysis,
+)
+
+PROGRESSION = ["Dm7", "G7", "Cmaj7", "Am7"]
+
+
+def test_compact_prompt_is_much_shorter():
+    compact = build_compact_prompt(PROGRESSION)
+    assert "0:Dm7 1:G7 2:Cmaj7 3:Am7" in compact
+    assert f"0={MODE_NAMES[0]}" in compact
+    assert len(compact) < len(build_analysis_prompt(PROGRESSION))
+    # Une seule étape au lieu de deux : moins de la moitié des tokens de prompt
+    assert 2 * estimate_prompt_tokens(PROGRESSION, "compact") < estimate_prompt_tokens(
+        PROGRESSION, "full"
+    )
+
+
+def test_parse_compact_analysis():
+    text = "```\nG|C|0|ii-V-I en do majeur\nS|0|3|C|0|Cadence | puis relatif mineur\n```"
+    result = parse_compact_analysis(text)
+    assert result["global_analysis"] == {
+        "tonic": "C",
+        "mode": MODE_NAMES[0],
+        "explanation": "ii-V-I en do majeur",
+    }
+    assert result["harmonic_segments"] == [
+        {
+            "start_index": 0,
+            "end_index": 3,
+            "tonic": "C",
+            "mode": MODE_NAMES[0],
+            "explanation": "Cadence | puis relatif mineur",
+        }
+    ]
+
+
+def test_parse_compact_analysis_accepts_mode_names():
+    result = parse_compact_analysis("G|A|Aeolian|x\nS|0|3|A|Aeolian|x")
+    assert result["global_analysis"]["mode"] == "Aeolian"
+
+
+@pytest.mark.parametrize("text", ["", "G|C|0|x", "G|C|42|x\nS|0|3|C|0|x", "Analyse : do majeur"])
+def test_parse_compact_analysis_rejects_invalid_answers(text):
+    with pytest.raises(ValueError):
+        parse_compact_analysis(text)
+
+
+class FakeModel:
+    def __init__(self, answers):
+        self.answers = answers
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        """Renvoie les réponses prévues, dans l'ordre."""
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.answers[len(self.prompts) - 1])
+
+
+def test_compact_style_needs_a_single_call(monkeypatch):
+    model = FakeModel(["G|C|0|x\nS|0|3|C|0|x"])
+    monkeypatch.setattr(mode_detection_gemini.gemini_clients, "get", lambda name: model)
+    result = detect_tonic_and_mode(PROGRESSION, "model", style="compact")
+    assert result["global_analysis"]["tonic"] == "C"
+    assert len(model.prompts) == 1
+
+
+def test_compact_style_falls_back_to_json_formatting(monkeypatch):
+    payload = {
+        "global_analysis": {"tonic": "C", "mode": "Ionian", "explanation": "x"},
+        "harmonic_segments": [
+            {"start_index": 0, "end_index": 3, "tonic": "C", "mode": "Ionian", "explanation": "x"}
+        ],
+    }
+    model = FakeModel(["Do majeur, cadence ii-V-I.", json.dumps(payload)])
+    monkeypatch.setattr(mode_detection_gemini.gemini_clients, "get", lambda name: model)
+    assert detect_tonic_and_mode(PROGRESSION, "model", style="compact") == payload
+    assert "Do majeur, cadence ii-V-I." in model.prompts[1]
+
+
+def test_malformed_json_analysis_is_repaired_without_another_call(monkeypatch):
+    payload = {
+        "global_analysis": {"tonic": "C", "mode": "major", "explanation": "x"},
+        "harmonic_segments": [
+            {"start_index": 1, "end_index": 9, "tonic": "C", "mode": "Ionian", "explanation": ""}
+        ],
+    }
+    model = FakeModel(["Do majeur.", json.dumps(payload)])
+    monkeypatch.setattr(mode_detection_gemini.gemini_clients, "get", lambda name: model)
+    result = detect_tonic_and_mode(PROGRESSION, "model", style="full")
+    assert result["global_analysis"]["mode"] == "Ionian"
+    segments = result["harmonic_segments"]
+    assert (segments[0]["start_index"], segments[-1]["end_index"]) == (0, len(PROGRESSION) - 1)
+    assert len(model.prompts) == 2
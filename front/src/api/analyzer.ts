@@ -1,8 +1,143 @@
 import api from "@/helpers/axios-wrapper.ts";
+import { APISettings } from "@/api/config.ts";
+
+const DEFAULT_DURATION = 2;
+
+// Format compact de /analyze (voir back/app/services/compact_format.py) :
+// tables de lignes dédupliquées et index par mode, décodé à la demande
+export const COMPACT_MEDIA_TYPE = "application/vnd.chords.compact+json";
+const COMPACT_FORMAT = "compact/1";
+const ITEM_FIELDS = ["id", "inversion", "duration", "notes"];
+
+// Forme canonique et compacte d'une progression pour GET /analyze
+// (ex: Dm7_G7~1_Cmaj7*4) : une même progression donne toujours la même URL,
+// que nginx ou un CDN peut mettre en cache. Les notes personnalisées ne sont
+// pas encodées (utiliser POST /analyze).
+export function encodeProgression(chordsData) {
+  return chordsData
+    .map((chord) => {
+      let token = `${chord.root.trim()}${chord.quality.trim()}`;
+      if (chord.inversion) token += `~${chord.inversion}`;
+      const duration = chord.duration ?? DEFAULT_DURATION;
+      if (duration !== DEFAULT_DURATION) token += `*${duration}`;
+      return token;
+    })
+    .join("_");
+}
+
+function toRecords(table) {
+  return table.rows.map((row) =>
+    Object.fromEntries(table.fields.map((field, i) => [field, row[i]])),
+  );
+}
+
+function decodeQualityAnalysis(columns, chords, segments) {
+  return columns.chord.map((chordIndex, position) => {
+    const item = { ...chords[chordIndex] };
+    const segment = columns.segment[position];
+    if (segment !== null) item.segment_context = segments[segment];
+    for (const field of ITEM_FIELDS) {
+      const value = columns[field][position];
+      if (value !== null && value !== undefined) item[field] = value;
+    }
+    return item;
+  });
+}
+
+function mapModes(byMode, decode) {
+  return Object.fromEntries(
+    Object.entries(byMode).map(([mode, value]) => [mode, decode(value)]),
+  );
+}
+
+// Réponse de /analyze au format complet. Un résultat compact est décodé
+// section par section, au premier accès (chaque section est ensuite
+// conservée) : les 7 harmonisations ne sont construites que si elles sont
+// affichées. Les lignes des tables sont partagées entre les modes et ne
+// doivent pas être modifiées. Les autres clés (tonic, borrowed_chords...)
+// sont transmises telles quelles.
+export function decodeAnalysis(payload) {
+  if (!payload || payload.format !== COMPACT_FORMAT) return payload;
+  const { tables } = payload;
+  const sections = {
+    quality_analysis: (value) =>
+      decodeQualityAnalysis(value, chords(), tables.segments),
+    harmonized_chords: (value) =>
+      mapModes(value, (indexes) => indexes.map((i) => chords()[i])),
+    major_modes_substitutions: (value) =>
+      mapModes(value, (data) => ({
+        ...data,
+        substitution: data.substitution.map((i) => substitutions()[i]),
+      })),
+    secondary_dominants: (value) =>
+      mapModes(value, (indexes) =>
+        indexes.map((i) => tables.secondary_dominants[i]),
+      ),
+  };
+  const cache = new Map();
+  const lazy = (key, compute) => () => {
+    if (!cache.has(key)) cache.set(key, compute());
+    return cache.get(key);
+  };
+  const chords = lazy("tables.chords", () => toRecords(tables.chords));
+  const substitutions = lazy("tables.substitutions", () =>
+    toRecords(tables.substitutions),
+  );
+
+  const result = {};
+  for (const [key, value] of Object.entries(payload)) {
+    if (key === "format" || key === "tables") continue;
+    if (key in sections) {
+      Object.defineProperty(result, key, {
+        enumerable: true,
+        get: lazy(key, () => sections[key](value)),
+      });
+    } else {
+      result[key] = value;
+    }
+  }
+  return result;
+}
+
+// En GET, les accords sont identifiés par leur position : l'analyse reprend
+// les ids de la progression envoyée (format complet ou compact)
+export function setChordIds(payload, chordsData) {
+  if (payload.format === COMPACT_FORMAT) {
+    payload.quality_analysis.id = chordsData.map((chord) => chord.id);
+  } else {
+    payload.quality_analysis.forEach((item, index) => {
+      item.id = chordsData[index].id;
+    });
+  }
+}
 
 export default {
-  async analyzeProgression(params) {
-    return await api.get(`/analyze`, params);
+  // Analyse complète, au format compact. Sans notes personnalisées, GET
+  // canonique : le navigateur (ETag) et le cache nginx de /api/analyze
+  // resservent une analyse déjà faite sans nouvel appel à l'IA. Renvoie la
+  // Response brute : un 422 détaille les accords invalides.
+  async analyzeProgression(chordsData, model) {
+    const url = `${APISettings.baseURL}/analyze`;
+    const headers = { Accept: COMPACT_MEDIA_TYPE };
+    if (chordsData.some((chord) => chord.notes?.length)) {
+      return await fetch(url, {
+        method: "POST",
+        headers: { ...headers, "Content-Type": "application/json" },
+        body: JSON.stringify({ chords_data: chordsData, model: model }),
+      });
+    }
+    const params = new URLSearchParams({
+      p: encodeProgression(chordsData),
+      model: model,
+    });
+    return await fetch(`${url}?${params}`, { headers });
+  },
+  // Vérification locale des accords (sans IA), assez rapide pour chaque frappe
+  async validateProgression(chordsData) {
+    return await api.post(`/validate`, { chords_data: chordsData });
+  },
+  async getChordIndex() {
+    return await api.get(`/chords/index`, {});
   },
   // Used by unit tests, uses Public API
   unitTest() {
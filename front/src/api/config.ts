@@ -1,5 +1,7 @@
+// Backend derrière le préfixe /api : proxy nginx en production (cache de
+// /api/analyze), proxy du serveur Vite en développement
 export const APISettings = {
-  baseURL: import.meta.env.VITE_BASE_URL || "http://localhost:8000/api",
+  baseURL: import.meta.env.VITE_BASE_URL || "/api",
   headers: {
     "Content-Type": "application/json",
     Accept: "application/json",
@@ -1,9 +1,31 @@
 import { ref } from "vue";
-import { identifyChordFromNotes } from "@/utils/chordIdentifier.js";
+import analyzer from "@/api/analyzer.ts";
+import {
+  identifyChordFromNotes,
+  setChordIndex,
+} from "@/utils/chordIdentifier.js";
+
+// Index de détection du backend, téléchargé une seule fois pour tous les composants ;
+// en cas d'échec on garde les tables locales et l'instance suivante réessaie
+let chordIndexPromise: Promise<void> | null = null;
+
+function loadChordIndex() {
+  if (!chordIndexPromise) {
+    chordIndexPromise = analyzer
+      .getChordIndex()
+      .then((response) => setChordIndex(response.data))
+      .catch(() => {
+        chordIndexPromise = null;
+      });
+  }
+  return chordIndexPromise;
+}
 
 export function useChordDetector() {
   const detectedChord = ref(null);
 
+  loadChordIndex();
+
   // On utilise une Map pour stocker l'objet note entier (pour le tri)
   // La clé est l'identifiant (ex: 'E4'), la valeur est l'objet note complet.
   const pressedNotes = new Map();
@@ -1,11 +1,14 @@
-import { ref } from "vue";
+import { ref, computed } from "vue";
 import { defineStore } from "pinia";
 import { defaultProgression } from "@/constants.js";
+import { decodeAnalysis } from "@/api/analyzer.ts";
 
 export const useAnalysisStore = defineStore(
   "analysis",
   () => {
     // --- STATE ---
+    // `result` garde la réponse telle que reçue (format compact le plus
+    // souvent, plus léger à persister) : voir le getter `result`
     const lastAnalysis = ref({
       progression: null,
       result: null,
@@ -19,6 +22,10 @@ export const useAnalysisStore = defineStore(
         : defaultProgression,
     );
 
+    // --- GETTERS ---
+    // Analyse au format complet, décodée à la demande
+    const result = computed(() => decodeAnalysis(lastAnalysis.value.result));
+
     // --- ACTIONS ---
     function addChordToProgression(newChord) {
       activeProgression.value.push(newChord);
@@ -43,6 +50,7 @@ export const useAnalysisStore = defineStore(
     return {
       lastAnalysis,
       activeProgression,
+      result,
       addChordToProgression, // L'action principale
       setLastAnalysis,
       clearResult,
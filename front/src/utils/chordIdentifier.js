@@ -4,6 +4,54 @@ import {
   ENHARMONIC_EQUIVALENTS,
 } from "@/constants";
 
+// Index inverse servi par le backend (GET /chords/index), chargé au démarrage
+let chordIndex = null;
+
+/**
+ * Enregistre l'index inverse ensemble de notes -> accords construit par le backend.
+ * @param {object} index - Le contenu de GET /chords/index.
+ */
+export function setChordIndex(index) {
+  chordIndex = index;
+}
+
+function toPitchClass(noteName) {
+  return NOTES_FLAT.indexOf(ENHARMONIC_EQUIVALENTS[noteName] || noteName);
+}
+
+/**
+ * Recherche directe dans l'index du backend : masque 12 bits des notes jouées,
+ * puis choix de l'accord dont la basse est la fondamentale s'il existe.
+ */
+function identifyChordFromIndex(noteNames, fullNoteIdentifiers) {
+  const pitchClasses = noteNames.map(toPitchClass);
+  if (pitchClasses.includes(-1)) return null;
+
+  const mask = pitchClasses.reduce(
+    (acc, pitchClass) => acc | (1 << pitchClass),
+    0,
+  );
+  const candidates = chordIndex.chords[mask];
+  if (!candidates) return null;
+
+  const bass = toPitchClass(fullNoteIdentifiers[0].slice(0, -1));
+  const entry =
+    candidates.find((candidate) => candidate >> 8 === bass) ?? candidates[0];
+  const root = entry >> 8;
+  const qualityIndex = entry & 0xff;
+  return {
+    id: Date.now(),
+    root: chordIndex.notes[root],
+    quality: chordIndex.qualities[qualityIndex],
+    inversion: Math.max(
+      chordIndex.intervals[qualityIndex].indexOf((bass - root + 12) % 12),
+      0,
+    ),
+    duration: 2,
+    notes: fullNoteIdentifiers,
+  };
+}
+
 /**
  * Identifie un accord à partir d'une liste de noms de notes.
  * @param {string[]} noteNames - Noms des notes sans l'octave (ex: ['C', 'E', 'G']).
@@ -12,6 +60,7 @@ import {
  */
 export function identifyChordFromNotes(noteNames, fullNoteIdentifiers) {
   if (noteNames.length === 0) return null;
+  if (chordIndex) return identifyChordFromIndex(noteNames, fullNoteIdentifiers);
 
   for (const potentialRoot of noteNames) {
     const normalizedRoot =